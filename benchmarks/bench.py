@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite • hot paths KPI + generadores
+- Casos: generate, build_daily, build_agent_weekly, compute_stability, flag_outliers
+  (+ ``.approx``: sketches KLL con ``APPROX_EPS``), kpi.main / kpi.main.compact (CLI kpi de
+  punta a punta sobre un Files/raw ya escrito), live.ingest (Fabric-mock) y
+  build_capacity_budget / build_weekly_perf (generate_rich_seed, SQL).
+- Arranque de la CLI (``startup.*``): ``scripts/ops_analytics.py [<cmd>] --help`` en un
+  intérprete nuevo, una vez por corrida (tier ``cli``), con los mismos umbrales.
+- Tiers de escala por número de agentes (60 / 1k / 10k / 100k).
+- Cada caso corre en su propio subproceso: pico de RSS aislado y sin choque entre
+  los paquetes ``src`` de ambos proyectos.
+- Resultados (wall time, rows/s, pico RSS) se acumulan en un historial JSON local
+  (``benchmarks/history.json``, ignorado por git); solo ``baseline.json`` se versiona;
+  ``compare`` falla (exit 1) si un caso empeora más que el umbral frente al baseline.
+
+Uso:
+    python benchmarks/bench.py run --tiers 60,1k --repeat 3
+    python benchmarks/bench.py baseline            # fija la última corrida como baseline
+    python benchmarks/bench.py compare --threshold 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, el pico RSS de startup.* queda en 0 (no comparable)
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+FABRIC_ROOT = ROOT / "projects" / "ops-stability-analytics-fabric-mock"
+SQL_ROOT = ROOT / "projects" / "ops-stability-analytics-sql"
+
+BENCH_DIR = Path(__file__).resolve().parent
+CLI = ROOT / "scripts" / "ops_analytics.py"
+DEFAULT_HISTORY = BENCH_DIR / "history.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+TIERS = {"60": 60, "1k": 1_000, "10k": 10_000, "100k": 100_000}
+DEFAULT_TIERS = "60,1k,10k"
+DEFAULT_DAYS = 90
+DEFAULT_WEEKS = 26
+DEFAULT_TIMEOUT = 1800
+
+# Umbrales de regresión (fracción sobre baseline) por métrica comparada
+DEFAULT_THRESHOLDS = {"wall_s": 0.25, "peak_rss_mb": 0.25}
+
+# caso → proyecto cuyo root se pone en sys.path del subproceso
+CASES = {
+    "generate": FABRIC_ROOT,
+    "build_daily": FABRIC_ROOT,
+    "build_agent_weekly": FABRIC_ROOT,
+    "compute_stability": FABRIC_ROOT,
+    "flag_outliers": FABRIC_ROOT,
+    "compute_stability.approx": FABRIC_ROOT,
+    "flag_outliers.approx": FABRIC_ROOT,
+    "rolling_stability": FABRIC_ROOT,
+    "kpi.main": FABRIC_ROOT,
+    "kpi.main.compact": FABRIC_ROOT,
+    "live.ingest": FABRIC_ROOT,
+    "polars.build_agent_weekly": FABRIC_ROOT,
+    "polars.compute_stability": FABRIC_ROOT,
+    "polars.flag_outliers": FABRIC_ROOT,
+    "rich_seed.build_capacity_budget": SQL_ROOT,
+    "rich_seed.build_weekly_perf": SQL_ROOT,
+}
+# Arranque de la CLI: caso → argumentos (tier fijo "cli", no depende del número de agentes)
+STARTUP_CASES = {
+    "startup.help": ["--help"],
+    **{f"startup.{cmd}": [cmd, "--help"] for cmd in ("generate", "kpi", "live", "smoke", "seed", "load")},
+}
+STARTUP_TIER = "cli"
+# *.approx: error de rango de los sketches (--approx-eps)
+APPROX_EPS = 0.01
+# live.ingest: eventos entre flushes (≈ un flush por segundo de ingesta)
+LIVE_FLUSH_EVENTS = 50_000
+
+# -----------------------------
+# Memoria del proceso
+# -----------------------------
+def _load_instrument():
+    """``src/pipeline/instrument.py`` (solo stdlib) cargado por ruta: sin importar el paquete ``src``."""
+    spec = importlib.util.spec_from_file_location(
+        "_bench_instrument", FABRIC_ROOT / "src" / "pipeline" / "instrument.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # dataclasses resuelve las anotaciones vía sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+_instrument = _load_instrument()
+# En otros SO el pico incluye la preparación del caso (sin reinicio de VmHWM)
+_reset_peak_rss = _instrument._reset_peak_rss
+_peak_rss_mb = _instrument._peak_rss_mb
+
+# -----------------------------
+# Preparación de casos (subproceso)
+# -----------------------------
+def _fabric_case(case: str, n_agents: int, days: int):
+    from src.analytics.kpi_calculations import (
+        build_agent_weekly,
+        build_daily,
+        compute_stability,
+        flag_outliers,
+    )
+    from src.analytics.rolling import rolling_stability
+    from src.etl.generate_synthetic_data import generate
+
+    if case == "generate":
+        return (lambda: generate(n_agents, days, 42)), n_agents * days
+    raw = generate(n_agents, days, 42)
+    if case.startswith("kpi.main"):
+        return _kpi_main_case(raw, compact=case.endswith(".compact"))
+    if case.startswith("polars."):
+        return _polars_case(case, raw)
+    if case == "build_daily":
+        return (lambda: build_daily(raw)), len(raw)
+    daily = build_daily(raw)
+    if case == "build_agent_weekly":
+        return (lambda: build_agent_weekly(daily)), len(daily)
+    if case == "live.ingest":
+        return _live_case(daily)
+    weekly = build_agent_weekly(daily)
+    del raw, daily
+    if case.endswith(".approx"):
+        fn = compute_stability if case.startswith("compute_stability") else flag_outliers
+        return (lambda: fn(weekly, approx_eps=APPROX_EPS)), len(weekly)
+    fn = {"compute_stability": compute_stability, "rolling_stability": rolling_stability}.get(case, flag_outliers)
+    return (lambda: fn(weekly)), len(weekly)
+
+def _kpi_main_case(raw, compact: bool):
+    """``kpi_calculations.main`` completo (lectura → Tables) sobre un lakehouse temporal en el cwd."""
+    from src.analytics import kpi_calculations as kpi
+
+    lh = Path("lakehouse_bench")
+    (lh / "Files" / "raw").mkdir(parents=True, exist_ok=True)
+    raw.to_parquet(lh / "Files" / "raw" / "ops_daily.parquet", index=False)
+    rows = len(raw)
+    del raw
+    argv = ["--lakehouse", str(lh)] + (["--compact"] if compact else [])
+    return (lambda: kpi.main(argv)), rows
+
+def _live_case(daily):
+    """Modo live: eventos hours + case por fila en orden de fecha; un flush cada ``LIVE_FLUSH_EVENTS`` eventos."""
+    from src.analytics.live import Event, LiveAggregator
+
+    daily = daily.sort_values("date", kind="stable")
+    cols = (daily["date"].dt.strftime("%Y-%m-%d").to_numpy(), daily["agent_id"].to_numpy(),
+            daily["team_id"].to_numpy(), daily["productive_hours"].to_numpy(), daily["cases_closed"].to_numpy())
+
+    def run():
+        agg = LiveAggregator()
+        for i, (d, agent, team, hours, cases) in enumerate(zip(*cols), 1):
+            agg.add(Event(d, agent, team, "hours", float(hours)))
+            agg.add(Event(d, agent, team, "case", float(cases)))
+            if i % (LIVE_FLUSH_EVENTS // 2) == 0:
+                agg.flush()
+        return agg.flush()
+    return run, 2 * len(daily)
+
+def _polars_case(case: str, raw):
+    """Mismas etapas con ``--backend polars``; la entrada ya está en memoria como en pandas."""
+    import polars as pl
+    from src.analytics import polars_backend as pb
+
+    daily = pb.build_daily(pl.from_pandas(raw))
+    if case == "polars.build_agent_weekly":
+        return (lambda: pb.build_agent_weekly(daily)), len(raw)
+    weekly = pb.build_agent_weekly(daily)
+    fn = pb.compute_stability if case == "polars.compute_stability" else pb.flag_outliers
+    return (lambda: fn(weekly)), len(weekly)
+
+def _rich_seed_case(case: str, n_agents: int, weeks: int):
+    from src.sql import generate_rich_seed as seed
+
+    _, df_agent, df_case_price = seed.build_dimensions(n_agents)
+    cal_weeks = seed.build_calendar_weeks(weeks)
+    rows = len(df_agent) * len(cal_weeks)
+    if case.endswith("build_capacity_budget"):
+        return (lambda: seed.build_capacity_budget(df_agent, cal_weeks)), rows
+    return (lambda: seed.build_weekly_perf(df_agent, cal_weeks, df_case_price)), rows
+
+def _startup_case(case: str, repeat: int) -> dict:
+    """Latencia de un intérprete nuevo con la CLI; pico RSS de los hijos (RUSAGE_CHILDREN)."""
+    cmd = [sys.executable, str(CLI), *STARTUP_CASES[case]]
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, capture_output=True, check=True)
+        times.append(time.perf_counter() - t0)
+    wall = min(times)
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else 0
+    return {
+        "rows": 1,
+        "wall_s": round(wall, 6),
+        "rows_per_s": round(1 / wall, 1),  # invocaciones/s
+        "peak_rss_mb": round(peak / (2**20 if sys.platform == "darwin" else 1024), 1),
+    }
+
+def run_case(case: str, n_agents: int, days: int, weeks: int, repeat: int) -> dict:
+    """Ejecuta un caso en este proceso y devuelve sus métricas (mejor wall time de ``repeat``)."""
+    if case in STARTUP_CASES:
+        return _startup_case(case, repeat)
+    sys.path.insert(0, str(CASES[case]))
+    if case.startswith("rich_seed."):
+        fn, rows = _rich_seed_case(case, n_agents, weeks)
+    else:
+        fn, rows = _fabric_case(case, n_agents, days)
+
+    _reset_peak_rss()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    wall = min(times)
+    return {
+        "rows": int(rows),
+        "wall_s": round(wall, 6),
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb() or 0, 1),  # 0: sin medida (no comparable)
+    }
+
+# -----------------------------
+# Orquestación
+# -----------------------------
+def _git_sha() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _spawn(case: str, tier: str, args: argparse.Namespace) -> dict:
+    agents = TIERS.get(tier, 0)
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "_case", case,
+        "--agents", str(agents), "--days", str(args.days),
+        "--weeks", str(args.weeks), "--repeat", str(args.repeat),
+    ]
+    base = {"case": case, "tier": tier, "agents": agents}
+    # cwd temporal: ningún caso escribe en el árbol del repo
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            proc = subprocess.run(cmd, cwd=tmp, capture_output=True, text=True, timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            return {**base, "status": "timeout"}
+    if proc.returncode != 0:
+        return {**base, "status": "error", "error": proc.stderr.strip().splitlines()[-1:]}
+    return {**base, "status": "ok", **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+def load_history(path: Path) -> list[dict]:
+    return json.loads(path.read_text()) if path.exists() else []
+
+def cmd_run(args: argparse.Namespace) -> int:
+    tiers = args.tiers.split(",")
+    unknown = [t for t in tiers if t not in TIERS] + [
+        c for c in args.cases if c not in CASES and c not in STARTUP_CASES
+    ]
+    if unknown:
+        print(f"❌ Tier/caso desconocido: {unknown}")
+        return 2
+
+    jobs = [(case, tier) for tier in tiers for case in args.cases if case in CASES]
+    jobs += [(case, STARTUP_TIER) for case in args.cases if case in STARTUP_CASES]
+    results = []
+    for case, tier in jobs:
+        r = _spawn(case, tier, args)
+        results.append(r)
+        if r["status"] == "ok":
+            print(f"⏱️  {case:34s} {tier:>5s}  {r['wall_s']:9.3f}s  "
+                  f"{r['rows_per_s']:>14,.0f} rows/s  {r['peak_rss_mb']:8.1f} MB")
+        else:
+            print(f"⚠️  {case:34s} {tier:>5s}  {r['status']}")
+
+    run = {
+        "run_id": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "git_sha": _git_sha(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "days": args.days,
+        "weeks": args.weeks,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    history = load_history(args.history)
+    history.append(run)
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    args.history.write_text(json.dumps(history, indent=2))
+    print(f"✅ Run {run['run_id']} → {args.history}")
+    return 0
+
+def _select_run(history: list[dict], run_id: str) -> dict | None:
+    if not history:
+        return None
+    if run_id == "latest":
+        return history[-1]
+    return next((r for r in history if r["run_id"] == run_id), None)
+
+def cmd_baseline(args: argparse.Namespace) -> int:
+    run = _select_run(load_history(args.history), args.run)
+    if run is None:
+        print(f"❌ No hay corrida '{args.run}' en {args.history}")
+        return 2
+    args.baseline.write_text(json.dumps(run, indent=2))
+    print(f"✅ Baseline ← run {run['run_id']} ({args.baseline})")
+    return 0
+
+def compare_runs(current: dict, baseline: dict, thresholds: dict[str, float]) -> list[dict]:
+    """Filas de comparación por (caso, tier) presentes y OK en ambas corridas."""
+    ref = {(r["case"], r["tier"]): r for r in baseline["results"] if r.get("status") == "ok"}
+    rows = []
+    for r in current["results"]:
+        b = ref.get((r["case"], r["tier"]))
+        if r.get("status") != "ok" or b is None:
+            continue
+        for metric, limit in thresholds.items():
+            if not b.get(metric) or r.get(metric) is None:
+                continue  # métrica ausente en alguna corrida (p. ej. baseline previo): no comparable
+            ratio = r[metric] / b[metric]
+            rows.append({
+                "case": r["case"], "tier": r["tier"], "metric": metric,
+                "baseline": b[metric], "current": r[metric],
+                "ratio": ratio, "regressed": ratio > 1 + limit,
+            })
+    return rows
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    current = _select_run(load_history(args.history), args.run)
+    if current is None or not args.baseline.exists():
+        print(f"❌ Falta historial ({args.history}) o baseline ({args.baseline})")
+        return 2
+    baseline = json.loads(args.baseline.read_text())
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.threshold is not None:
+        thresholds["wall_s"] = args.threshold
+    if args.rss_threshold is not None:
+        thresholds["peak_rss_mb"] = args.rss_threshold
+
+    rows = compare_runs(current, baseline, thresholds)
+    for c in rows:
+        mark = "❌" if c["regressed"] else "✅"
+        print(f"{mark} {c['case']:34s} {c['tier']:>5s} {c['metric']:12s} "
+              f"{c['baseline']:>10.3f} → {c['current']:>10.3f}  ({c['ratio'] - 1:+.1%})")
+    # Casos que ya no completan (timeout/error) también son regresión
+    broken = [
+        r for r in current["results"]
+        if r.get("status") != "ok"
+        and any(b["case"] == r["case"] and b["tier"] == r["tier"] and b.get("status") == "ok"
+                for b in baseline["results"])
+    ]
+    for r in broken:
+        print(f"❌ {r['case']:34s} {r['tier']:>5s} {r['status']} (ok en baseline)")
+
+    failed = sum(c["regressed"] for c in rows) + len(broken)
+    print(f"{'❌' if failed else '🎯'} {failed} regresión(es) · "
+          f"run {current['run_id']} vs baseline {baseline['run_id']}")
+    return 1 if failed else 0
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of KPI and generator hot paths")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Stored baseline run")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="Run the suite and append the results to the history")
+    p_run.add_argument("--tiers", default=os.getenv("BENCH_TIERS", DEFAULT_TIERS),
+                       help=f"Comma-separated tiers among {list(TIERS)}")
+    p_run.add_argument("--cases", nargs="+", default=[*CASES, *STARTUP_CASES], help="Subset of cases")
+    p_run.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Days of daily history (Fabric cases)")
+    p_run.add_argument("--weeks", type=int, default=DEFAULT_WEEKS, help="Weeks of calendar (rich seed cases)")
+    p_run.add_argument("--repeat", type=int, default=3, help="Repetitions per case (best wall time kept)")
+    p_run.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="Seconds per case before 'timeout'")
+
+    p_base = sub.add_parser("baseline", help="Store a run from the history as the baseline")
+    p_base.add_argument("--run", default="latest", help="run_id or 'latest'")
+
+    p_cmp = sub.add_parser("compare", help="Fail if a run regresses against the baseline")
+    p_cmp.add_argument("--run", default="latest", help="run_id or 'latest'")
+    p_cmp.add_argument("--threshold", type=float, default=None,
+                       help=f"Max wall-time slowdown fraction (default {DEFAULT_THRESHOLDS['wall_s']})")
+    p_cmp.add_argument("--rss-threshold", type=float, default=None,
+                       help=f"Max peak-RSS growth fraction (default {DEFAULT_THRESHOLDS['peak_rss_mb']})")
+
+    p_case = sub.add_parser("_case", help=argparse.SUPPRESS)  # interno: un caso por subproceso
+    p_case.add_argument("case", choices=[*CASES, *STARTUP_CASES])
+    p_case.add_argument("--agents", type=int, required=True)
+    p_case.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    p_case.add_argument("--weeks", type=int, default=DEFAULT_WEEKS)
+    p_case.add_argument("--repeat", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    if args.cmd == "_case":
+        print(json.dumps(run_case(args.case, args.agents, args.days, args.weeks, args.repeat)))
+        return 0
+    return {"run": cmd_run, "baseline": cmd_baseline, "compare": cmd_compare}[args.cmd](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the benchmark regression gate (benchmarks/bench.py compare).
+"""
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "bench", Path(__file__).resolve().parent / "bench.py"
+)
+bench = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = bench
+spec.loader.exec_module(bench)
+
+THRESHOLDS = {"wall_s": 0.25, "peak_rss_mb": 0.25}
+
+
+def _run(run_id: str, *results: dict) -> dict:
+    return {"run_id": run_id, "results": [{"tier": "1k", "status": "ok", **r} for r in results]}
+
+
+def test_compare_runs_within_threshold_passes():
+    base = _run("b", {"case": "build_daily", "wall_s": 1.0, "peak_rss_mb": 100.0})
+    cur = _run("c", {"case": "build_daily", "wall_s": 1.2, "peak_rss_mb": 90.0})
+    rows = bench.compare_runs(cur, base, THRESHOLDS)
+    assert [(r["metric"], r["regressed"]) for r in rows] == [("wall_s", False), ("peak_rss_mb", False)]
+
+
+def test_compare_runs_flags_regression_per_metric():
+    base = _run("b", {"case": "build_daily", "wall_s": 1.0, "peak_rss_mb": 100.0})
+    cur = _run("c", {"case": "build_daily", "wall_s": 1.3, "peak_rss_mb": 125.0})
+    rows = {r["metric"]: r for r in bench.compare_runs(cur, base, THRESHOLDS)}
+    assert rows["wall_s"]["regressed"] and rows["wall_s"]["ratio"] == 1.3
+    assert not rows["peak_rss_mb"]["regressed"]  # justo en el umbral: no regresa
+
+
+def test_compare_runs_skips_missing_metrics_and_cases():
+    base = _run("b",
+                {"case": "build_daily", "wall_s": 1.0},                      # baseline sin RSS
+                {"case": "flag_outliers", "wall_s": 1.0, "peak_rss_mb": 0})  # RSS 0: no comparable
+    cur = _run("c",
+               {"case": "build_daily", "wall_s": 1.1, "peak_rss_mb": 500.0},
+               {"case": "flag_outliers", "wall_s": 0.9},                    # corrida sin RSS
+               {"case": "generate", "wall_s": 9.0, "peak_rss_mb": 900.0})  # caso nuevo
+    rows = bench.compare_runs(cur, base, THRESHOLDS)
+    assert [(r["case"], r["metric"]) for r in rows] == [("build_daily", "wall_s"), ("flag_outliers", "wall_s")]
+    assert not any(r["regressed"] for r in rows)
+
+
+def test_compare_exit_code_counts_broken_cases(tmp_path, capsys):
+    history, baseline = tmp_path / "history.json", tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_run("b", {"case": "build_daily", "wall_s": 1.0, "peak_rss_mb": 100.0})))
+    cur = _run("c", {"case": "build_daily", "wall_s": 1.0, "peak_rss_mb": 100.0})
+    history.write_text(json.dumps([cur]))
+    argv = ["--history", str(history), "--baseline", str(baseline), "compare"]
+    assert bench.main(argv) == 0
+
+    cur["results"][0] = {"case": "build_daily", "tier": "1k", "status": "timeout"}
+    history.write_text(json.dumps([cur]))
+    assert bench.main(argv) == 1
+    assert "ok en baseline" in capsys.readouterr().out
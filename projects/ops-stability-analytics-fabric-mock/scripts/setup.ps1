@@ -1,7 +1,7 @@
 python -m venv .venv
 .\.venv\Scripts\Activate.ps1
 pip install -r requirements.txt
-python src\etl\generate_synthetic_data.py
-python src\analytics\kpi_calculations.py
+python -m src.etl.generate_synthetic_data
+python -m src.analytics.kpi_calculations
 pytest -q
 Write-Host "Done."
\ No newline at end of file
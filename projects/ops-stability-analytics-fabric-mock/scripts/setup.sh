@@ -3,7 +3,7 @@ set -e
 python -m venv .venv
 source .venv/bin/activate
 pip install -r requirements.txt
-python src/etl/generate_synthetic_data.py
-python src/analytics/kpi_calculations.py
+python -m src.etl.generate_synthetic_data
+python -m src.analytics.kpi_calculations
 pytest -q || true
 echo "Done."
\ No newline at end of file
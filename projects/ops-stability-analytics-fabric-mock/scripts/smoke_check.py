@@ -1,73 +1,119 @@
 # -*- coding: utf-8 -*-
 """
 Smoke test for Ops Stability Analytics
-- Verifica pipeline Fabric-mock (Parquet)
-- (Opcional) Verifica capa SQL si SMOKE_SQL=1
+- Verifica pipeline Fabric-mock (Parquet) llamando a las funciones en proceso
+- (Opcional) Verifica capa SQL si SMOKE_SQL=1 / --sql
+Las cadenas de checks (Fabric, cada consulta SQL) corren en paralelo en un pool de
+hilos; cada check reporta su tiempo. Sin subprocesos ni relectura de los Parquet:
+la validación usa el footer y las estadísticas de row group (src/lakehouse/validate.py).
 """
 from __future__ import annotations
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-import pandas as pd
+from typing import Callable
+
+if __package__ in (None, ""):  # ejecución directa: python scripts/smoke_check.py
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
 
-def fail(msg: str) -> None:
-    print(f"❌ {msg}")
-    sys.exit(1)
-
-def ok(msg: str) -> None:
-    print(f"✅ {msg}")
-
-def check_columns(df: pd.DataFrame, required: list[str], name: str) -> None:
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        fail(f"{name}: faltan columnas {missing}")
-
-def smoke_fabric(py_bin: str) -> None:
-    # 1) Raw
-    rc = os.system(f"{py_bin} src/etl/generate_synthetic_data.py")
-    if rc != 0:
-        fail("Fallo al ejecutar generate_synthetic_data.py")
-    # 2) KPIs -> stability + flags
-    rc = os.system(f"{py_bin} src/analytics/kpi_calculations.py")
-    if rc != 0:
-        fail("Fallo al ejecutar kpi_calculations.py")
-
-    lh = Path(os.getenv("LAKEHOUSE_PATH", "lakehouse_sim"))
-    raw_parquet = lh / "Files" / "raw" / "ops_daily.parquet"
-    stab_parquet = lh / "Tables" / "agent_stability.parquet"
-    flags_parquet = lh / "Tables" / "weekly_flags.parquet"
-
-    for p in [raw_parquet, stab_parquet, flags_parquet]:
-        if not p.exists():
-            fail(f"No se generó {p}")
-
-    raw = pd.read_parquet(raw_parquet)
-    stab = pd.read_parquet(stab_parquet)
-    flags = pd.read_parquet(flags_parquet)
-
-    if raw.empty:  fail("raw (ops_daily.parquet) está vacío")
-    if stab.empty: fail("agent_stability.parquet vacío")
-    if flags.empty:fail("weekly_flags.parquet vacío")
-
-    check_columns(raw,  ["date","agent_id","team_id","productive_hours","cases_closed"], "raw")
-    check_columns(stab, ["agent_id","team_id","cv_hours","cvm_hours","cv_cases","cvm_cases","quartile_efficiency"], "agent_stability")
-    check_columns(flags, ["agent_id","team_id","iso_year","iso_week","hours_mean","cases_mean","out_hours_flag","out_cases_flag"], "weekly_flags")
-
-    for col in ["out_hours_flag","out_cases_flag"]:
-        s = set(pd.Series(flags[col]).dropna().unique().tolist())
-        if not s.issubset({0,1}):
-            fail(f"{col} contiene valores no binarios: {s}")
-
-    ok(f"Fabric-mock OK: {len(raw)} raw, {len(stab)} stability, {len(flags)} weekly_flags")
-
-def smoke_sql() -> None:
-    try:
-        from sqlalchemy import create_engine, text
-    except Exception as e:
-        fail(f"No se pudo importar SQLAlchemy: {e}")
+from src.analytics import kpi_calculations as kpi
+from src.cli import smoke_parser
+from src.config import DEFAULT_AGENTS, DEFAULT_DAYS, DEFAULT_SEED
+from src.etl import generate_synthetic_data as gen
+from src.lakehouse.validate import validate_table
+
+Check = Callable[[], str]  # devuelve el detalle a reportar; lanza SmokeError si falla
+
+class SmokeError(RuntimeError):
+    """Un check de smoke no se cumple."""
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    seconds: float
+    detail: str = ""
 
-    # Construye URL desde env (DATABASE_URL o vars POSTGRES_*)
+def fail(msg: str) -> None:
+    raise SmokeError(msg)
+
+# -----------------------------
+# Ejecución de cadenas
+# -----------------------------
+def run_chain(chain: list[tuple[str, Check]]) -> list[CheckResult]:
+    """Ejecuta los checks en orden; se detiene en el primero que falla."""
+    results = []
+    for name, check in chain:
+        t0 = time.perf_counter()
+        try:
+            ok, detail = True, check()
+        except SmokeError as e:
+            ok, detail = False, str(e)
+        except Exception as e:  # error inesperado: se reporta como fallo del check
+            ok, detail = False, f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+        results.append(CheckResult(name, ok, time.perf_counter() - t0, detail))
+        if not ok:
+            break
+    return results
+
+def run_smoke(chains: list[list[tuple[str, Check]]], workers: int | None = None) -> list[CheckResult]:
+    """Cadenas independientes en paralelo (hilos); resultados en el orden de ``chains``."""
+    with ThreadPoolExecutor(max_workers=workers or max(len(chains), 1)) as pool:
+        futures = [pool.submit(run_chain, chain) for chain in chains]
+        return [r for fut in futures for r in fut.result()]
+
+# -----------------------------
+# Fabric-mock
+# -----------------------------
+def fabric_checks(
+    lh_root: Path,
+    n_agents: int = DEFAULT_AGENTS,
+    days: int = DEFAULT_DAYS,
+    seed: int = DEFAULT_SEED,
+) -> list[tuple[str, Check]]:
+    """generate → kpi → validate; ``kpi`` ejecuta ``kpi_calculations.main`` en proceso (misma ruta que la CLI)."""
+    raw_parquet = lh_root / "Files" / "raw" / "ops_daily.parquet"
+    stab_parquet = lh_root / "Tables" / "agent_stability.parquet"
+    flags_parquet = lh_root / "Tables" / "weekly_flags.parquet"
+
+    def generate() -> str:
+        raw_parquet.parent.mkdir(parents=True, exist_ok=True)
+        raw = gen.generate(n_agents, days, seed)
+        gen.write_stream(iter([raw]), raw_parquet, "parquet")
+        return f"{len(raw):,} rows → {raw_parquet}"
+
+    def kpis() -> str:
+        try:
+            kpi.main(["--lakehouse", str(lh_root)])
+        except SystemExit as e:  # los errores de main salen como SystemExit("❌ ...")
+            fail(str(e.code))
+        stab, flags = (pq.ParquetFile(p).metadata.num_rows for p in (stab_parquet, flags_parquet))
+        return f"{stab:,} stability, {flags:,} weekly_flags"
+
+    def validate() -> str:
+        # Footer + estadísticas de row group de lo escrito en disco (sin leer datos)
+        reports = [validate_table(p) for p in (raw_parquet, stab_parquet, flags_parquet)]
+        errors = [e for r in reports for e in r.errors]
+        if errors:
+            fail("; ".join(errors))
+        raw, stab, flags = (r.num_rows for r in reports)
+        sampled = sorted({c for r in reports for c in r.sampled})
+        summary = f"{raw:,} raw, {stab:,} stability, {flags:,} weekly_flags"
+        return summary + (f" (sampled: {sampled})" if sampled else "")
+
+    return [("fabric.generate", generate), ("fabric.kpi", kpis), ("fabric.validate", validate)]
+
+# -----------------------------
+# Capa SQL
+# -----------------------------
+def sql_url() -> str:
+    """DATABASE_URL o URL construida desde las vars POSTGRES_*."""
     url = os.getenv("DATABASE_URL")
     if not url:
         host = os.getenv("POSTGRES_HOST","localhost")
@@ -76,47 +122,82 @@ def smoke_sql() -> None:
         user = os.getenv("POSTGRES_USER","ops_user")
         pwd  = os.getenv("POSTGRES_PASSWORD","ops_pass")
         url = f"postgresql+psycopg://{user}:{pwd}@{host}:{port}/{db}"
+    return url
+
+def sql_chains(url: str) -> list[list[tuple[str, Check]]]:
+    """Una cadena por grupo de consultas; comparten el engine (pool de conexiones)."""
+    try:
+        from sqlalchemy import create_engine, text
+    except Exception as e:
+        fail(f"No se pudo importar SQLAlchemy: {e}")
 
     eng = create_engine(url, pool_pre_ping=True)
-    with eng.connect() as cx:
-        cx.execute(text("SELECT 1"))
-
-        for tbl in [
-            "ops.synthetic_agent",
-            "ops.synthetic_weekly_perf",
-            "ops.synthetic_budget_weekly",
-            "ops.synthetic_capacity_weekly",
-        ]:
-            cnt = cx.execute(text(f"SELECT COUNT(*) FROM {tbl}")).scalar()
-            if not cnt:
-                fail(f"{tbl} sin datos (count=0)")
-        ok("Tablas sintéticas OK")
-
-        cols = cx.execute(text("""
-            SELECT column_name FROM information_schema.columns
-            WHERE table_schema='ops' AND table_name='v_exec_finance'
-        """)).fetchall()
-        if not cols:
-            fail("Vista ops.v_exec_finance no existe")
-
-        cnt_view = cx.execute(text("SELECT COUNT(*) FROM ops.v_exec_finance")).scalar()
-        if not cnt_view:
-            fail("ops.v_exec_finance sin filas")
-
-        sample = cx.execute(text("""
-            SELECT team_id, iso_year, iso_week, revenue, hours, cost_real, margin
-            FROM ops.v_exec_finance
-            ORDER BY iso_year DESC, iso_week DESC
-            LIMIT 5
-        """)).fetchall()
-        if not sample:
-            fail("ops.v_exec_finance no devuelve resultados")
-        ok(f"SQL OK: v_exec_finance rows={cnt_view}")
 
-if __name__ == "__main__":
+    def synthetic_tables() -> str:
+        with eng.connect() as cx:
+            cx.execute(text("SELECT 1"))
+            for tbl in [
+                "ops.synthetic_agent",
+                "ops.synthetic_weekly_perf",
+                "ops.synthetic_budget_weekly",
+                "ops.synthetic_capacity_weekly",
+            ]:
+                cnt = cx.execute(text(f"SELECT COUNT(*) FROM {tbl}")).scalar()
+                if not cnt:
+                    fail(f"{tbl} sin datos (count=0)")
+        return "Tablas sintéticas OK"
+
+    def exec_finance() -> str:
+        with eng.connect() as cx:
+            cols = cx.execute(text("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema='ops' AND table_name='v_exec_finance'
+            """)).fetchall()
+            if not cols:
+                fail("Vista ops.v_exec_finance no existe")
+
+            cnt_view = cx.execute(text("SELECT COUNT(*) FROM ops.v_exec_finance")).scalar()
+            if not cnt_view:
+                fail("ops.v_exec_finance sin filas")
+
+            sample = cx.execute(text("""
+                SELECT team_id, iso_year, iso_week, revenue, hours, cost_real, margin
+                FROM ops.v_exec_finance
+                ORDER BY iso_year DESC, iso_week DESC
+                LIMIT 5
+            """)).fetchall()
+            if not sample:
+                fail("ops.v_exec_finance no devuelve resultados")
+        return f"v_exec_finance rows={cnt_view}"
+
+    return [[("sql.synthetic_tables", synthetic_tables)], [("sql.exec_finance", exec_finance)]]
+
+# -----------------------------
+# Reporte
+# -----------------------------
+def report(results: list[CheckResult], wall: float) -> bool:
+    width = max((len(r.name) for r in results), default=0)
+    for r in results:
+        print(f"{'✅' if r.ok else '❌'} {r.name:<{width}}  {r.seconds:7.2f}s  {r.detail}")
+    print(f"⏱️  {len(results)} checks in {wall:.2f}s wall ({sum(r.seconds for r in results):.2f}s summed)")
+    return all(r.ok for r in results)
+
+def main(argv: list[str] | None = None) -> int:
     load_dotenv()
-    py = os.getenv("PYTHON_BIN", sys.executable)
-    smoke_fabric(py)
-    if os.getenv("SMOKE_SQL","0") == "1":
-        smoke_sql()
-    print("🎯 Smoke test COMPLETO: Fabric-mock + (opcional) SQL")
\ No newline at end of file
+    parser = smoke_parser()
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    chains = [fabric_checks(args.lakehouse, args.agents, args.days, args.seed)]
+    if args.sql:
+        try:
+            chains += sql_chains(sql_url())
+        except SmokeError as e:
+            chains.append([("sql.connect", lambda e=e: fail(str(e)))])
+    if not report(run_smoke(chains, args.workers), time.perf_counter() - t0):
+        return 1
+    print("🎯 Smoke test COMPLETO: Fabric-mock + (opcional) SQL")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Recalculo incremental de KPIs
+Persiste parciales semanales (sum/count) + watermark de fechas procesadas y,
+ante días nuevos, recalcula solo los agente-semanas, agentes y equipo-semanas afectados.
+El resultado es el mismo que una reconstrucción completa.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from .kpi_calculations import assign_quartiles, compute_variability, flag_outliers
+from .weekly_partials import WEEK_KEYS, finalize_weekly, merge_partials, weekly_partials
+
+__all__ = [
+    "load_state",
+    "save_state",
+    "max_date",
+    "refresh_kpis",
+    "replace_partials",
+]
+
+PARTIALS_FILE = "weekly_partials.parquet"
+WATERMARK_FILE = "watermark.json"
+
+AGENT_KEYS = ["agent_id", "team_id"]
+TEAM_WEEK_KEYS = ["team_id", "iso_year", "iso_week"]
+
+# -----------------------------
+# Estado persistido
+# -----------------------------
+def load_state(state_dir: Path) -> tuple[pd.DataFrame | None, str | None]:
+    """Devuelve (parciales, watermark) o (None, None) si aún no hay estado."""
+    partials = Path(state_dir) / PARTIALS_FILE
+    wm = Path(state_dir) / WATERMARK_FILE
+    if not (partials.exists() and wm.exists()):
+        return None, None
+    return pd.read_parquet(partials), json.loads(wm.read_text())["max_date"]
+
+def save_state(state_dir: Path, partials: pd.DataFrame, watermark: str | None) -> None:
+    state_dir = Path(state_dir)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    partials.to_parquet(state_dir / PARTIALS_FILE, index=False)
+    (state_dir / WATERMARK_FILE).write_text(json.dumps({"max_date": watermark, "partials": len(partials)}))
+
+def max_date(daily: pd.DataFrame, previous: str | None = None) -> str | None:
+    """Nuevo watermark: fecha máxima procesada (ISO ``YYYY-MM-DD``)."""
+    if daily.empty:
+        return previous
+    latest = pd.to_datetime(daily["date"]).max().date().isoformat()
+    return max(latest, previous) if previous else latest
+
+# -----------------------------
+# Recalculo por claves afectadas
+# -----------------------------
+def _isin(df: pd.DataFrame, keys: list[str], ref: pd.DataFrame) -> pd.Series:
+    idx = pd.MultiIndex.from_frame(ref[keys].drop_duplicates())
+    return pd.Series(pd.MultiIndex.from_frame(df[keys]).isin(idx), index=df.index)
+
+def refresh_kpis(
+    new_daily: pd.DataFrame,
+    partials: pd.DataFrame,
+    stability_prev: pd.DataFrame,
+    flags_prev: pd.DataFrame,
+    k: float = 1.5,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Incorpora ``new_daily`` a los parciales y refresca solo lo afectado:
+    - agente-semanas con datos nuevos → parciales y medias semanales;
+    - equipo-semanas afectados → ``flag_outliers``;
+    - agentes afectados → CV/CVM; los cuartiles se reasignan sobre todos los agentes.
+    Devuelve (parciales, agent_stability, weekly_flags).
+    """
+    new_p = weekly_partials(new_daily)
+    if new_p.empty:
+        return partials, stability_prev, flags_prev
+    changed = merge_partials(partials[_isin(partials, WEEK_KEYS, new_p)], new_p)
+    return replace_partials(changed, partials, stability_prev, flags_prev, k=k)
+
+def replace_partials(
+    changed: pd.DataFrame,
+    partials: pd.DataFrame,
+    stability_prev: pd.DataFrame,
+    flags_prev: pd.DataFrame,
+    k: float = 1.5,
+    quartiles: Callable[[pd.DataFrame], pd.DataFrame] = assign_quartiles,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Sustituye en ``partials`` las filas agente-semana de ``changed`` (valores totales,
+    no incrementos) y refresca los flags de sus equipo-semanas y el CV/CVM de sus
+    agentes; ``quartiles`` reasigna el cuartil sobre todos los agentes.
+    Devuelve (parciales, agent_stability, weekly_flags).
+    """
+    if changed.empty:
+        return partials, stability_prev, flags_prev
+    partials = pd.concat([partials[~_isin(partials, WEEK_KEYS, changed)], changed], ignore_index=True)
+
+    # Flags: equipo-semanas afectados completos (todos sus agentes)
+    tw_rows = partials[_isin(partials, TEAM_WEEK_KEYS, changed)]
+    flags_new = flag_outliers(finalize_weekly(tw_rows), k=k)
+    keep = flags_prev[~_isin(flags_prev, TEAM_WEEK_KEYS, changed)]
+    flags = pd.concat([keep, flags_new], ignore_index=True).sort_values(WEEK_KEYS, ignore_index=True)
+
+    # Stability: historial completo solo de los agentes afectados
+    agent_rows = partials[_isin(partials, AGENT_KEYS, changed)]
+    stab_new = compute_variability(finalize_weekly(agent_rows))
+    stab_keep = stability_prev[~_isin(stability_prev, AGENT_KEYS, changed)]
+    stability = pd.concat(
+        [stab_keep.drop(columns="quartile_efficiency", errors="ignore"), stab_new], ignore_index=True
+    ).sort_values(AGENT_KEYS, ignore_index=True)
+
+    return partials, quartiles(stability), flags
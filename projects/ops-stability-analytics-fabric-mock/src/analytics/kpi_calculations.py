@@ -1,17 +1,32 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import warnings
 from pathlib import Path
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .schema import compact_schema, parse_dates
+from .sketches import KLLSketch, k_for_eps, keyed_sketches, merge_grouped, sketch_cvm
+from .weekly_partials import finalize_weekly, weekly_partials
+from ..lakehouse.dataset import read_dataset
 
 __all__ = [
     "coef_variacion",
     "coef_variacion_mediana",
     "iqr_bounds",
+    "agent_week_matrix",
+    "cv_matrix",
+    "cvm_matrix",
+    "grouped_quantiles",
+    "FLAG_COLUMNS",
     "build_daily",
     "build_agent_weekly",
+    "compute_variability",
     "compute_stability",
+    "assign_quartiles",
     "flag_outliers",
 ]
 
@@ -36,54 +51,213 @@ def iqr_bounds(series: pd.Series, k: float = 1.5) -> tuple[float, float]:
     iqr = q3 - q1
     return (q1 - k * iqr, q3 + k * iqr)
 
+# Métrica semanal → columna de flag en weekly_flags
+FLAG_COLUMNS = {"hours_mean": "out_hours_flag", "cases_mean": "out_cases_flag"}
+
+def flag_column(metric: str) -> str:
+    """Nombre de la columna de flag para una métrica (``x_mean`` → ``out_x_flag``)."""
+    return FLAG_COLUMNS.get(metric, f"out_{metric.removesuffix('_mean')}_flag")
+
 # -----------------------------
-# Transformaciones intermedias
+# Motor matricial agente × semana
 # -----------------------------
-def build_daily(df: pd.DataFrame) -> pd.DataFrame:
-    """Normaliza tipos base de la capa diaria (evita SettingWithCopy)."""
-    out = df.copy()
-    out["date"] = pd.to_datetime(out["date"])
+def _group_codes(grp) -> np.ndarray:
+    """Código int64 de grupo por fila; -1 para filas con clave nula (``ngroup`` devuelve NaN)."""
+    return np.nan_to_num(grp.ngroup().to_numpy(np.float64), nan=-1).astype(np.int64)
+
+def agent_week_matrix(
+    df_week: pd.DataFrame,
+    cols: list[str],
+    keys: tuple[str, ...] = ("agent_id", "team_id"),
+) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+    """
+    Pivotea la tabla semanal a matrices densas agentes×semanas (una por métrica).
+
+    Las celdas sin dato quedan en NaN (máscara de faltantes = ``np.isnan``).
+    Las filas siguen el orden de ``groupby(keys)``; si un agente tuviera más de una
+    fila por semana ISO, las columnas pasan a ser la posición de la fila en el grupo.
+    """
+    keys = list(keys)
+    grp = df_week.groupby(keys, sort=True, observed=True)
+    key_frame = grp.size().reset_index()[keys]
+    rows = _group_codes(grp)  # clave nula → -1: la fila se descarta, como en groupby
+    valid = rows >= 0
+
+    if not valid.any():
+        cols_idx = np.zeros(len(rows), dtype=np.int64)
+    elif {"iso_year", "iso_week"}.issubset(df_week.columns):
+        week_key = df_week["iso_year"].to_numpy(np.int64) * 100 + df_week["iso_week"].to_numpy(np.int64)
+        cols_idx = np.unique(week_key, return_inverse=True)[1]
+        pairs = rows[valid].astype(np.int64) * (cols_idx.max() + 1) + cols_idx[valid]
+        if len(np.unique(pairs)) != len(pairs):
+            cols_idx = grp.cumcount().to_numpy()
+    else:
+        cols_idx = grp.cumcount().to_numpy()
+
+    shape = (len(key_frame), int(cols_idx[valid].max()) + 1 if valid.any() else 0)
+    mats = {}
+    for c in cols:
+        m = np.full(shape, np.nan)
+        m[rows[valid], cols_idx[valid]] = df_week[c].to_numpy(np.float64)[valid]
+        mats[c] = m
+    return key_frame, mats
+
+def cv_matrix(m: np.ndarray) -> np.ndarray:
+    """CV (std muestral / media) por fila ignorando NaN; NaN si la media es 0 o hay < 2 valores."""
+    n = np.sum(~np.isnan(m), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(m, axis=1) / n
+        ss = np.nansum((m - mean[:, None]) ** 2, axis=1)
+        std = np.sqrt(np.where(n > 1, ss / (n - 1), np.nan))
+        return np.where(mean != 0, std / mean, np.nan)
+
+def cvm_matrix(m: np.ndarray) -> np.ndarray:
+    """CVM (1.4826·MAD / mediana) por fila ignorando NaN; NaN si la mediana es 0."""
+    if m.shape[1] == 0:
+        return np.full(m.shape[0], np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # filas sin datos → NaN
+        med = np.nanmedian(m, axis=1)
+        mad = np.nanmedian(np.abs(m - med[:, None]), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(med != 0, 1.4826 * mad / med, np.nan)
+
+def grouped_quantiles(codes: np.ndarray, values: np.ndarray, qs: list[float], n_groups: int) -> np.ndarray:
+    """
+    Cuantiles (interpolación lineal, como ``Series.quantile``) por grupo en una sola pasada.
+
+    Ordena una vez por (grupo, valor) y lee las posiciones de cada cuantil desde el
+    inicio de cada grupo. Ignora NaN y códigos negativos; grupos vacíos → NaN.
+    Devuelve una matriz (n_groups, len(qs)).
+    """
+    ok = (codes >= 0) & ~np.isnan(values)
+    c, v = codes[ok], values[ok]
+    order = np.lexsort((v, c))
+    v = v[order]
+    counts = np.bincount(c, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+
+    out = np.full((n_groups, len(qs)), np.nan)
+    has = counts > 0
+    last = np.maximum(counts - 1, 0)
+    for j, q in enumerate(qs):
+        pos = last * q
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        t = pos - lo
+        a = v[(starts + lo)[has]]
+        b = v[(starts + hi)[has]]
+        diff = b - a
+        th = t[has]
+        # mismo _lerp que numpy.quantile (estable para t >= 0.5)
+        out[has, j] = np.where(th >= 0.5, b - diff * (1 - th), a + diff * th)
     return out
 
-def build_agent_weekly(df: pd.DataFrame) -> pd.DataFrame:
+def _sketch_grouped_quantiles(
+    codes: np.ndarray,
+    values: np.ndarray,
+    qs: list[float],
+    n_groups: int,
+    eps: float,
+    shard_rows: int | None = None,
+) -> np.ndarray:
+    """
+    ``grouped_quantiles`` aproximado: cada lote de ``shard_rows`` filas construye sus
+    sketches por grupo (``keyed_sketches``) y se combinan con ``merge_grouped``, como
+    harían particiones o workers. Los grupos con ≤ k valores no compactarían (sketch
+    exacto): se resuelven en la pasada ordenada de ``grouped_quantiles``, sin un sketch
+    por grupo.
+    """
+    valid = (codes >= 0) & ~np.isnan(values)
+    big = np.bincount(codes[valid], minlength=n_groups) > k_for_eps(eps)
+    sketched = valid & big[np.maximum(codes, 0)]
+    out = grouped_quantiles(np.where(sketched, -1, codes), values, qs, n_groups)
+    if sketched.any():
+        big_codes = np.where(sketched, codes, -1)
+        step = shard_rows or len(codes)
+        merged = merge_grouped(*(
+            keyed_sketches(big_codes[i:i + step], values[i:i + step], eps, seed=i // step)
+            for i in range(0, len(codes), step)
+        ))
+        for g, sk in merged.items():
+            out[g] = sk.quantiles(qs)
+    return out
+
+# -----------------------------
+# Transformaciones intermedias
+# -----------------------------
+def build_daily(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """
+    Normaliza tipos base de la capa diaria.
+    Copia superficial: ``df`` no se modifica y las columnas no tocadas se comparten.
+    Con ``compact`` aplica el esquema compacto (IDs categóricos, enteros reducidos).
+    """
+    out = df.copy(deep=False)
+    out["date"] = parse_dates(out["date"])
+    return compact_schema(out) if compact else out
+
+def build_agent_weekly(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
     """
     Agrega métricas semanales por agente/equipo.
     Incluye iso_year + iso_week y deja alias 'week' para compatibilidad.
+    Se apoya en parciales sum/count para que el modo incremental produzca lo mismo.
+    Con ``compact``: año/semana ISO en int16 (IDs conservan su tipo de entrada).
     """
-    out = df.copy()
-    iso = out["date"].dt.isocalendar()
-    out["iso_year"] = iso.year.astype(int)
-    out["iso_week"] = iso.week.astype(int)
-
-    grp = out.groupby(
-        ["agent_id", "team_id", "iso_year", "iso_week"], as_index=False
-    ).agg(
-        hours_mean=("productive_hours", "mean"),
-        cases_mean=("cases_closed", "mean"),
-    )
-
-    # 👉 alias retro-compatible que tu test espera
-    grp["week"] = grp["iso_week"]
-    return grp
-
-def compute_stability(df_week: pd.DataFrame) -> pd.DataFrame:
-    """Calcula CV/CVM de horas y casos por agente; asigna cuartil de estabilidad."""
-    by_agent = df_week.groupby(["agent_id", "team_id"]).agg(
-        cv_hours=("hours_mean", coef_variacion),
-        cvm_hours=("hours_mean", coef_variacion_mediana),
-        cv_cases=("cases_mean", coef_variacion),
-        cvm_cases=("cases_mean", coef_variacion_mediana),
-    ).reset_index()
+    return finalize_weekly(weekly_partials(df), compact=compact)
+
+def _sketch_cvm_matrix(m: np.ndarray, eps: float) -> np.ndarray:
+    """CVM con sketches solo para las filas con más de k semanas; el resto (sketch exacto) con ``cvm_matrix``."""
+    big = np.sum(~np.isnan(m), axis=1) > k_for_eps(eps)
+    out = np.full(m.shape[0], np.nan)
+    out[~big] = cvm_matrix(m[~big])
+    if big.any():
+        sub = m[big]
+        rows, cols = np.nonzero(~np.isnan(sub))
+        out[big] = sketch_cvm(rows, sub[rows, cols], sub.shape[0], eps)
+    return out
 
+def compute_variability(df_week: pd.DataFrame, approx_eps: float | None = None) -> pd.DataFrame:
+    """
+    CV/CVM de horas y casos por agente, sin cuartil (no depende del resto de agentes).
+    Equivale a agregar con ``coef_variacion``/``coef_variacion_mediana`` por agente,
+    pero sobre la matriz densa agentes×semanas (todas las filas a la vez).
+    Con ``approx_eps`` la mediana/MAD del CVM salen de sketches KLL.
+    """
+    by_agent, mats = agent_week_matrix(df_week, ["hours_mean", "cases_mean"])
+    for metric, m in (("hours", mats["hours_mean"]), ("cases", mats["cases_mean"])):
+        by_agent[f"cv_{metric}"] = cv_matrix(m)
+        by_agent[f"cvm_{metric}"] = cvm_matrix(m) if approx_eps is None else _sketch_cvm_matrix(m, approx_eps)
+    return by_agent
+
+def compute_stability(df_week: pd.DataFrame, approx_eps: float | None = None) -> pd.DataFrame:
+    """
+    Calcula CV/CVM de horas y casos por agente (``compute_variability``) y asigna
+    cuartil de estabilidad. Con ``approx_eps`` la mediana/MAD del CVM y los cortes
+    de cuartil salen de sketches KLL con error de rango ≈ ``approx_eps``.
+    """
+    return assign_quartiles(compute_variability(df_week, approx_eps=approx_eps), approx_eps=approx_eps)
+
+def assign_quartiles(by_agent: pd.DataFrame, approx_eps: float | None = None) -> pd.DataFrame:
+    """Asigna ``quartile_efficiency`` (1..4) sobre ``cv_hours`` de todos los agentes."""
     # Cuartiles (1..4). Menor CV = más estable.
     base = by_agent["cv_hours"]
-    # Si hay pocos valores únicos, qcut puede fallar; usamos duplicates='drop' y cast seguro.
-    by_agent["quartile_efficiency"] = pd.qcut(
-        base.fillna(base.median()),
-        4,
-        labels=[1, 2, 3, 4],
-        duplicates="drop",
-    )
+    if approx_eps is None:
+        # Si hay pocos valores únicos, qcut puede fallar; usamos duplicates='drop' y cast seguro.
+        by_agent["quartile_efficiency"] = pd.qcut(
+            base.fillna(base.median()),
+            4,
+            labels=[1, 2, 3, 4],
+            duplicates="drop",
+        )
+    else:
+        sk = KLLSketch(approx_eps).update(base.to_numpy(np.float64))
+        q = sk.quantiles([0.25, 0.5, 0.75])
+        by_agent["quartile_efficiency"] = pd.cut(
+            base.fillna(q[1]),
+            [-np.inf, *q, np.inf],
+            labels=[1, 2, 3, 4],
+            duplicates="drop",
+        )
     # Cast opcional a int cuando el binning conserva 4 bandas
     if by_agent["quartile_efficiency"].notna().any():
         try:
@@ -94,20 +268,39 @@ def compute_stability(df_week: pd.DataFrame) -> pd.DataFrame:
 
     return by_agent
 
-def flag_outliers(df_week: pd.DataFrame) -> pd.DataFrame:
+def flag_outliers(
+    df_week: pd.DataFrame,
+    metrics: list[str] | None = None,
+    k: float = 1.5,
+    approx_eps: float | None = None,
+    shard_rows: int | None = None,
+) -> pd.DataFrame:
     """
     Marca outliers por equipo + año ISO + semana ISO (IQR).
+    Calcula Q1/Q3 de todas las ``metrics`` en una pasada ordenada por grupo y
+    difunde los límites a las filas con operaciones de arreglo.
+    Con ``approx_eps`` Q1/Q3 salen de sketches KLL construidos por lote de
+    ``shard_rows`` filas y combinados por grupo (ver ``_sketch_grouped_quantiles``).
     Conserva alias 'week' para compatibilidad.
     """
-    out = df_week.copy()
-
-    def flag_series(s: pd.Series) -> pd.Series:
-        lo, hi = iqr_bounds(s)
-        return (s.lt(lo) | s.gt(hi)).astype(int)
+    out = df_week.copy(deep=False)  # solo se añaden columnas de flag
+    metrics = list(FLAG_COLUMNS) if metrics is None else metrics
 
     keys = ["team_id", "iso_year", "iso_week"]
-    out["out_hours_flag"] = out.groupby(keys)["hours_mean"].transform(flag_series)
-    out["out_cases_flag"] = out.groupby(keys)["cases_mean"].transform(flag_series)
+    grp = out.groupby(keys, sort=False, observed=True)
+    codes = _group_codes(grp)  # equipo nulo → -1: sin límites, flag 0
+    n_groups = grp.ngroups
+
+    for col in metrics:
+        values = out[col].to_numpy(np.float64)
+        if approx_eps is None:
+            q = grouped_quantiles(codes, values, [0.25, 0.75], n_groups)
+        else:
+            q = _sketch_grouped_quantiles(codes, values, [0.25, 0.75], n_groups, approx_eps, shard_rows)
+        iqr = q[:, 1] - q[:, 0]
+        lo = np.append(q[:, 0] - k * iqr, np.nan)[codes]  # código -1 → NaN → sin flag
+        hi = np.append(q[:, 1] + k * iqr, np.nan)[codes]
+        out[flag_column(col)] = ((values < lo) | (values > hi)).astype(np.int64)
 
     # 👉 garantiza presencia de 'week'
     if "week" not in out.columns:
@@ -116,36 +309,80 @@ def flag_outliers(df_week: pd.DataFrame) -> pd.DataFrame:
     return out
 
 # -----------------------------
-# Ejecución como script (E2E)
+# Lectura raw y ejecución como script (E2E)
 # -----------------------------
-if __name__ == "__main__":
-    lh_root = Path("lakehouse_sim")
+def raw_source(lh_root: Path) -> Path | None:
+    """Ruta Parquet de la capa raw: archivo único o directorio (part files / dataset Hive)."""
     raw_parquet = lh_root / "Files" / "raw" / "ops_daily.parquet"
-
+    raw_dataset = lh_root / "Files" / "raw" / "ops_daily"  # --workers > 1 o --layout partitioned
     if raw_parquet.exists():
-        raw = pd.read_parquet(raw_parquet)
+        return raw_parquet
+    if raw_dataset.is_dir():
+        return raw_dataset
+    return None
+
+def load_raw(lh_root: Path, since: str | None = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Lee la capa raw: archivo único, directorio de part files o dataset Hive, o CSV local.
+    Con ``since`` devuelve solo las filas con ``date`` posterior (ISO ``YYYY-MM-DD``).
+    Con ``compact`` fecha e IDs del Parquet se leen como diccionario (categóricas) sin
+    materializar strings, y la tabla Arrow se libera columna a columna al convertir.
+    """
+    source = raw_source(lh_root)
+    filters = [("date", ">", since)] if since else None
+
+    if source is not None and source.is_file() and compact:
+        table = pq.read_table(source, filters=filters, read_dictionary=["date", "agent_id", "team_id"])
+        raw = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
+        pa.default_memory_pool().release_unused()  # devuelve al SO los buffers de decodificación
+    elif source is not None and source.is_file():
+        raw = pd.read_parquet(source, filters=filters)
+    elif source is not None:
+        raw = read_dataset(source)
     else:
         raw_csv = Path("data/raw/ops_daily.csv")
         if not raw_csv.exists():
             raise FileNotFoundError(
-                f"No se encontró {raw_parquet} ni {raw_csv}. "
+                f"No se encontró {lh_root / 'Files' / 'raw' / 'ops_daily.parquet'} ni {raw_csv}. "
                 "Ejecuta primero la generación de datos."
             )
         raw = pd.read_csv(raw_csv)
 
-    daily = build_daily(raw)
-    weekly = build_agent_weekly(daily)
-    stability = compute_stability(weekly)
-    weekly_flagged = flag_outliers(weekly)
+    if since:
+        raw = raw[pd.to_datetime(raw["date"]) > pd.Timestamp(since)]
+    return raw
+
+def run_incremental(lh_root: Path, k: float = 1.5) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Modo incremental: parciales + watermark en ``Files/state/kpi``; primera vez = build completo."""
+    from .incremental import load_state, max_date, refresh_kpis, save_state
+
+    state_dir = lh_root / "Files" / "state" / "kpi"
+    out_agent = lh_root / "Tables" / "agent_stability.parquet"
+    out_weekly = lh_root / "Tables" / "weekly_flags.parquet"
 
-    tables_dir = lh_root / "Tables"
-    tables_dir.mkdir(parents=True, exist_ok=True)
+    partials, watermark = load_state(state_dir)
+    if partials is not None and out_agent.exists() and out_weekly.exists():
+        new_daily = build_daily(load_raw(lh_root, since=watermark))
+        partials, stability, weekly_flagged = refresh_kpis(
+            new_daily, partials, pd.read_parquet(out_agent), pd.read_parquet(out_weekly), k=k
+        )
+        print(f"↻ Incremental: {len(new_daily):,} new rows after {watermark}")
+    else:
+        new_daily = build_daily(load_raw(lh_root))
+        partials = weekly_partials(new_daily)
+        weekly = finalize_weekly(partials)
+        stability = compute_stability(weekly)
+        weekly_flagged = flag_outliers(weekly, k=k)
+
+    save_state(state_dir, partials, max_date(new_daily, watermark))
+    return stability, weekly_flagged
 
-    out_agent = tables_dir / "agent_stability.parquet"
-    out_weekly = tables_dir / "weekly_flags.parquet"
+def main(argv: list[str] | None = None) -> None:
+    """CLI kpi: la orquestación (opciones, grafo de etapas, caché, manifest) vive en ``src.pipeline.kpi``."""
+    from ..pipeline.kpi import main as run
 
-    stability.to_parquet(out_agent, index=False)
-    weekly_flagged.to_parquet(out_weekly, index=False)
+    run(argv)
 
-    print(f"✅ Wrote {len(stability)} rows → {out_agent}")
-    print(f"✅ Wrote {len(weekly_flagged)} rows → {out_weekly}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+"""
+Ingesta en vivo (asyncio) con agregados semanales continuos
+Un productor asíncrono emite eventos por agente — horas registradas (``hours``) y
+casos cerrados (``case``) — desde un archivo JSON Lines en seguimiento (tail), un
+socket TCP local o la capa diaria repetida como eventos. El consumidor los pliega
+en celdas agente-día de las semanas ISO abiertas (O(1) por evento) y cada
+``flush_seconds`` publica un micro-lote: los agente-semanas tocados pasan a
+parciales sum/count (``weekly_partials``) y ``replace_partials`` refresca solo los
+equipo-semanas (flags) y agentes (CV/CVM) afectados. ``finalize_weekly`` de esos
+parciales equivale a ``build_agent_weekly`` sobre los mismos días.
+
+Watermark de tiempo de evento = fecha máxima vista − ``lateness_days``. En cada
+flush se cierran las semanas cuyo domingo queda antes del watermark: sus celdas
+salen de memoria y los eventos que lleguen después para esas fechas se descartan
+(``late_dropped``). Hasta entonces un evento tardío corrige su semana en el
+siguiente flush. Un evento fechado más de ``max_future_days`` después de hoy
+(reloj de pared) se descarta como inválido: adelantaría el watermark y cerraría
+semanas que aún reciben eventos legítimos.
+
+Uso:
+    python -m src.analytics.live --tail events.jsonl
+    python -m src.analytics.live --listen 127.0.0.1:8765 --flush-seconds 2
+    python -m src.analytics.live --replay --rate 20000 --reset
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import shutil
+import signal
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+
+import numpy as np
+import pandas as pd
+
+from .incremental import TEAM_WEEK_KEYS, load_state, replace_partials
+from .kpi_calculations import assign_quartiles, build_daily, compute_variability, flag_outliers, load_raw
+from .weekly_partials import PARTIAL_COLUMNS, WEEK_KEYS, finalize_weekly, merge_partials, weekly_partials
+from ..cli import live_parser
+from ..lakehouse.dataset import PARTITION_COLS, write_dataset
+from ..pipeline.instrument import Instrument, instrument_from_env
+
+__all__ = [
+    "EVENT_KINDS",
+    "Event",
+    "MicroBatch",
+    "LiveAggregator",
+    "tail_events",
+    "socket_events",
+    "replay_events",
+    "write_live_tables",
+    "run_live",
+]
+
+EVENT_KINDS = ("hours", "case")
+CELL_COLUMNS = ["date", "agent_id", "team_id", "productive_hours", "cases_closed"]
+
+BASE_FILE = "live_base.parquet"
+CELLS_FILE = "live_cells.parquet"
+STATE_FILE = "live_state.json"
+
+# -----------------------------
+# Eventos
+# -----------------------------
+@dataclass(frozen=True)
+class Event:
+    """
+    Evento del sistema de casos para un agente y día (ISO ``YYYY-MM-DD``): ``hours``
+    suma horas productivas (``value``) y ``case`` casos cerrados (``value``, 1 por
+    defecto). Un agente-día cuenta para la media semanal desde su primer evento; la
+    medida sin eventos ese día vale 0, como una fila diaria con 0 casos.
+    """
+    date: str
+    agent_id: str
+    team_id: str
+    kind: str
+    value: float = 1.0
+
+    @classmethod
+    def from_json(cls, line: str | bytes) -> "Event":
+        d = json.loads(line)
+        return cls(str(d["date"])[:10], str(d["agent_id"]), str(d["team_id"]), d["kind"], float(d.get("value", 1.0)))
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+# -----------------------------
+# Estado en memoria
+# -----------------------------
+@dataclass
+class MicroBatch:
+    """
+    Lo que ``drain`` toma en el hilo del bucle de eventos para que ``apply``/``save``
+    trabajen en otro hilo sin tocar las celdas vivas.
+    """
+    rows: list[tuple] = field(default_factory=list)          # celdas de los agente-semanas tocados
+    closed_weeks: list[tuple[int, int]] = field(default_factory=list)
+    cells: list[tuple] = field(default_factory=list)         # celdas abiertas tras el cierre (estado)
+    meta: dict = field(default_factory=dict)
+
+def _empty_partials() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype="object" if c in ("agent_id", "team_id") else "int64")
+                         for c in WEEK_KEYS + PARTIAL_COLUMNS})
+
+def _cell_partials(rows: list[tuple]) -> pd.DataFrame:
+    """Parciales de celdas agente-día; en orden agente → fecha, como la capa diaria (misma suma Kahan)."""
+    if not rows:
+        return _empty_partials()
+    rows = sorted(rows, key=lambda r: (r[1], r[2], r[0]))
+    return weekly_partials(pd.DataFrame(rows, columns=CELL_COLUMNS))
+
+def _week_key(df: pd.DataFrame) -> np.ndarray:
+    return df["iso_year"].to_numpy(np.int64) * 100 + df["iso_week"].to_numpy(np.int64)
+
+def _quartiles(by_agent: pd.DataFrame) -> pd.DataFrame:
+    """
+    ``assign_quartiles`` para un historial en curso: mientras no se puede cortar en
+    cuartiles (p. ej. primera semana, sin CV) el cuartil queda nulo (``Int64``).
+    """
+    try:
+        by_agent = assign_quartiles(by_agent)
+    except ValueError:
+        by_agent["quartile_efficiency"] = pd.NA
+    by_agent["quartile_efficiency"] = by_agent["quartile_efficiency"].astype("Int64")
+    return by_agent
+
+def _iso(d: date | None) -> str | None:
+    return d.isoformat() if d else None
+
+def _date(s: str | None) -> date | None:
+    return date.fromisoformat(s) if s else None
+
+class LiveAggregator:
+    """
+    Agregados semanales continuos: celdas agente-día (horas, casos) de las semanas
+    abiertas + ``base`` con los parciales sum/count de semanas cerradas (o de un estado
+    previo, ``horizon`` = última fecha ya consolidada). ``partials``, ``stability`` y
+    ``flags`` reflejan todo lo recibido hasta el último flush.
+    """
+
+    def __init__(
+        self,
+        lateness_days: int = 1,
+        k: float = 1.5,
+        base: pd.DataFrame | None = None,
+        horizon: date | None = None,
+        max_future_days: int | None = 1,
+    ) -> None:
+        if lateness_days < 0:
+            raise ValueError("lateness_days debe ser >= 0")
+        if max_future_days is not None and max_future_days < 0:
+            raise ValueError("max_future_days debe ser >= 0")
+        self.lateness = timedelta(days=lateness_days)
+        self.max_future = None if max_future_days is None else timedelta(days=max_future_days)
+        self._future_limit = date.min  # hoy + max_future; el reloj solo se relee al superarlo
+        self.k = k
+        self.weeks: dict[tuple[int, int], dict[tuple[str, str, date], list[float]]] = {}
+        self.dirty: set[tuple[str, str, int, int]] = set()
+        self.base = _empty_partials() if base is None else base
+        self.partials = self.base
+        self.stability: pd.DataFrame | None = None
+        self.flags: pd.DataFrame | None = None
+        self.horizon = horizon
+        self.max_date: date | None = None
+        self.stats = {"events": 0, "late_dropped": 0, "invalid": 0, "flushes": 0}
+        self._saved_base: pd.DataFrame | None = None
+        self._days: dict[str, tuple[date, int, int]] = {}
+
+    @property
+    def watermark(self) -> date | None:
+        """Watermark de tiempo de evento: fecha máxima vista − ``lateness_days``."""
+        return None if self.max_date is None else self.max_date - self.lateness
+
+    def _closed_through(self) -> date | None:
+        """Último domingo antes del watermark: semanas hasta ahí se cierran en el próximo flush."""
+        wm = self.watermark
+        return None if wm is None else wm - timedelta(days=wm.isoweekday())
+
+    def pending(self) -> bool:
+        """Hay agente-semanas tocados o semanas por cerrar desde el último flush."""
+        through = self._closed_through()
+        return bool(self.dirty) or (through is not None and (self.horizon is None or through > self.horizon))
+
+    # ---- bucle de eventos (O(1) por evento) ----
+    def _parse_day(self, text: str) -> tuple[date, int, int]:
+        """Fecha + año/semana ISO, memorizados por texto (pocas fechas distintas en vuelo)."""
+        day = date.fromisoformat(text)
+        self._days[text] = out = (day, *day.isocalendar()[:2])
+        return out
+
+    def _in_future(self, day: date) -> bool:
+        """Fecha posterior a hoy + ``max_future_days`` (fuera de cualquier reloj plausible)."""
+        if self.max_future is None or day <= self._future_limit:
+            return False
+        self._future_limit = date.today() + self.max_future
+        return day > self._future_limit
+
+    def add(self, event: Event | str | bytes) -> bool:
+        """Pliega un evento (o su línea JSON); False si se descarta por inválido, futuro o tardío."""
+        try:
+            ev = event if isinstance(event, Event) else Event.from_json(event)
+            if ev.kind not in EVENT_KINDS or not math.isfinite(ev.value):
+                raise ValueError(f"invalid event {ev!r}")
+            day, year, week = self._days.get(ev.date) or self._parse_day(ev.date)
+            if self._in_future(day):
+                raise ValueError(f"event dated in the future {ev!r}")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.stats["invalid"] += 1
+            return False
+        if self.horizon is not None and day <= self.horizon:
+            self.stats["late_dropped"] += 1
+            return False
+        cell = self.weeks.setdefault((year, week), {}).setdefault((ev.agent_id, ev.team_id, day), [0.0, 0.0])
+        cell[ev.kind == "case"] += ev.value
+        self.dirty.add((ev.agent_id, ev.team_id, year, week))
+        self.stats["events"] += 1
+        if self.max_date is None or day > self.max_date:
+            self.max_date = day
+        return True
+
+    def drain(self) -> MicroBatch:
+        """
+        Toma las celdas de los agente-semanas tocados desde el último flush y cierra las
+        semanas cuyo domingo quedó antes del watermark (sus celdas salen de memoria).
+        """
+        agents_by_week: dict[tuple[int, int], set[tuple[str, str]]] = {}
+        for agent, team, year, week in self.dirty:
+            agents_by_week.setdefault((year, week), set()).add((agent, team))
+        self.dirty = set()
+        batch = MicroBatch()
+        for wk, agents in agents_by_week.items():
+            batch.rows += [(d, a, t, h, c) for (a, t, d), (h, c) in self.weeks[wk].items() if (a, t) in agents]
+
+        closed_through = self._closed_through()
+        if closed_through is not None and (self.horizon is None or closed_through > self.horizon):
+            batch.closed_weeks = [wk for wk in self.weeks if date.fromisocalendar(*wk, 7) <= closed_through]
+            for wk in batch.closed_weeks:
+                del self.weeks[wk]
+            self.horizon = closed_through
+        batch.cells = [(d, a, t, h, c) for cells in self.weeks.values() for (a, t, d), (h, c) in cells.items()]
+        batch.meta = {"horizon": _iso(self.horizon), "max_date": _iso(self.max_date), "stats": dict(self.stats)}
+        return batch
+
+    # ---- hilo de trabajo ----
+    def apply(self, batch: MicroBatch) -> pd.DataFrame | None:
+        """
+        Recalcula los agente-semanas del lote (base ⊕ celdas) y refresca flags/estabilidad
+        con ``replace_partials``. Devuelve los equipo-semanas con flags nuevos
+        (``None`` = tablas completas, primer flush).
+        """
+        changed = _cell_partials(batch.rows)
+        touched: pd.DataFrame | None = changed[TEAM_WEEK_KEYS].drop_duplicates()
+        if self.stability is None:
+            # Primer flush (o reanudación): tablas completas desde base ⊕ celdas
+            self.partials = merge_partials(self.base, changed) if len(changed) else self.base
+            if len(self.partials):
+                weekly = finalize_weekly(self.partials)
+                self.flags = flag_outliers(weekly, k=self.k)
+                self.stability = _quartiles(compute_variability(weekly))
+                touched = None
+        elif len(changed):
+            if len(self.base):
+                changed = merge_partials(self.base.merge(changed[WEEK_KEYS], on=WEEK_KEYS), changed)
+            self.partials, self.stability, self.flags = replace_partials(
+                changed, self.partials, self.stability, self.flags, k=self.k, quartiles=_quartiles
+            )
+
+        if batch.closed_weeks:
+            # Semanas cerradas: sus parciales (ya al día) pasan a la base
+            closed = [y * 100 + w for y, w in batch.closed_weeks]
+            self.base = pd.concat([self.base[~np.isin(_week_key(self.base), closed)],
+                                   self.partials[np.isin(_week_key(self.partials), closed)]], ignore_index=True)
+        self.stats["flushes"] += 1
+        return touched
+
+    def flush(self) -> pd.DataFrame | None:
+        """``apply(drain())`` en un solo paso (uso síncrono)."""
+        return self.apply(self.drain())
+
+    # ---- estado persistido ----
+    def save(self, state_dir: Path, batch: MicroBatch) -> None:
+        """Base (si cambió), celdas abiertas y watermark del lote en ``state_dir``."""
+        state_dir = Path(state_dir)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        if self._saved_base is not self.base:
+            _replace_parquet(self.base, state_dir / BASE_FILE)
+            self._saved_base = self.base
+        cells = pd.DataFrame(batch.cells, columns=CELL_COLUMNS)
+        cells["date"] = cells["date"].map(_iso)
+        _replace_parquet(cells, state_dir / CELLS_FILE)
+        tmp = state_dir / (STATE_FILE + ".tmp")
+        tmp.write_text(json.dumps(batch.meta))
+        tmp.replace(state_dir / STATE_FILE)
+
+    @classmethod
+    def load(
+        cls, state_dir: Path, lateness_days: int = 1, k: float = 1.5, max_future_days: int | None = 1
+    ) -> "LiveAggregator | None":
+        """Reanuda desde ``save`` (None si no hay estado); las celdas restauradas se recalculan en el primer flush."""
+        state_dir = Path(state_dir)
+        if not (state_dir / STATE_FILE).exists():
+            return None
+        meta = json.loads((state_dir / STATE_FILE).read_text())
+        agg = cls(lateness_days, k, base=pd.read_parquet(state_dir / BASE_FILE), horizon=_date(meta["horizon"]),
+                  max_future_days=max_future_days)
+        agg._saved_base = agg.base
+        agg.max_date = _date(meta["max_date"])
+        agg.stats.update(meta["stats"])
+        for d, a, t, h, c in pd.read_parquet(state_dir / CELLS_FILE).itertuples(index=False):
+            day = date.fromisoformat(d)
+            year, week, _ = day.isocalendar()
+            agg.weeks.setdefault((year, week), {})[(a, t, day)] = [h, c]
+            agg.dirty.add((a, t, year, week))
+        return agg
+
+# -----------------------------
+# Productores (fuentes de eventos)
+# -----------------------------
+async def tail_events(path: Path, stop: asyncio.Event, poll_seconds: float = 0.2) -> AsyncIterator[str]:
+    """
+    Sigue un archivo JSON Lines como ``tail -f`` (sustituto local del sistema de casos):
+    espera a que exista, lee desde el inicio y entrega solo líneas completas.
+    Termina cuando ``stop`` está activo y no queda nada por leer.
+    """
+    path = Path(path)
+    while not path.exists():
+        if stop.is_set():
+            return
+        await asyncio.sleep(poll_seconds)
+    with path.open("r", encoding="utf-8") as fh:
+        pending, n = "", 0
+        while True:
+            line = fh.readline()
+            if line:
+                pending += line
+                if pending.endswith("\n"):
+                    if pending.strip():
+                        yield pending
+                    pending, n = "", n + 1
+                    if n % 1_000 == 0:
+                        await asyncio.sleep(0)  # cede el bucle al flush periódico
+            elif stop.is_set():
+                return
+            else:
+                await asyncio.sleep(poll_seconds)
+
+async def socket_events(
+    host: str,
+    port: int,
+    stop: asyncio.Event,
+    queue_size: int = 10_000,
+    ready: asyncio.Future | None = None,
+) -> AsyncIterator[str]:
+    """
+    Servidor TCP local: cada conexión envía eventos JSON Lines (varios productores a la vez).
+    La cola acotada aplica contrapresión a las conexiones si el consumidor se atrasa.
+    ``ready`` recibe la dirección enlazada (útil con ``port=0``).
+    """
+    queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            async for line in reader:
+                await queue.put(line.decode("utf-8", "replace"))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        addr = server.sockets[0].getsockname()[:2]
+        if ready is not None:
+            ready.set_result(addr)
+        print(f"📡 Listening for events on {addr[0]}:{addr[1]}")
+        while not (stop.is_set() and queue.empty()):
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=0.2)
+            except asyncio.TimeoutError:
+                continue
+
+async def replay_events(
+    daily: pd.DataFrame,
+    rate: float | None = None,
+    stop: asyncio.Event | None = None,
+    chunk: int = 1_000,
+) -> AsyncIterator[Event]:
+    """
+    Repite la capa diaria como eventos (``hours`` + ``case`` por fila) en orden de fecha,
+    a ``rate`` eventos/s (None = sin pausa). Demo y comparación con el batch.
+    """
+    daily = daily.sort_values("date", kind="stable")
+    dates = pd.to_datetime(daily["date"]).dt.strftime("%Y-%m-%d").to_numpy()
+    loop = asyncio.get_running_loop()
+    t0, n = loop.time(), 0
+    for d, agent, team, hours, cases in zip(
+        dates, daily["agent_id"].to_numpy(), daily["team_id"].to_numpy(),
+        daily["productive_hours"].to_numpy(np.float64), daily["cases_closed"].to_numpy(np.float64),
+    ):
+        if stop is not None and stop.is_set():
+            return
+        for kind, value in (("hours", hours), ("case", cases)):
+            if not np.isnan(value):
+                yield Event(d, agent, team, kind, float(value))
+                n += 1
+        if n >= chunk:
+            t0, n = t0 + (n / rate if rate else 0.0), 0
+            await asyncio.sleep(max(0.0, t0 - loop.time()) if rate else 0)
+
+# -----------------------------
+# Publicación en Tables
+# -----------------------------
+def _replace_parquet(df: pd.DataFrame, out: Path) -> None:
+    """Escritura atómica: archivo temporal + ``os.replace`` (los lectores no ven archivos a medias)."""
+    tmp = out.with_name(out.name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, out)
+
+def write_live_tables(
+    agg: LiveAggregator,
+    touched: pd.DataFrame | None,
+    lh_root: Path,
+    layout: str = "file",
+) -> int:
+    """
+    Publica ``weekly_flags`` y ``agent_stability``. Layout file: reescritura atómica.
+    Layout partitioned: solo las particiones equipo-semana de ``touched`` (todas si
+    es None) y ``agent_stability`` completa. Devuelve las filas de flags escritas.
+    """
+    if agg.flags is None:
+        return 0
+    tables = Path(lh_root) / "Tables"
+    tables.mkdir(parents=True, exist_ok=True)
+    if layout == "partitioned":
+        rows = agg.flags if touched is None else agg.flags.merge(touched, on=TEAM_WEEK_KEYS)
+        if len(rows):
+            write_dataset(rows, tables / "weekly_flags", partition_cols=PARTITION_COLS,
+                          sort_by=["agent_id"], overwrite=touched is None)
+        write_dataset(agg.stability, tables / "agent_stability", partition_cols=["team_id"], sort_by=["agent_id"])
+        return len(rows)
+    _replace_parquet(agg.flags, tables / "weekly_flags.parquet")
+    _replace_parquet(agg.stability, tables / "agent_stability.parquet")
+    return len(agg.flags)
+
+# -----------------------------
+# Consumidor
+# -----------------------------
+async def run_live(
+    events: AsyncIterable[Event | str],
+    agg: LiveAggregator,
+    lh_root: Path,
+    layout: str = "file",
+    flush_seconds: float = 5.0,
+    state_dir: Path | None = None,
+    inst: Instrument | None = None,
+) -> LiveAggregator:
+    """
+    Consume ``events`` y cada ``flush_seconds`` publica un micro-lote: ``drain`` corre en
+    el bucle de eventos; recalculo, Tables y estado en un hilo, así la ingesta sigue
+    durante el flush. Al agotarse la fuente hace un flush final.
+    """
+    inst = inst or Instrument("live")
+    done = asyncio.Event()
+
+    def publish(batch: MicroBatch) -> None:
+        with inst.stage("flush", rows_in=len(batch.rows)) as st:
+            touched = agg.apply(batch)
+            st.rows_out = write_live_tables(agg, touched, lh_root, layout)
+        if state_dir is not None:
+            agg.save(state_dir, batch)
+        s = batch.meta["stats"]
+        scope = "all" if touched is None else f"{len(touched)}"
+        print(f"📊 Flush: {s['events']:,} events · {s['late_dropped']:,} late dropped · "
+              f"{scope} team-weeks refreshed (closed through {batch.meta['horizon']})")
+
+    async def flush() -> None:
+        # Nada nuevo (o nada aún): sin micro-lote; tras reanudar se publica la base una vez
+        if not agg.pending() and (agg.stability is not None or agg.base.empty):
+            return
+        await asyncio.to_thread(publish, agg.drain())
+
+    async def periodic() -> None:
+        while not done.is_set():
+            try:
+                await asyncio.wait_for(done.wait(), timeout=flush_seconds)
+            except asyncio.TimeoutError:
+                await flush()
+
+    flusher = asyncio.create_task(periodic())
+    try:
+        async for event in events:
+            agg.add(event)
+    finally:
+        done.set()
+        await flusher
+    await flush()
+    return agg
+
+# -----------------------------
+# Ejecución como script
+# -----------------------------
+def main(argv: list[str] | None = None) -> None:
+    parser = live_parser()
+    args = parser.parse_args(argv)
+
+    if args.flush_seconds <= 0:
+        parser.error("--flush-seconds must be > 0")
+    if args.lateness_days < 0:
+        parser.error("--lateness-days must be >= 0")
+    if args.max_future_days < 0:
+        parser.error("--max-future-days must be >= 0")
+    if args.rate is not None and not args.replay:
+        parser.error("--rate only applies to --replay")
+    if args.listen:
+        host, _, port = args.listen.rpartition(":")
+        if not port.isdigit():
+            parser.error("--listen expects HOST:PORT")
+
+    lh_root = args.lakehouse
+    tables_dir = lh_root / "Tables"
+    state_dir = lh_root / "Files" / "state" / "live"
+    if args.reset and state_dir.exists():
+        shutil.rmtree(state_dir)
+
+    agg = LiveAggregator.load(state_dir, args.lateness_days, args.iqr_k, args.max_future_days)
+    if agg is not None:
+        print(f"♻️  Resuming live state (closed through {_iso(agg.horizon)})")
+    elif args.bootstrap:
+        partials, watermark = load_state(lh_root / "Files" / "state" / "kpi")
+        if partials is None:
+            parser.error("--bootstrap needs a prior 'kpi --incremental' run (Files/state/kpi)")
+        agg = LiveAggregator(args.lateness_days, args.iqr_k, base=partials, horizon=_date(watermark),
+                             max_future_days=args.max_future_days)
+        print(f"♻️  Bootstrapped from incremental state through {watermark}")
+    else:
+        agg = LiveAggregator(args.lateness_days, args.iqr_k, max_future_days=args.max_future_days)
+
+    inst = instrument_from_env("live")
+    inst.params = {k: v for k, v in vars(args).items() if k != "lakehouse"}
+
+    async def run() -> LiveAggregator:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):  # Windows: sin handler, Ctrl+C corta sin flush final
+                pass
+        if args.duration is not None:
+            loop.call_later(args.duration, stop.set)
+        if args.tail:
+            events = tail_events(args.tail, stop)
+        elif args.listen:
+            events = socket_events(host, int(port), stop)
+        else:
+            events = replay_events(build_daily(load_raw(lh_root)), rate=args.rate, stop=stop)
+        return await run_live(events, agg, lh_root, layout=args.layout, flush_seconds=args.flush_seconds,
+                              state_dir=state_dir, inst=inst)
+
+    s = asyncio.run(run()).stats
+    print(f"✅ Live: {s['events']:,} events · {s['late_dropped']:,} late dropped · "
+          f"{s['invalid']:,} invalid → {tables_dir}")
+    inst.write_manifest(tables_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Backend Polars de los KPI (``--backend polars``)
+Mismas funciones y contrato de columnas que ``kpi_calculations``: ``build_daily``,
+``build_agent_weekly``, ``compute_stability`` y ``flag_outliers``. La capa raw se
+escanea con ``scan_parquet`` (archivo, part files o dataset Hive) sin pasar por
+pandas, y los group_by corren en el pool de hilos de Polars (todos los núcleos;
+``POLARS_MAX_THREADS`` lo limita).
+
+Medianas y cuantiles (CVM, cuartiles, límites IQR) reproducen el redondeo de
+NumPy, así que sobre la misma tabla semanal cuartiles y flags son idénticos a los
+del backend pandas. Las medias semanales suman en otro orden (pandas usa Kahan)
+y pueden diferir en el último bit: solo un valor justo sobre un límite IQR puede
+cambiar de flag (ver ``tests/test_polars_backend.py``).
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+from .kpi_calculations import FLAG_COLUMNS, assign_quartiles, flag_column
+
+__all__ = [
+    "scan_raw",
+    "build_daily",
+    "build_agent_weekly",
+    "compute_stability",
+    "flag_outliers",
+    "to_arrow",
+]
+
+AGENT_KEYS = ["agent_id", "team_id"]
+WEEK_KEYS = ["agent_id", "team_id", "iso_year", "iso_week"]
+GROUP_KEYS = ["team_id", "iso_year", "iso_week"]
+
+Frame = pl.DataFrame | pl.LazyFrame
+
+# -----------------------------
+# Lectura y capa diaria
+# -----------------------------
+def scan_raw(source: Path) -> pl.LazyFrame:
+    """LazyFrame sobre ``ops_daily``: archivo Parquet o directorio (part files / dataset Hive)."""
+    source = Path(source)
+    if source.is_dir():
+        return pl.scan_parquet(source / "**" / "*.parquet", hive_partitioning=True)
+    return pl.scan_parquet(source)
+
+def build_daily(raw: Frame) -> pl.LazyFrame:
+    """Fecha como ``Date`` (desde texto ISO o timestamp) y NaN → null en las medidas."""
+    raw = raw.lazy()
+    date = pl.col("date")
+    date = date.str.to_date("%Y-%m-%d") if raw.collect_schema()["date"] == pl.String else date.cast(pl.Date)
+    return raw.with_columns(
+        date,
+        pl.col("productive_hours").cast(pl.Float64).fill_nan(None),
+        pl.col("cases_closed").cast(pl.Float64).fill_nan(None),
+    )
+
+def build_agent_weekly(daily: Frame) -> pl.DataFrame:
+    """Medias semanales por agente/equipo/semana ISO (+ alias ``week``), ordenadas como en pandas."""
+    return (
+        daily.lazy()
+        .filter(pl.col("agent_id").is_not_null() & pl.col("team_id").is_not_null())
+        .group_by(
+            "agent_id",
+            "team_id",
+            iso_year=pl.col("date").dt.iso_year().cast(pl.Int64),
+            iso_week=pl.col("date").dt.week().cast(pl.Int64),
+        )
+        .agg(hours_mean=pl.col("productive_hours").mean(), cases_mean=pl.col("cases_closed").mean())
+        .sort(WEEK_KEYS)
+        .with_columns(week=pl.col("iso_week"))
+        .collect()
+    )
+
+# -----------------------------
+# Métricas
+# -----------------------------
+def _quantile(col: str | pl.Expr, q: float) -> pl.Expr:
+    """
+    Cuantil lineal con el mismo redondeo que ``numpy.quantile`` (y ``grouped_quantiles``):
+    interpola entre los cuantiles nativos ``lower``/``higher``, válido dentro de ``agg``/``over``.
+    """
+    expr = pl.col(col) if isinstance(col, str) else col
+    a, b = expr.quantile(q, "lower"), expr.quantile(q, "higher")
+    pos = (expr.count() - 1).cast(pl.Float64) * q
+    t = pos - pos.floor()
+    diff = b - a
+    return pl.when(t >= 0.5).then(b - diff * (1 - t)).otherwise(a + diff * t)
+
+def _median(col: str | pl.Expr) -> pl.Expr:
+    """Mediana como ``numpy.nanmedian``: media de los dos centrales."""
+    expr = pl.col(col) if isinstance(col, str) else col
+    return (expr.quantile(0.5, "lower") + expr.quantile(0.5, "higher")) / 2
+
+def _cv(col: str) -> pl.Expr:
+    mean = pl.col(col).mean()
+    return pl.when(mean != 0).then(pl.col(col).std(ddof=1) / mean)
+
+def _cvm(col: str) -> pl.Expr:
+    med = _median(col)
+    mad = _median((pl.col(col) - med).abs())
+    return pl.when(med != 0).then(1.4826 * mad / med)
+
+def compute_stability(df_week: Frame) -> pl.DataFrame:
+    """CV/CVM de horas y casos por agente y ``quartile_efficiency`` sobre ``cv_hours``."""
+    by_agent = (
+        df_week.lazy()
+        .group_by(AGENT_KEYS)
+        .agg(
+            cv_hours=_cv("hours_mean"),
+            cvm_hours=_cvm("hours_mean"),
+            cv_cases=_cv("cases_mean"),
+            cvm_cases=_cvm("cases_mean"),
+        )
+        .sort(AGENT_KEYS)
+        .collect()
+    )
+    return assign_quartiles_pl(by_agent)
+
+def assign_quartiles_pl(by_agent: pl.DataFrame) -> pl.DataFrame:
+    """
+    ``assign_quartiles`` en Polars: nulos → mediana y corte en Q1/Q2/Q3 con bordes
+    cerrados a la derecha (como ``pd.qcut``). Con bordes repetidos delega en el
+    ``assign_quartiles`` de pandas sobre la tabla por agente (pequeña).
+    """
+    base = by_agent.select(pl.col("cv_hours").fill_null(_median("cv_hours"))).to_series()
+    edges = [base.to_frame().select(_quantile("cv_hours", q)).item() for q in (0.0, 0.25, 0.5, 0.75, 1.0)]
+    if None in edges or any(hi <= lo for lo, hi in zip(edges, edges[1:])):
+        quartile = assign_quartiles(by_agent.to_pandas())["quartile_efficiency"]
+        return by_agent.with_columns(quartile_efficiency=pl.Series(quartile.to_numpy()))
+    quartile = 1 + sum((base > e).cast(pl.Int64) for e in edges[1:4])
+    return by_agent.with_columns(quartile_efficiency=quartile)
+
+def flag_outliers(df_week: Frame, metrics: list[str] | None = None, k: float = 1.5) -> pl.DataFrame:
+    """Flags IQR por equipo + año ISO + semana ISO (filas sin equipo/semana → 0)."""
+    metrics = list(FLAG_COLUMNS) if metrics is None else metrics
+    keyed = pl.all_horizontal(pl.col(GROUP_KEYS).is_not_null())
+    flags = []
+    for col in metrics:
+        q1 = _quantile(col, 0.25).over(GROUP_KEYS)
+        q3 = _quantile(col, 0.75).over(GROUP_KEYS)
+        iqr = q3 - q1
+        out = (pl.col(col) < q1 - k * iqr) | (pl.col(col) > q3 + k * iqr)
+        flags.append((keyed & out).fill_null(False).cast(pl.Int64).alias(flag_column(col)))
+    out = df_week.lazy().with_columns(flags)
+    if "week" not in out.collect_schema().names():
+        out = out.with_columns(week=pl.col("iso_week"))
+    return out.collect()
+
+# -----------------------------
+# Salida
+# -----------------------------
+def to_arrow(df: pl.DataFrame | pd.DataFrame) -> pa.Table:
+    """Tabla Arrow con tipos clásicos (``large_string``) para escribir con pyarrow."""
+    if isinstance(df, pd.DataFrame):
+        return pa.Table.from_pandas(df, preserve_index=False)
+    return df.to_arrow(compat_level=pl.CompatLevel.oldest())
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Estabilidad en ventanas móviles (4/8/12 semanas ISO)
+Recorre las semanas una sola vez y mantiene, para todos los agentes a la vez,
+estadísticos de ventana deslizante actualizados al entrar y salir cada semana:
+- CV: media y M2 de Welford con alta/baja (sin volver a sumar la ventana).
+- CVM: ventana ordenada por agente; la mediana se lee por posición y el MAD
+  sale de las desviaciones de esa ventana.
+El costo por semana depende solo del ancho de ventana, no del historial.
+Los valores coinciden con ``cv_matrix``/``cvm_matrix`` sobre cada ventana y el
+cuartil se asigna con ``assign_quartiles`` por ventana + semana.
+"""
+from __future__ import annotations
+
+import warnings
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from .kpi_calculations import agent_week_matrix, assign_quartiles
+
+__all__ = [
+    "DEFAULT_WINDOWS",
+    "RollingWindow",
+    "rolling_stability",
+]
+
+DEFAULT_WINDOWS = (4, 8, 12)
+
+class RollingWindow:
+    """
+    Ventana deslizante de ``size`` semanas sobre ``n_series`` series en paralelo.
+    ``push(x)`` añade la semana ``x`` (una celda por serie, NaN = sin dato) y
+    retira la que sale de la ventana; NaN no cuenta en ningún estadístico.
+    """
+
+    def __init__(self, n_series: int, size: int) -> None:
+        if size < 1:
+            raise ValueError("size debe ser >= 1")
+        self.size = size
+        self.ring = np.full((n_series, size), np.nan)      # valores en orden de llegada
+        self.sorted = np.full((n_series, size), np.nan)    # los mismos, ordenados (NaN al final)
+        self.count = np.zeros(n_series, dtype=np.int64)
+        self.mean = np.zeros(n_series)
+        self.m2 = np.zeros(n_series)
+        self.pushed = 0
+        self._cols = np.arange(size)
+
+    def push(self, x: np.ndarray) -> "RollingWindow":
+        x = np.asarray(x, dtype=np.float64)
+        slot = self.pushed % self.size
+        old = self.ring[:, slot].copy()
+        self.ring[:, slot] = x
+        self.pushed += 1
+        self._remove(old)
+        self._add(x)
+        # Ventana constante (mín == máx): M2 exacto en 0, sin residuos de las bajas
+        last = self.sorted[np.arange(len(x)), np.maximum(self.count - 1, 0)]
+        flat = (self.count > 0) & (self.sorted[:, 0] == last)
+        self.m2[flat] = 0.0
+        self.mean[flat] = last[flat]
+        return self
+
+    def _remove(self, y: np.ndarray) -> None:
+        r = ~np.isnan(y)
+        n = self.count - r
+        d = np.where(r, y - self.mean, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, self.mean - d / np.maximum(n, 1), 0.0)
+        m2 = np.maximum(self.m2 - np.where(r, d * (y - mean), 0.0), 0.0)
+        self.m2 = np.where(n > 1, m2, 0.0)
+        self.mean, self.count = mean, n
+        # Baja en la ventana ordenada: desplaza a la izquierda desde la primera ocurrencia
+        s = self.sorted
+        idx = np.where(r, np.sum(s < y[:, None], axis=1), self.size)[:, None]
+        left = np.concatenate([s[:, 1:], np.full((len(s), 1), np.nan)], axis=1)
+        self.sorted = np.where(self._cols >= idx, left, s)
+
+    def _add(self, x: np.ndarray) -> None:
+        a = ~np.isnan(x)
+        self.count = self.count + a
+        d = np.where(a, x - self.mean, 0.0)
+        self.mean = self.mean + d / np.maximum(self.count, 1)
+        self.m2 = self.m2 + np.where(a, d * (x - self.mean), 0.0)
+        # Alta: siempre hay un hueco (NaN) porque la ventana acaba de soltar una celda
+        s = self.sorted
+        idx = np.where(a, np.sum(s < x[:, None], axis=1), self.size)[:, None]
+        right = np.concatenate([np.full((len(s), 1), np.nan), s[:, :-1]], axis=1)
+        self.sorted = np.where(self._cols > idx, right, np.where(self._cols == idx, x[:, None], s))
+
+    def _middle(self, s: np.ndarray) -> np.ndarray:
+        """Mediana de las primeras ``count`` celdas de cada fila ordenada (NaN si está vacía)."""
+        has = self.count > 0
+        rows = np.flatnonzero(has)
+        out = np.full(len(s), np.nan)
+        n = self.count[has]
+        out[has] = (s[rows, (n - 1) // 2] + s[rows, n // 2]) / 2
+        return out
+
+    def cv(self) -> np.ndarray:
+        """std muestral / media de la ventana; NaN con < 2 valores o media 0 (como ``cv_matrix``)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+            return np.where(self.mean != 0, std / self.mean, np.nan)
+
+    def cvm(self) -> np.ndarray:
+        """1.4826·MAD / mediana de la ventana; NaN si está vacía o la mediana es 0 (como ``cvm_matrix``)."""
+        med = self._middle(self.sorted)
+        mad = self._middle(np.sort(np.abs(self.sorted - med[:, None]), axis=1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(med != 0, 1.4826 * mad / med, np.nan)
+
+def _quartile(cv: np.ndarray) -> np.ndarray:
+    """
+    ``assign_quartiles`` sobre un corte (ventana + semana) sin pasar por pandas:
+    NaN → mediana y corte en Q1/Q2/Q3 con bordes cerrados a la derecha, como
+    ``pd.qcut``. Con bordes repetidos delega en ``assign_quartiles``; si tampoco
+    puede cortar (p. ej. ningún agente con 2+ semanas en la ventana) → NaN.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # corte sin CV → NaN
+        filled = np.where(np.isnan(cv), np.nanmedian(cv), cv)
+    edges = np.quantile(filled, [0.0, 0.25, 0.5, 0.75, 1.0])
+    if np.all(np.diff(edges) > 0):
+        return 1.0 + (filled > edges[1]) + (filled > edges[2]) + (filled > edges[3])
+    try:
+        return assign_quartiles(pd.DataFrame({"cv_hours": cv}))["quartile_efficiency"].to_numpy(np.float64)
+    except ValueError:
+        return np.full(len(cv), np.nan)
+
+def rolling_stability(
+    df_week: pd.DataFrame,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    metrics: Sequence[str] = ("hours_mean", "cases_mean"),
+) -> pd.DataFrame:
+    """
+    Tabla ``rolling_stability``: una fila por agente/equipo, semana ISO de cierre y
+    ancho de ventana (``window_weeks``), con ``n_weeks`` (semanas con dato en la
+    ventana), ``cv_*``/``cvm_*`` y ``quartile_efficiency`` sobre el CV de la primera
+    métrica (``cv_hours`` por defecto, como ``compute_stability``) de los agentes de
+    esa ventana + semana (``Int64``: nulo si el corte no admite cuartiles, donde
+    ``compute_stability`` fallaría). Solo se emiten ventanas
+    completas del calendario (desde la semana ``w`` del historial) con al menos
+    una semana de dato.
+    Espera una fila por agente y semana ISO (salida de ``build_agent_weekly``).
+    """
+    if not metrics:
+        raise ValueError("rolling_stability necesita al menos una métrica")
+    by_agent, mats = agent_week_matrix(df_week, list(metrics))
+    week_key = np.unique(df_week["iso_year"].to_numpy(np.int64) * 100 + df_week["iso_week"].to_numpy(np.int64))
+    n_weeks = mats[metrics[0]].shape[1]
+    if n_weeks != len(week_key):
+        raise ValueError("rolling_stability espera una fila por agente y semana ISO")
+
+    # Una pasada por ventana; el cuartil se asigna por (ventana, semana) emitida
+    parts: dict[str, list[np.ndarray]] = {c: [] for c in ("row", "week", "window", "n", "quartile")}
+    stats: dict[str, list[np.ndarray]] = {}
+    rank_col = f"cv_{metrics[0].removesuffix('_mean')}"
+    for w in windows:
+        wins = {m: RollingWindow(len(by_agent), w) for m in metrics}
+        for t in range(n_weeks):
+            for m, win in wins.items():
+                win.push(mats[m][:, t])
+            count = wins[metrics[0]].count
+            keep = np.flatnonzero(count > 0)
+            if t + 1 < w or not len(keep):
+                continue
+            for col, v in (("row", keep), ("week", week_key[t]), ("window", w), ("n", count[keep])):
+                parts[col].append(np.broadcast_to(v, len(keep)))
+            for m, win in wins.items():
+                name = m.removesuffix("_mean")
+                stats.setdefault(f"cv_{name}", []).append(win.cv()[keep])
+                stats.setdefault(f"cvm_{name}", []).append(win.cvm()[keep])
+            parts["quartile"].append(_quartile(stats[rank_col][-1]))
+
+    cat = {k: np.concatenate(v) if v else np.array([], dtype=np.int64) for k, v in parts.items()}
+    out = by_agent.iloc[cat["row"]].reset_index(drop=True)
+    out["iso_year"] = cat["week"] // 100
+    out["iso_week"] = cat["week"] % 100
+    out["window_weeks"] = cat["window"]
+    out["n_weeks"] = cat["n"]
+    for m in metrics:
+        for k in ("cv", "cvm"):
+            col = f"{k}_{m.removesuffix('_mean')}"
+            out[col] = np.concatenate(stats[col]) if col in stats else np.array([], dtype=np.float64)
+    out["quartile_efficiency"] = pd.array(cat["quartile"].astype(np.float64), dtype="Int64")
+    return out
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Esquema compacto de columnas
+IDs como categóricas (diccionario), año/semana ISO en int16 y medidas enteras
+reducidas al menor entero. Las medidas float se dejan en float64: en float32 las
+horas cambian algún flag IQR en el borde. Solo cambian los tipos de
+almacenamiento, no el contrato de columnas.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "ID_COLUMNS",
+    "ISO_COLUMNS",
+    "MEASURE_COLUMNS",
+    "compact_schema",
+    "parse_dates",
+]
+
+ID_COLUMNS = ["agent_id", "team_id"]
+ISO_COLUMNS = ["iso_year", "iso_week", "week"]
+MEASURE_COLUMNS = ["productive_hours", "cases_closed", "hours_mean", "cases_mean"]
+
+def _downcast_int(s: pd.Series) -> pd.Series:
+    """Entero numpy → el menor int con signo que contiene [min, max]; otros tipos sin cambios."""
+    if not (isinstance(s.dtype, np.dtype) and s.dtype.kind == "i") or s.empty:
+        return s
+    lo, hi = s.min(), s.max()
+    for t in (np.int8, np.int16, np.int32):
+        if np.iinfo(t).min <= lo and hi <= np.iinfo(t).max:
+            return s.astype(t)
+    return s
+
+def parse_dates(s: pd.Series) -> pd.Series:
+    """
+    ``pd.to_datetime`` sobre los valores únicos y difusión por código.
+    La capa diaria repite cada fecha una vez por agente: evita parsear (y
+    asignar temporales para) millones de strings iguales.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    if isinstance(s.dtype, pd.CategoricalDtype):  # ya codificada (diccionario Parquet)
+        codes = s.cat.codes.to_numpy()
+        values = np.append(pd.to_datetime(s.cat.categories).to_numpy(), np.datetime64("NaT"))  # -1 → NaT
+    else:
+        codes, uniques = pd.factorize(s, use_na_sentinel=False)
+        values = pd.to_datetime(uniques).to_numpy()
+    return pd.Series(values[codes], index=s.index, name=s.name)
+
+def compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devuelve ``df`` con tipos compactos en las columnas conocidas presentes.
+    Copia superficial: las columnas no convertidas se comparten con ``df``.
+    Las medidas enteras (p. ej. ``cases_closed``) se reducen al menor entero que las contiene.
+    Las categorías de los IDs quedan ordenadas (p. ej. tras leer diccionarios Parquet).
+    """
+    out = df.copy(deep=False)
+    for c in ID_COLUMNS:
+        if c not in out.columns:
+            continue
+        s = out[c] if isinstance(out[c].dtype, pd.CategoricalDtype) else out[c].astype("category")
+        # categorías ordenadas → mismo orden de filas que con strings al ordenar/agrupar
+        out[c] = s.cat.set_categories(s.cat.categories.sort_values())
+    for c in ISO_COLUMNS:
+        if c in out.columns:
+            out[c] = out[c].astype(np.int16)
+    for c in MEASURE_COLUMNS:
+        if c in out.columns:
+            out[c] = _downcast_int(out[c])
+    return out
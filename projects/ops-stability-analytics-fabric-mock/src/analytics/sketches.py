@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Sketches de cuantiles combinables (estilo KLL)
+Permiten estimar medianas, MAD, límites IQR y cortes de cuartil con error de
+rango acotado (``eps``) sin materializar ni ordenar los grupos completos:
+cada partición/worker construye su sketch y luego se combinan con ``merge``
+(``keyed_sketches`` + ``merge_grouped`` para muchos grupos a la vez).
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable
+
+import numpy as np
+
+__all__ = [
+    "k_for_eps",
+    "KLLSketch",
+    "grouped_sketches",
+    "keyed_sketches",
+    "merge_grouped",
+    "sketch_quantiles",
+    "sketch_median_mad",
+    "sketch_cvm",
+]
+
+def k_for_eps(eps: float) -> int:
+    """Parámetro k de KLL para un error de rango normalizado ≈ ``eps`` (ajuste empírico de DataSketches)."""
+    if not 0 < eps < 1:
+        raise ValueError("eps debe estar en (0, 1)")
+    return max(8, math.ceil((2.296 / eps) ** (1 / 0.9723)))
+
+class KLLSketch:
+    """
+    Sketch KLL: compactadores por nivel (peso 2^h) con capacidad decreciente
+    geométricamente (factor 2/3) hacia los niveles bajos. Mientras ``n`` no supera
+    la capacidad del nivel 0 (``k``) el sketch es exacto; el generador aleatorio solo
+    se crea en la primera compactación.
+    """
+
+    C = 2.0 / 3.0
+
+    def __init__(self, eps: float = 0.01, k: int | None = None, seed: int = 0) -> None:
+        self.k = k or k_for_eps(eps)
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.seed = seed
+        self._rng: np.random.Generator | None = None
+
+    # -- construcción ------------------------------------------------
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, math.ceil(self.k * self.C ** depth))
+
+    def _compress(self) -> None:
+        while True:
+            over = [h for h, items in enumerate(self.levels) if items.size > self._capacity(h)]
+            if not over:
+                return
+            h = over[0]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            if self._rng is None:
+                self._rng = np.random.default_rng(self.seed)
+            items = np.sort(self.levels[h])
+            odd = items.size % 2
+            promoted = items[odd:][int(self._rng.integers(2))::2]
+            self.levels[h] = items[:odd]
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    def update(self, values: Iterable[float] | np.ndarray) -> "KLLSketch":
+        """Añade valores (ignora NaN)."""
+        v = np.asarray(values, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        if v.size:
+            self.n += v.size
+            self.levels[0] = np.concatenate([self.levels[0], v])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Combina ``other`` en este sketch (in-place)."""
+        self.k = min(self.k, other.k)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    # -- consultas ---------------------------------------------------
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(l.size, 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """
+        Cuantiles aproximados (NaN si el sketch está vacío).
+        Interpola entre ítems según su rango central ponderado; sin compactar
+        coincide con la interpolación lineal de ``Series.quantile``.
+        """
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items, weights, cum = self._weighted()
+        centers = cum - weights / 2 - 0.5
+        return np.interp(qs * (cum[-1] - 1), centers, items)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def rank(self, x: float) -> float:
+        """Fracción aproximada de valores ≤ x."""
+        if self.n == 0:
+            return np.nan
+        items, _, cum = self._weighted()
+        i = np.searchsorted(items, x, side="right")
+        return float(cum[i - 1] / cum[-1]) if i else 0.0
+
+    def __len__(self) -> int:
+        return self.n
+
+# -----------------------------
+# Sketches por grupo
+# -----------------------------
+def grouped_sketches(
+    codes: np.ndarray, values: np.ndarray, n_groups: int, eps: float, seed: int = 0
+) -> list[KLLSketch]:
+    """Un sketch por código de grupo (0..n_groups-1); códigos negativos se ignoran."""
+    ok = codes >= 0
+    codes, values = codes[ok], np.asarray(values, dtype=np.float64)[ok]
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    v = values[order]
+    return [
+        KLLSketch(eps, seed=seed).update(v[bounds[g]:bounds[g + 1]])
+        for g in range(n_groups)
+    ]
+
+def keyed_sketches(codes: np.ndarray, values: np.ndarray, eps: float, seed: int = 0) -> dict[int, KLLSketch]:
+    """
+    Sketches de una partición/lote como {código de grupo: sketch}, solo para los
+    códigos presentes (negativos y NaN se ignoran). Una sola ordenación por código;
+    los diccionarios de varias particiones se combinan con ``merge_grouped``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ok = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[ok], values[ok]
+    order = np.argsort(codes, kind="stable")
+    codes, values = codes[order], values[order]
+    present, starts = np.unique(codes, return_index=True)
+    ends = np.append(starts[1:], codes.size)
+    return {
+        int(g): KLLSketch(eps, seed=seed).update(values[a:b])
+        for g, a, b in zip(present, starts, ends)
+    }
+
+def merge_grouped(*parts: dict) -> dict:
+    """Combina diccionarios {clave de grupo: sketch} producidos por varias particiones/workers."""
+    out: dict = {}
+    for part in parts:
+        for key, sk in part.items():
+            if key in out:
+                out[key].merge(sk)
+            else:
+                out[key] = sk
+    return out
+
+def sketch_quantiles(sketches: list[KLLSketch], qs: list[float]) -> np.ndarray:
+    """Matriz (n_groups, len(qs)) de cuantiles aproximados."""
+    if not sketches:
+        return np.empty((0, len(qs)))
+    return np.vstack([s.quantiles(qs) for s in sketches])
+
+def sketch_median_mad(
+    codes: np.ndarray, values: np.ndarray, n_groups: int, eps: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mediana y MAD aproximadas por grupo en dos pasadas: sketch de valores → mediana;
+    sketch de |x − mediana| → MAD. Cada una con error de rango ≈ ``eps`` (la MAD
+    respecto de las desviaciones a la mediana estimada).
+    """
+    med = sketch_quantiles(grouped_sketches(codes, values, n_groups, eps), [0.5])[:, 0]
+    ok = codes >= 0
+    dev = np.full(len(values), np.nan)
+    dev[ok] = np.abs(np.asarray(values, dtype=np.float64)[ok] - med[codes[ok]])
+    mad = sketch_quantiles(grouped_sketches(codes, dev, n_groups, eps), [0.5])[:, 0]
+    return med, mad
+
+def sketch_cvm(codes: np.ndarray, values: np.ndarray, n_groups: int, eps: float) -> np.ndarray:
+    """CVM aproximado (1.4826·MAD / mediana) por grupo (ver ``sketch_median_mad``)."""
+    med, mad = sketch_median_mad(codes, values, n_groups, eps)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(med != 0, 1.4826 * mad / med, np.nan)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline KPI out-of-core
+Recorre la capa raw (archivo o dataset Parquet) por lotes de filas y los pliega
+en parciales semanales combinables; la memoria queda acotada por el tamaño del
+lote + la tabla agente×semana, no por el historial diario.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from .weekly_partials import finalize_weekly, merge_partials, weekly_partials
+
+__all__ = [
+    "RAW_COLUMNS",
+    "parse_memory",
+    "batch_rows_for_memory",
+    "iter_raw_batches",
+    "stream_weekly",
+]
+
+RAW_COLUMNS = ["date", "agent_id", "team_id", "productive_hours", "cases_closed"]
+
+# Bytes en memoria (pandas, strings objeto) por byte Parquet sin comprimir; estimación conservadora
+PANDAS_EXPANSION = 4
+DEFAULT_BATCH_ROWS = 1_000_000
+
+def parse_memory(value: str) -> int:
+    """Convierte '512MB', '2G', '1048576' en bytes."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", value.upper())
+    if not m:
+        raise ValueError(f"Tamaño de memoria inválido: {value!r}")
+    scale = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}[m.group(2)]
+    return int(float(m.group(1)) * scale)
+
+def _dataset(source: Path) -> ds.Dataset:
+    return ds.dataset(Path(source), format="parquet", partitioning="hive")
+
+def batch_rows_for_memory(source: Path, max_bytes: int) -> int:
+    """Filas por lote para que un lote en pandas quepa en ``max_bytes`` (mín. 1 000)."""
+    size, rows = 0, 0
+    for frag in _dataset(source).get_fragments():
+        meta = frag.metadata
+        rows += meta.num_rows
+        size += sum(meta.row_group(i).total_byte_size for i in range(meta.num_row_groups))
+    if not rows:
+        return DEFAULT_BATCH_ROWS
+    per_row = max(1.0, size / rows) * PANDAS_EXPANSION
+    return max(1_000, int(max_bytes / per_row))
+
+def iter_raw_batches(source: Path, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """Lotes de la capa raw como DataFrames de ≤ ``batch_rows`` filas (sin read-ahead)."""
+    scanner = _dataset(source).scanner(
+        columns=RAW_COLUMNS,
+        batch_size=batch_rows,
+        batch_readahead=0,
+        fragment_readahead=0,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def stream_weekly(source: Path, batch_rows: int = DEFAULT_BATCH_ROWS, compact: bool = False) -> pd.DataFrame:
+    """
+    Pliega todos los lotes en parciales sum/count y devuelve la tabla semanal
+    (mismo contrato que ``build_agent_weekly`` sobre el historial completo).
+    Los parciales de cada lote se acumulan y se combinan cuando igualan al acumulado,
+    para no reagrupar la tabla completa en cada lote.
+    ``compact`` se aplica a la tabla semanal final (ver ``finalize_weekly``).
+    """
+    acc = None
+    pending: list[pd.DataFrame] = []
+    pending_rows = 0
+    for batch in iter_raw_batches(source, batch_rows):
+        part = weekly_partials(batch)
+        pending.append(part)
+        pending_rows += len(part)
+        if pending_rows >= max(batch_rows, 0 if acc is None else len(acc)):
+            acc = merge_partials(acc, *pending)
+            pending, pending_rows = [], 0
+    return finalize_weekly(merge_partials(acc, *pending), compact=compact)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Agregados parciales semanales (sum / count) por agente + semana ISO.
+Son combinables: la suma de parciales de varios lotes equivale al parcial
+del histórico completo, y ``finalize_weekly`` reproduce ``build_agent_weekly``.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "WEEK_KEYS",
+    "PARTIAL_COLUMNS",
+    "weekly_partials",
+    "merge_partials",
+    "finalize_weekly",
+]
+
+WEEK_KEYS = ["agent_id", "team_id", "iso_year", "iso_week"]
+PARTIAL_COLUMNS = ["hours_sum", "hours_n", "cases_sum", "cases_n"]
+
+def weekly_partials(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Suma y conteo (sin NaN) de horas/casos por agente/equipo/semana ISO.
+    Acumula con ``np.bincount`` sobre la rejilla densa (agente, equipo) × semana
+    y conserva solo las celdas con filas: sin tablas hash ni copias anchas de
+    la capa diaria. Filas sin agente/equipo se descartan (como ``groupby``).
+    """
+    a_codes, agents = pd.factorize(daily["agent_id"])
+    t_codes, teams = pd.factorize(daily["team_id"])
+    # ISO año/semana sobre las fechas únicas (pocas) y difusión por código
+    d_codes, dates = pd.factorize(daily["date"], use_na_sentinel=False)
+    iso = pd.DatetimeIndex(pd.to_datetime(dates)).isocalendar()
+    weeks, week_of_date = np.unique(
+        iso["year"].to_numpy(np.int64) * 100 + iso["week"].to_numpy(np.int64), return_inverse=True
+    )
+
+    ok = (a_codes >= 0) & (t_codes >= 0)
+    if ok.all():
+        ok = slice(None)  # vistas en lugar de copias enmascaradas
+    pair = a_codes[ok] * len(teams) + t_codes[ok]
+    used = np.zeros(len(agents) * len(teams), dtype=bool)
+    used[pair] = True
+    pairs = np.flatnonzero(used)
+    n_w = len(weeks)
+    cell = (np.cumsum(used) - 1)[pair] * n_w + week_of_date[d_codes[ok]]
+    del a_codes, t_codes, pair, used
+
+    n_cells = len(pairs) * n_w
+    filled = np.flatnonzero(np.bincount(cell, minlength=n_cells))
+    gid = np.searchsorted(filled, cell)
+    del cell
+    pair_of = pairs[filled // n_w]
+    week = weeks[filled % n_w]
+    out = {
+        "agent_id": agents.take(pair_of // max(len(teams), 1)),
+        "team_id": teams.take(pair_of % max(len(teams), 1)),
+        "iso_year": (week // 100).astype(np.int16),
+        "iso_week": (week % 100).astype(np.int16),
+    }
+    for col, name in (("productive_hours", "hours"), ("cases_closed", "cases")):
+        v = daily[col].to_numpy(np.float64, na_value=np.nan)[ok]
+        has = ~np.isnan(v)
+        out[f"{name}_sum"] = _kahan_sums(gid[has], v[has], len(filled))
+        out[f"{name}_n"] = np.bincount(gid[has], minlength=len(filled))
+    return pd.DataFrame(out)
+
+def _kahan_sums(gid: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Suma compensada (Kahan) por grupo en orden de filas, igual que ``groupby().sum()``.
+    Ordena una vez por grupo y avanza en paralelo la j-ésima fila de cada grupo
+    (≤ 7 pasos para datos diarios por semana).
+    """
+    order = np.argsort(gid, kind="stable")
+    x = values[order]
+    counts = np.bincount(gid, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    total = np.zeros(n_groups)
+    comp = np.zeros(n_groups)
+    for j in range(int(counts.max()) if n_groups else 0):
+        g = np.flatnonzero(counts > j)
+        y = x[starts[g] + j] - comp[g]
+        t = total[g] + y
+        comp[g] = (t - total[g]) - y
+        total[g] = t
+    return total
+
+def merge_partials(*parts: pd.DataFrame) -> pd.DataFrame:
+    """Combina parciales de varios lotes sumando por clave agente/semana."""
+    frames = [p for p in parts if p is not None and len(p)]
+    if not frames:
+        return pd.DataFrame(columns=WEEK_KEYS + PARTIAL_COLUMNS)
+    if len(frames) == 1:
+        return frames[0]
+    return (
+        pd.concat(frames, ignore_index=True)
+        .groupby(WEEK_KEYS, as_index=False, sort=False, observed=True)[PARTIAL_COLUMNS]
+        .sum()
+    )
+
+def finalize_weekly(partials: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """
+    Convierte parciales en la tabla semanal (medias) con el contrato de ``build_agent_weekly``.
+    Con ``compact`` deja año/semana ISO en int16; las medias siguen en float64
+    (en float32 los límites IQR cambian algún flag en el borde).
+    """
+    iso_dtype = "int16" if compact else "int64"
+    out = partials.sort_values(WEEK_KEYS, ignore_index=True)
+    grp = out[WEEK_KEYS].copy(deep=False)
+    grp["iso_year"] = grp["iso_year"].astype(iso_dtype)
+    grp["iso_week"] = grp["iso_week"].astype(iso_dtype)
+    grp["hours_mean"] = out["hours_sum"] / out["hours_n"].where(out["hours_n"] > 0)
+    grp["cases_mean"] = out["cases_sum"] / out["cases_n"].where(out["cases_n"] > 0)
+
+    # 👉 alias retro-compatible que tu test espera
+    grp["week"] = grp["iso_week"]
+    return grp
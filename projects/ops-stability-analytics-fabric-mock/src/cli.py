@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Declaración de argumentos de los entry points (generate, kpi, live, smoke)
+Solo stdlib: ``<cmd> --help`` en la CLI unificada construye el parser desde aquí sin
+importar pandas, NumPy ni pyarrow. Cada ``main(argv)`` usa el mismo parser y añade
+sus validaciones (``parser.error``).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from .config import (
+    DEFAULT_AGENTS,
+    DEFAULT_CHUNK_ROWS,
+    DEFAULT_COMPRESSION,
+    DEFAULT_DAYS,
+    DEFAULT_FORMAT,
+    DEFAULT_OUTDIR,
+    DEFAULT_ROW_GROUP_SIZE,
+    DEFAULT_SEED,
+    DEFAULT_SHARD_AGENTS,
+    DEFAULT_WORKERS,
+)
+
+__all__ = [
+    "generate_parser",
+    "kpi_parser",
+    "live_parser",
+    "smoke_parser",
+]
+
+# -----------------------------
+# Parsers por subcomando
+# -----------------------------
+def generate_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``src.etl.generate_synthetic_data``."""
+    parser = argparse.ArgumentParser(description="Generate synthetic ops data for Athera/Fabric pipeline")
+    parser.add_argument("--agents", type=int, default=int(os.getenv("N_AGENTS", DEFAULT_AGENTS)),
+                        help="Number of agents")
+    parser.add_argument("--days", type=int, default=int(os.getenv("N_DAYS", DEFAULT_DAYS)),
+                        help="Number of days to simulate")
+    parser.add_argument("--seed", type=int, default=int(os.getenv("SEED", DEFAULT_SEED)), help="Random seed")
+    parser.add_argument("--format", choices=["parquet", "csv"], default=os.getenv("OUT_FORMAT", DEFAULT_FORMAT).lower(),
+                        help="Output format")
+    parser.add_argument("--outdir", type=Path, default=Path(os.getenv("RAW_PATH", DEFAULT_OUTDIR)),
+                        help="Output directory path")
+    parser.add_argument("--chunk-rows", type=int, default=int(os.getenv("CHUNK_ROWS", DEFAULT_CHUNK_ROWS)),
+                        help="Approximate rows per streamed chunk (bounds peak memory)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("N_WORKERS", DEFAULT_WORKERS)),
+                        help="Worker processes; >1 writes one Parquet part file per shard")
+    parser.add_argument("--shard-agents", type=int, default=int(os.getenv("SHARD_AGENTS", DEFAULT_SHARD_AGENTS)),
+                        help="Agents per shard (fixes the output independently of --workers)")
+    parser.add_argument("--layout", choices=["file", "partitioned"], default="file",
+                        help="'partitioned' writes a Hive dataset iso_year/iso_week/team_id")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help="Max rows per Parquet row group (partitioned layout)")
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION,
+                        help="Parquet compression codec (partitioned layout)")
+    parser.add_argument("--sort-by", default="agent_id,date",
+                        help="Comma-separated sort order inside each file (partitioned layout)")
+    parser.add_argument("--cache", action="store_true", default=os.getenv("STAGE_CACHE", "0") == "1",
+                        help="Reuse a previous output with identical params/code (STAGE_CACHE=1)")
+    return parser
+
+def kpi_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``src.analytics.kpi_calculations``."""
+    parser = argparse.ArgumentParser(description="Compute stability KPIs and weekly outlier flags")
+    parser.add_argument("--lakehouse", type=Path, default=Path("lakehouse_sim"), help="Lakehouse root")
+    parser.add_argument("--layout", choices=["file", "partitioned"], default="file",
+                        help="'partitioned' writes Tables as Hive datasets (iso_year/iso_week/team_id)")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help="Max rows per Parquet row group (partitioned layout)")
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION,
+                        help="Parquet compression codec (partitioned layout)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process days after the stored watermark (file layout)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Fold raw Parquet in row batches (out-of-core, bounded memory)")
+    parser.add_argument("--batch-rows", type=int, default=None,
+                        help="Rows per streamed batch (streaming mode)")
+    parser.add_argument("--max-memory", default=None,
+                        help="Memory budget per streamed batch, e.g. 512MB (streaming mode)")
+    parser.add_argument("--approx-eps", type=float, default=None,
+                        help="Use KLL quantile sketches (rank error ~eps) for CVM, IQR flags and quartiles")
+    parser.add_argument("--compact", action="store_true",
+                        help="Compact dtypes: categorical IDs, int16 ISO year/week, narrowed integer measures")
+    parser.add_argument("--iqr-k", type=float, default=1.5, help="IQR multiplier k for outlier flags")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default=os.getenv("KPI_BACKEND", "pandas"),
+                        help="Compute engine for weekly/stability/flags; 'polars' scans raw Parquet directly "
+                             "and runs the group-bys multi-threaded (KPI_BACKEND)")
+    parser.add_argument("--rolling", nargs="*", type=int, default=None, metavar="WEEKS",
+                        help="Also write Tables/rolling_stability with CV/CVM over these rolling windows "
+                             "(ISO weeks; default 4 8 12)")
+    parser.add_argument("--cache", action="store_true", default=os.getenv("STAGE_CACHE", "0") == "1",
+                        help="Reuse Tables from lakehouse/.cache when inputs, params and code are unchanged")
+    parser.add_argument("--validate", action="store_true", default=os.getenv("VALIDATE_OUTPUTS", "0") == "1",
+                        help="Check written Tables from Parquet footers/statistics (VALIDATE_OUTPUTS=1)")
+    parser.add_argument("--workers", type=int, default=2, help="Stages run concurrently (stability/flags branches)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip stages completed by the last run (same params and raw input) after a failure; "
+                             "--resume/--rerun runs also keep a weekly checkpoint in Files/state/dag")
+    parser.add_argument("--rerun", nargs="+", default=[], metavar="STAGE",
+                        help="Re-run these stages and everything downstream, reusing the rest "
+                             "(read, daily, weekly, stability, flags, rolling, write_<table>)")
+    return parser
+
+def live_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``src.analytics.live``."""
+    parser = argparse.ArgumentParser(
+        description="Live ingestion: fold case-system events into weekly KPIs and flush micro-batches to Tables"
+    )
+    parser.add_argument("--lakehouse", type=Path, default=Path("lakehouse_sim"), help="Lakehouse root")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", type=Path, metavar="FILE", help="Follow a JSON Lines event file (like tail -f)")
+    source.add_argument("--listen", metavar="HOST:PORT", help="Accept JSON Lines events over TCP, e.g. 127.0.0.1:8765")
+    source.add_argument("--replay", action="store_true",
+                        help="Replay Files/raw ops_daily as events (demo / parity check)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Replay speed in events per second (default: unthrottled)")
+    parser.add_argument("--flush-seconds", type=float, default=float(os.getenv("LIVE_FLUSH_SECONDS", 5)),
+                        help="Seconds between micro-batch flushes to Tables (LIVE_FLUSH_SECONDS)")
+    parser.add_argument("--lateness-days", type=int, default=int(os.getenv("LIVE_LATENESS_DAYS", 1)),
+                        help="Allowed event-time lateness: weeks ending before max date - lateness are closed "
+                             "and later events for them dropped (LIVE_LATENESS_DAYS)")
+    parser.add_argument("--max-future-days", type=int, default=int(os.getenv("LIVE_MAX_FUTURE_DAYS", 1)),
+                        help="Events dated more than this many days after today are rejected as invalid, so a "
+                             "bad clock cannot advance the watermark (LIVE_MAX_FUTURE_DAYS)")
+    parser.add_argument("--iqr-k", type=float, default=1.5, help="IQR multiplier k for outlier flags")
+    parser.add_argument("--layout", choices=["file", "partitioned"], default="file",
+                        help="'partitioned' rewrites only the touched iso_year/iso_week/team_id partitions per flush")
+    parser.add_argument("--bootstrap", action="store_true",
+                        help="Start from the kpi --incremental state (Files/state/kpi) instead of an empty history")
+    parser.add_argument("--reset", action="store_true", help="Discard the saved live state (Files/state/live)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop after this many seconds (a final flush always runs; Ctrl+C also stops)")
+    return parser
+
+def smoke_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``scripts/smoke_check.py``."""
+    parser = argparse.ArgumentParser(description="In-process smoke test for the Fabric-mock pipeline and SQL layer")
+    parser.add_argument("--lakehouse", type=Path, default=Path(os.getenv("LAKEHOUSE_PATH", "lakehouse_sim")),
+                        help="Lakehouse root")
+    parser.add_argument("--agents", type=int, default=int(os.getenv("N_AGENTS", DEFAULT_AGENTS)),
+                        help="Number of agents")
+    parser.add_argument("--days", type=int, default=int(os.getenv("N_DAYS", DEFAULT_DAYS)),
+                        help="Number of days to simulate")
+    parser.add_argument("--seed", type=int, default=int(os.getenv("SEED", DEFAULT_SEED)), help="Random seed")
+    parser.add_argument("--sql", action="store_true", default=os.getenv("SMOKE_SQL", "0") == "1",
+                        help="Also check the SQL layer (SMOKE_SQL=1)")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent check chains (default: all)")
+    return parser
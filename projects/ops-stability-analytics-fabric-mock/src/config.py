@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Valores por defecto del proyecto (entorno del proceso)
+Solo stdlib: ``src/cli.py`` los usa para declarar argumentos sin importar pandas/pyarrow.
+Se leen al importar; los ``main`` vuelven a consultar el entorno tras ``load_dotenv()``.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+# -----------------------------
+# Generador sintético (raw)
+# -----------------------------
+DEFAULT_AGENTS = int(os.getenv("N_AGENTS", 60))
+DEFAULT_DAYS = int(os.getenv("N_DAYS", 90))
+DEFAULT_SEED = int(os.getenv("SEED", 42))
+DEFAULT_FORMAT = os.getenv("OUT_FORMAT", "parquet").lower()
+DEFAULT_OUTDIR = Path(os.getenv("RAW_PATH", "lakehouse_sim/Files/raw"))
+DEFAULT_CHUNK_ROWS = int(os.getenv("CHUNK_ROWS", 1_000_000))
+DEFAULT_SHARD_AGENTS = int(os.getenv("SHARD_AGENTS", 1_000))
+DEFAULT_WORKERS = int(os.getenv("N_WORKERS", 1))
+
+# -----------------------------
+# Escritura Parquet
+# -----------------------------
+DEFAULT_ROW_GROUP_SIZE = int(os.getenv("ROW_GROUP_SIZE", 131_072))
+DEFAULT_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
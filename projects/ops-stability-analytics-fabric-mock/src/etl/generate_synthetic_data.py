@@ -4,71 +4,278 @@ Synthetic Daily Data Generator
 Fabric-ready compatible. Supports .env configuration and CLI overrides.
 """
 from __future__ import annotations
-import argparse
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 from dotenv import load_dotenv
 
+from ..cli import generate_parser
+from ..config import DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE, DEFAULT_SHARD_AGENTS
+from ..pipeline.cache import StageCache
+from ..lakehouse.dataset import with_iso_columns, write_dataset
+
 # --------------------------------------------------------------------
-# Configuración global
+# Configuración global (DEFAULT_* en src/config.py; .env se carga en main())
 # --------------------------------------------------------------------
-load_dotenv()
-
-DEFAULT_AGENTS = int(os.getenv("N_AGENTS", 60))
-DEFAULT_DAYS = int(os.getenv("N_DAYS", 90))
-DEFAULT_SEED = int(os.getenv("SEED", 42))
-DEFAULT_FORMAT = os.getenv("OUT_FORMAT", "parquet").lower()
-DEFAULT_OUTDIR = Path(os.getenv("RAW_PATH", "lakehouse_sim/Files/raw"))
+COLUMNS = ["date", "agent_id", "team_id", "productive_hours", "cases_closed"]
 
 # --------------------------------------------------------------------
-# Generador base
+# Generador base (vectorizado + shards deterministas)
 # --------------------------------------------------------------------
+def _end_date(end: str | None) -> pd.Timestamp:
+    return pd.Timestamp(end) if end else pd.Timestamp.today().normalize()
+
+def shard_bounds(n_agents: int, shard_agents: int = DEFAULT_SHARD_AGENTS) -> list[tuple[int, int]]:
+    """Rangos [inicio, fin) de agentes por shard; no depende del número de workers."""
+    step = max(1, shard_agents)
+    return [(s, min(s + step, n_agents)) for s in range(0, n_agents, step)]
+
+def shard_seeds(seed: int, n_shards: int) -> list[np.random.SeedSequence]:
+    """Semilla hija independiente por shard a partir de la semilla global."""
+    return np.random.SeedSequence(seed).spawn(n_shards)
+
+def iter_shard(
+    start: int,
+    stop: int,
+    days: int,
+    seed_seq: np.random.SeedSequence,
+    chunk_rows: int | None = None,
+    end: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Genera los agentes [start, stop) en bloques de agentes completos (≈ chunk_rows filas).
+
+    Los parámetros por agente se sortean de una vez y la matriz agentes×días se
+    obtiene con un único ``standard_normal`` por bloque, por lo que el resultado
+    concatenado es idéntico para cualquier ``chunk_rows``.
+    """
+    n_agents = stop - start
+    if days <= 0 or n_agents <= 0:
+        return
+    rng = np.random.default_rng(seed_seq)
+    ids = np.arange(start + 1, stop + 1)
+    agents = np.array([f"AG{str(i).zfill(3)}" for i in ids], dtype=object)
+    teams  = np.array([f"T{(i % 6) + 1}" for i in ids], dtype=object)
+    dates  = pd.date_range(end=_end_date(end), periods=days, freq="D")
+    date_str = np.asarray(dates.strftime("%Y-%m-%d"), dtype=object)
+
+    base_prod  = rng.normal(6.0, 1.0, n_agents)    # horas promedio por día
+    base_cases = rng.normal(18, 4, n_agents)       # casos promedio por día
+    stability  = rng.uniform(0.05, 0.25, n_agents)
+
+    block = n_agents if not chunk_rows else max(1, chunk_rows // days)
+
+    for b in range(0, n_agents, block):
+        sl = slice(b, min(b + block, n_agents))
+        z = rng.standard_normal((sl.stop - sl.start, days, 2))
+        prod  = base_prod[sl, None]
+        cases = base_cases[sl, None]
+        stab  = stability[sl, None]
+
+        hrs = np.maximum(0.0, prod + prod * stab * z[..., 0])
+        cas = np.maximum(0.0, cases + cases * stab * z[..., 1])
+
+        yield pd.DataFrame({
+            "date": np.tile(date_str, sl.stop - sl.start),
+            "agent_id": np.repeat(agents[sl], days),
+            "team_id": np.repeat(teams[sl], days),
+            "productive_hours": np.round(hrs, 2).ravel(),
+            "cases_closed": cas.astype(np.int64).ravel(),
+        }, columns=COLUMNS)
+
+def iter_generate(
+    n_agents: int,
+    days: int,
+    seed: int,
+    chunk_rows: int | None = None,
+    end: str | None = None,
+    shard_agents: int = DEFAULT_SHARD_AGENTS,
+) -> Iterator[pd.DataFrame]:
+    """Recorre todos los shards en orden; misma salida que la generación en paralelo."""
+    end = _end_date(end).date().isoformat()
+    bounds = shard_bounds(n_agents, shard_agents)
+    for (start, stop), ss in zip(bounds, shard_seeds(seed, len(bounds))):
+        yield from iter_shard(start, stop, days, ss, chunk_rows=chunk_rows, end=end)
+
 def generate(n_agents: int, days: int, seed: int) -> pd.DataFrame:
-    rng = np.random.default_rng(seed)
-    agents = [f"AG{str(i).zfill(3)}" for i in range(1, n_agents + 1)]
-    teams  = [f"T{(i % 6) + 1}" for i in range(1, n_agents + 1)]
-    dates  = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq="D")
-
-    rows = []
-    for a, t in zip(agents, teams):
-        base_prod  = rng.normal(6.0, 1.0)   # horas promedio por día
-        base_cases = rng.normal(18, 4)      # casos promedio por día
-        stability  = rng.uniform(0.05, 0.25)
-        for d in dates:
-            hrs   = max(0.0, rng.normal(base_prod,  base_prod  * stability))
-            cases = max(0.0, rng.normal(base_cases, base_cases * stability))
-            rows.append((d.date().isoformat(), a, t, round(float(hrs), 2), int(cases)))
-
-    return pd.DataFrame(
-        rows,
-        columns=["date", "agent_id", "team_id", "productive_hours", "cases_closed"]
+    chunks = list(iter_generate(n_agents, days, seed))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+# --------------------------------------------------------------------
+# Escritura en streaming (memoria acotada por chunk)
+# --------------------------------------------------------------------
+def write_stream(chunks: Iterator[pd.DataFrame], out: Path, fmt: str) -> int:
+    """Escribe los chunks directamente a Parquet/CSV sin materializar la tabla completa."""
+    n_rows = 0
+    writer: pq.ParquetWriter | None = None
+    try:
+        for chunk in chunks:
+            if fmt == "csv":
+                chunk.to_csv(out, index=False, mode="w" if n_rows == 0 else "a", header=n_rows == 0)
+            else:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out, table.schema)
+                writer.write_table(table)
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+def write_partitioned(
+    chunks: Iterator[pd.DataFrame],
+    root: Path,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    sort_by: list[str] | None = None,
+    basename_template: str = "part-{i}.parquet",
+    overwrite: bool = True,
+) -> int:
+    """Escribe los chunks como dataset Hive iso_year/iso_week/team_id (layout lakehouse)."""
+    return write_dataset(
+        (with_iso_columns(c) for c in chunks),
+        root,
+        row_group_size=row_group_size,
+        compression=compression,
+        sort_by=sort_by,
+        basename_template=basename_template,
+        overwrite=overwrite,
+    )
+
+def _write_shard(task: dict) -> int:
+    """Worker: genera un shard y lo escribe con su propio part file."""
+    chunks = iter_shard(
+        task["start"], task["stop"], task["days"], task["seed_seq"],
+        chunk_rows=task["chunk_rows"], end=task["end"],
     )
+    outdir = Path(task["outdir"])
+    if task["layout"] == "partitioned":
+        return write_partitioned(
+            chunks, outdir,
+            basename_template=f"part-{task['idx']:05d}-{{i}}.parquet",
+            overwrite=False,
+            **task["dataset_opts"],
+        )
+    return write_stream(chunks, outdir / f"part-{task['idx']:05d}.parquet", "parquet")
+
+def write_sharded(
+    n_agents: int,
+    days: int,
+    seed: int,
+    outdir: Path,
+    workers: int,
+    chunk_rows: int | None = None,
+    shard_agents: int = DEFAULT_SHARD_AGENTS,
+    end: str | None = None,
+    layout: str = "file",
+    dataset_opts: dict | None = None,
+) -> int:
+    """
+    Genera los shards en un pool de procesos; cada worker escribe ``part-NNNNN*.parquet``
+    (plano o dentro de las particiones Hive si ``layout="partitioned"``).
+    El contenido es idéntico al de ``iter_generate`` con la misma semilla, sea cual sea ``workers``.
+    """
+    if outdir.exists():
+        shutil.rmtree(outdir)
+    outdir.mkdir(parents=True)
+
+    end = _end_date(end).date().isoformat()
+    bounds = shard_bounds(n_agents, shard_agents)
+    tasks = [
+        dict(idx=i, start=start, stop=stop, days=days, seed_seq=ss, chunk_rows=chunk_rows,
+             end=end, outdir=str(outdir), layout=layout, dataset_opts=dataset_opts or {})
+        for i, ((start, stop), ss) in enumerate(zip(bounds, shard_seeds(seed, len(bounds))))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_write_shard, tasks))
 
 # --------------------------------------------------------------------
 # Main CLI handler
 # --------------------------------------------------------------------
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate synthetic ops data for Athera/Fabric pipeline")
-    parser.add_argument("--agents", type=int, default=DEFAULT_AGENTS, help="Number of agents")
-    parser.add_argument("--days",   type=int, default=DEFAULT_DAYS,   help="Number of days to simulate")
-    parser.add_argument("--seed",   type=int, default=DEFAULT_SEED,   help="Random seed")
-    parser.add_argument("--format", choices=["parquet", "csv"], default=DEFAULT_FORMAT, help="Output format")
-    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR, help="Output directory path")
-    args = parser.parse_args()
-
-    df = generate(args.agents, args.days, args.seed)
+# Salidas posibles en outdir: archivo único (Parquet/CSV) o directorio de part files / dataset Hive
+RAW_OUTPUTS = ("ops_daily.parquet", "ops_daily.csv", "ops_daily")
+
+def remove_stale_outputs(outdir: Path, keep: Path) -> None:
+    """Borra las salidas de otro layout/formato: ``raw_source`` prefiere el archivo único y lo leería."""
+    for name in RAW_OUTPUTS:
+        stale = Path(outdir) / name
+        if stale == keep:
+            continue
+        if stale.is_dir():
+            shutil.rmtree(stale)
+        elif stale.exists():
+            stale.unlink()
+
+def cache_dir(outdir: Path) -> Path:
+    """
+    Caché de etapas de ``--cache``: ``STAGE_CACHE_DIR`` si está definida; si ``outdir`` es
+    ``<lakehouse>/Files/raw``, la de ese lakehouse (``<lakehouse>/.cache``, la misma que usa
+    kpi); si no, ``<outdir>/.cache``.
+    """
+    if os.getenv("STAGE_CACHE_DIR"):
+        return Path(os.environ["STAGE_CACHE_DIR"])
+    outdir = Path(outdir)
+    if outdir.parts[-2:] == ("Files", "raw"):
+        return outdir.parent.parent / ".cache"
+    return outdir / ".cache"
+
+def main(argv: list[str] | None = None) -> None:
+    load_dotenv()  # .env solo al ejecutar el CLI: importar el módulo no toca el entorno
+    parser = generate_parser()
+    args = parser.parse_args(argv)
+
+    if (args.workers > 1 or args.layout == "partitioned") and args.format != "parquet":
+        parser.error("--workers > 1 and --layout partitioned require --format parquet")
+
     args.outdir.mkdir(parents=True, exist_ok=True)
+    dataset_opts = dict(
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        sort_by=[c for c in args.sort_by.split(",") if c],
+    )
 
-    if args.format == "csv":
-        out = args.outdir / "ops_daily.csv"
-        df.to_csv(out, index=False)
+    if args.workers > 1 or args.layout == "partitioned":
+        out = args.outdir / "ops_daily"
     else:
-        out = args.outdir / "ops_daily.parquet"
-        df.to_parquet(out, index=False)
+        out = args.outdir / ("ops_daily.csv" if args.format == "csv" else "ops_daily.parquet")
+    remove_stale_outputs(args.outdir, out)
+
+    def produce() -> int:
+        if args.workers > 1:
+            return write_sharded(
+                args.agents, args.days, args.seed, out, args.workers,
+                chunk_rows=args.chunk_rows, shard_agents=args.shard_agents,
+                layout=args.layout, dataset_opts=dataset_opts,
+            )
+        chunks = iter_generate(args.agents, args.days, args.seed,
+                               chunk_rows=args.chunk_rows, shard_agents=args.shard_agents)
+        if args.layout == "partitioned":
+            return write_partitioned(chunks, out, **dataset_opts)
+        return write_stream(chunks, out, args.format)
 
-    print(f"✅ Generated {len(df):,} rows → {out}")
+    if args.cache:
+        # La fecha final (hoy) forma parte de los datos generados → entra en la clave.
+        # --workers no cambia el contenido (shards con semilla propia): fuera de la clave;
+        # sí entra el nombre de la salida (archivo único vs directorio de part files).
+        params = {k: v for k, v in vars(args).items() if k not in ("cache", "workers")}
+        params["end"] = _end_date(None).date().isoformat()
+        params["output"] = out.name
+        if StageCache(cache_dir(args.outdir)).run("generate", [out], produce, params=params):
+            print(f"♻️  Cache hit → {out}")
+            return
+        print(f"✅ Generated → {out} (cached)")
+    else:
+        n_rows = produce()
+        print(f"✅ Generated {n_rows:,} rows → {out}")
 
 # --------------------------------------------------------------------
 # Entry point
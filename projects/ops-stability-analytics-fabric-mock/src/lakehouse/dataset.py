@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Lakehouse dataset I/O
+Escritura Parquet particionada estilo Hive (iso_year / iso_week / team_id)
+y lectura con poda de particiones para Files/raw y Tables.
+"""
+from __future__ import annotations
+
+import numbers
+import shutil
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from ..config import DEFAULT_COMPRESSION, DEFAULT_ROW_GROUP_SIZE
+
+__all__ = [
+    "PARTITION_COLS",
+    "with_iso_columns",
+    "write_dataset",
+    "read_dataset",
+]
+
+PARTITION_COLS = ["iso_year", "iso_week", "team_id"]
+
+
+# -----------------------------
+# Utilidades
+# -----------------------------
+def with_iso_columns(df: pd.DataFrame, date_col: str = "date") -> pd.DataFrame:
+    """Añade iso_year/iso_week (int) derivados de ``date_col`` si aún no existen."""
+    if {"iso_year", "iso_week"}.issubset(df.columns):
+        return df
+    iso = pd.to_datetime(df[date_col]).dt.isocalendar()
+    return df.assign(iso_year=iso.year.astype(int).to_numpy(), iso_week=iso.week.astype(int).to_numpy())
+
+def _to_table(df: pd.DataFrame | pa.Table, sort_by: Sequence[str] | None) -> pa.Table:
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+    if sort_by:
+        # sort_by no admite diccionarios (IDs categóricos con --compact): se ordena por los valores
+        keys = pa.table({
+            c: table[c].cast(table[c].type.value_type) if pa.types.is_dictionary(table[c].type) else table[c]
+            for c in sort_by
+        })
+        table = table.take(pc.sort_indices(keys, sort_keys=[(c, "ascending") for c in sort_by]))
+    return table
+
+# -----------------------------
+# Escritura
+# -----------------------------
+def write_dataset(
+    data: pd.DataFrame | pa.Table | Iterable[pd.DataFrame],
+    root: Path,
+    partition_cols: Sequence[str] = PARTITION_COLS,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    sort_by: Sequence[str] | None = None,
+    basename_template: str = "part-{i}.parquet",
+    overwrite: bool = True,
+) -> int:
+    """
+    Escribe un DataFrame o tabla Arrow (o un iterable de chunks) como dataset Hive bajo ``root``.
+
+    - ``partition_cols``: columnas de partición (``col=valor/`` en la ruta).
+    - ``row_group_size``: máximo de filas por row group.
+    - ``sort_by``: orden aplicado a cada chunk antes de escribir (mejora min/max por row group).
+    - ``overwrite``: elimina ``root`` antes de escribir; con False añade archivos
+      (útil para varios workers con ``basename_template`` distintos).
+    Devuelve el número de filas escritas.
+    """
+    root = Path(root)
+    if overwrite and root.exists():
+        shutil.rmtree(root)
+
+    chunks = [data] if isinstance(data, (pd.DataFrame, pa.Table)) else data
+    tables = (_to_table(c, sort_by) for c in chunks)
+
+    first = next(tables, None)
+    if first is None:
+        return 0
+
+    n_rows = 0
+    def _batches():
+        nonlocal n_rows
+        for t in (first, *tables):
+            n_rows += t.num_rows
+            yield from t.to_batches()
+
+    part_schema = pa.schema([first.schema.field(c) for c in partition_cols])
+    ds.write_dataset(
+        _batches(),
+        root,
+        schema=first.schema,
+        format="parquet",
+        partitioning=ds.partitioning(part_schema, flavor="hive"),
+        basename_template=basename_template,
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compression),
+        max_rows_per_group=row_group_size,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return n_rows
+
+# -----------------------------
+# Lectura con poda de particiones
+# -----------------------------
+def read_dataset(
+    root: Path,
+    columns: Sequence[str] | None = None,
+    team_id: str | Sequence[str] | None = None,
+    iso_year: int | None = None,
+    iso_week: int | Sequence[int] | None = None,
+) -> pd.DataFrame:
+    """
+    Lee un dataset Hive aplicando filtros sobre las columnas de partición,
+    de modo que solo se abren los archivos de los equipos/semanas pedidos.
+    """
+    dataset = ds.dataset(Path(root), format="parquet", partitioning="hive")
+    names = set(dataset.schema.names)
+
+    expr = None
+    for col, value in (("team_id", team_id), ("iso_year", iso_year), ("iso_week", iso_week)):
+        if value is None or col not in names:
+            continue
+        scalar = isinstance(value, (str, numbers.Integral))  # numbers.Integral incluye np.integer
+        values = [value] if scalar else list(value)
+        cond = ds.field(col).isin(values)
+        expr = cond if expr is None else expr & cond
+
+    df = dataset.to_table(columns=list(columns) if columns else None, filter=expr).to_pandas()
+    # Las particiones se infieren como int32/dictionary; se normaliza al contrato de la capa
+    for col in ("iso_year", "iso_week"):
+        if col in df.columns:
+            df[col] = df[col].astype("int64")
+    if "team_id" in df.columns and isinstance(df["team_id"].dtype, pd.CategoricalDtype):
+        df["team_id"] = df["team_id"].astype(str)
+    return df
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Validación de salidas Parquet desde el footer
+Comprueba columnas y tipos con el esquema del footer, filas con los metadatos y los
+flags binarios (``out_*_flag`` ∈ {0,1}) con min/max/null_count de cada row group,
+sin leer datos. Solo si las estadísticas no bastan (faltan, o la columna es float y
+[0, 1] admite 0.5) se leen esos row groups de esa columna, hasta ``sample_rows``.
+Acepta un archivo o un dataset Hive (directorio); en datasets las columnas de
+partición salen de la ruta.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+__all__ = [
+    "TABLE_SCHEMAS",
+    "BINARY_COLUMNS",
+    "ValidationReport",
+    "validate_parquet",
+    "validate_table",
+]
+
+# Contrato por tabla: columna → clase de tipo (ver _KIND_CHECKS)
+TABLE_SCHEMAS: dict[str, dict[str, str]] = {
+    "ops_daily": {
+        "date": "date", "agent_id": "string", "team_id": "string",
+        "productive_hours": "number", "cases_closed": "integer",
+    },
+    "agent_stability": {
+        "agent_id": "string", "team_id": "string",
+        "cv_hours": "number", "cvm_hours": "number", "cv_cases": "number", "cvm_cases": "number",
+        "quartile_efficiency": "integer",
+    },
+    "weekly_flags": {
+        "agent_id": "string", "team_id": "string", "iso_year": "integer", "iso_week": "integer",
+        "hours_mean": "number", "cases_mean": "number",
+        "out_hours_flag": "integer", "out_cases_flag": "integer",
+    },
+    "rolling_stability": {
+        "agent_id": "string", "team_id": "string", "iso_year": "integer", "iso_week": "integer",
+        "window_weeks": "integer", "n_weeks": "integer",
+        "cv_hours": "number", "cvm_hours": "number", "cv_cases": "number", "cvm_cases": "number",
+        "quartile_efficiency": "integer",
+    },
+}
+BINARY_COLUMNS: dict[str, tuple[str, ...]] = {"weekly_flags": ("out_hours_flag", "out_cases_flag")}
+
+DEFAULT_SAMPLE_ROWS = 100_000
+
+def _is_string(t: pa.DataType) -> bool:
+    if pa.types.is_dictionary(t):  # categóricas (--compact) → diccionario de strings
+        t = t.value_type
+    return pa.types.is_string(t) or pa.types.is_large_string(t)
+
+def _is_integer(t: pa.DataType) -> bool:
+    return pa.types.is_integer(t) or pa.types.is_boolean(t)
+
+_KIND_CHECKS = {
+    "string": _is_string,
+    "integer": _is_integer,
+    "number": lambda t: _is_integer(t) or pa.types.is_floating(t),
+    "date": lambda t: _is_string(t) or pa.types.is_date(t) or pa.types.is_timestamp(t),
+}
+
+@dataclass
+class ValidationReport:
+    path: Path
+    num_rows: int = 0
+    errors: list[str] = field(default_factory=list)
+    sampled: list[str] = field(default_factory=list)  # columnas resueltas con lectura muestreada
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+# -----------------------------
+# Footer / estadísticas
+# -----------------------------
+def _files(path: Path) -> list[Path]:
+    return sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+
+def _schema(path: Path) -> pa.Schema:
+    """Esquema del footer (más columnas de partición Hive si es un dataset)."""
+    if path.is_dir():
+        return ds.dataset(path, format="parquet", partitioning="hive").schema
+    return pq.read_schema(path)
+
+def _binary_from_stats(meta: pq.FileMetaData, col: str, exact: bool) -> tuple[bool | None, list[int]]:
+    """
+    ``(veredicto, row groups sin resolver)``: False si min/max caen fuera de [0, 1];
+    True si todos los row groups lo prueban (enteros, o solo nulos); None si no basta.
+    """
+    idx = meta.schema.to_arrow_schema().get_field_index(col)
+    pending = []
+    for i in range(meta.num_row_groups):
+        rg = meta.row_group(i)
+        stats = rg.column(idx).statistics
+        if stats is None:
+            pending.append(i)
+        elif stats.has_min_max:
+            if stats.min < 0 or stats.max > 1:
+                return False, []
+            if not exact:  # float en [0, 1]: 0.5 también cabe
+                pending.append(i)
+        elif not (stats.has_null_count and stats.null_count == rg.num_rows):
+            pending.append(i)
+    return (None if pending else True), pending
+
+def _sampled_values(path: Path, col: str, row_groups: list[int], sample_rows: int | None) -> set:
+    """Valores distintos (sin nulos) de ``col`` en ``row_groups``, hasta ``sample_rows`` filas."""
+    seen, n = set(), 0
+    for batch in pq.ParquetFile(path).iter_batches(columns=[col], row_groups=row_groups):
+        seen.update(pc.unique(batch.column(0)).drop_null().to_pylist())
+        n += batch.num_rows
+        if sample_rows is not None and n >= sample_rows:
+            break
+    return seen
+
+# -----------------------------
+# API
+# -----------------------------
+def validate_parquet(
+    path: Path,
+    columns: Mapping[str, str],
+    binary: Sequence[str] = (),
+    sample_rows: int | None = DEFAULT_SAMPLE_ROWS,
+    allow_empty: bool = False,
+) -> ValidationReport:
+    """
+    Valida ``path`` (archivo o dataset) contra ``columns`` {columna: clase de tipo}
+    y comprueba que las columnas ``binary`` solo tengan 0/1 (o nulos).
+    ``sample_rows=None`` lee completos los row groups no resueltos por estadísticas.
+    """
+    path = Path(path)
+    report = ValidationReport(path)
+    if not path.exists() or (path.is_dir() and not _files(path)):
+        report.errors.append(f"{path}: no existe")
+        return report
+
+    schema = _schema(path)
+    for col, kind in columns.items():
+        if col not in schema.names:
+            report.errors.append(f"{path.name}: falta columna {col}")
+        elif not _KIND_CHECKS[kind](schema.field(col).type):
+            report.errors.append(f"{path.name}: {col} es {schema.field(col).type}, se esperaba {kind}")
+
+    metas = [(f, pq.read_metadata(f)) for f in _files(path)]
+    report.num_rows = sum(m.num_rows for _, m in metas)
+    if not report.num_rows and not allow_empty:
+        report.errors.append(f"{path.name}: vacío (0 filas)")
+
+    for col in binary:
+        if col not in schema.names:
+            continue
+        exact = _is_integer(schema.field(col).type)
+        for f, meta in metas:
+            verdict, pending = _binary_from_stats(meta, col, exact)
+            if verdict is None:
+                if col not in report.sampled:
+                    report.sampled.append(col)
+                values = _sampled_values(f, col, pending, sample_rows)
+                verdict = set(values).issubset({0, 1})
+            if not verdict:
+                report.errors.append(f"{path.name}: {col} contiene valores no binarios")
+                break
+    return report
+
+def validate_table(path: Path, name: str | None = None, **kwargs) -> ValidationReport:
+    """``validate_parquet`` con el contrato de ``TABLE_SCHEMAS[name]`` (por defecto, el nombre del archivo)."""
+    path = Path(path)
+    name = name or path.name.removesuffix(".parquet")
+    return validate_parquet(path, TABLE_SCHEMAS[name], BINARY_COLUMNS.get(name, ()), **kwargs)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de etapas direccionada por contenido
+Clave = hash(archivos de entrada + parámetros + versión del código). Si la clave
+ya existe se restauran las salidas guardadas en ``lakehouse_sim/.cache`` en lugar
+de recalcular. Cada salida se guarda con su ruta relativa al directorio de salida
+común, así dos salidas con el mismo nombre no chocan. Manifest JSON + expulsión
+LRU por tamaño total.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+__all__ = [
+    "DEFAULT_CACHE_DIR",
+    "file_digest",
+    "code_version",
+    "StageCache",
+]
+
+DEFAULT_CACHE_DIR = Path("lakehouse_sim") / ".cache"
+DEFAULT_MAX_BYTES = int(os.getenv("STAGE_CACHE_MAX_MB", 2048)) * 2**20
+
+SRC_ROOT = Path(__file__).resolve().parents[1]
+
+# -----------------------------
+# Huellas
+# -----------------------------
+def file_digest(path: Path, chunk: int = 2**20) -> str:
+    """SHA-256 del contenido de un archivo, o de todos los archivos de un directorio (ordenados)."""
+    path = Path(path)
+    h = hashlib.sha256()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for f in files:
+        h.update(str(f.relative_to(path) if path.is_dir() else f.name).encode())
+        with open(f, "rb") as fh:
+            while block := fh.read(chunk):
+                h.update(block)
+    return h.hexdigest()
+
+def code_version(root: Path = SRC_ROOT) -> str:
+    """Hash de todo el código fuente del paquete: cualquier cambio invalida la caché."""
+    h = hashlib.sha256()
+    for f in sorted(root.rglob("*.py")):
+        h.update(f.relative_to(root).as_posix().encode())
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+def _object_names(outputs: Sequence[Path]) -> list[str]:
+    """Nombre de cada salida dentro del objeto: ruta relativa al directorio común de las salidas."""
+    paths = [Path(o).resolve() for o in outputs]
+    if not paths:
+        return []
+    base = Path(os.path.commonpath([p.parent for p in paths]))
+    return [p.relative_to(base).as_posix() for p in paths]
+
+def _copy(src: Path, dst: Path) -> None:
+    if dst.exists():
+        shutil.rmtree(dst) if dst.is_dir() else dst.unlink()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+# -----------------------------
+# Caché
+# -----------------------------
+class StageCache:
+    """
+    Almacén ``<root>/objects/<clave>/<salida>`` con ``<root>/manifest.json``::
+
+        {"<clave>": {"stage": ..., "outputs": [...], "size": bytes,
+                     "created": ts, "last_used": ts}}
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.manifest_path = self.root / "manifest.json"
+
+    # -- manifest ----------------------------------------------------
+    def _load(self) -> dict:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {}
+
+    def _save(self, manifest: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        tmp.replace(self.manifest_path)
+
+    # -- API ---------------------------------------------------------
+    def key(self, stage: str, inputs: Sequence[Path] = (), params: dict | None = None) -> str:
+        """Clave de la etapa: nombre + huellas de entradas + parámetros + versión de código."""
+        missing = [str(p) for p in inputs if not Path(p).exists()]
+        if missing:
+            raise FileNotFoundError(f"Entrada(s) de la etapa '{stage}' no encontrada(s): {', '.join(missing)}")
+        payload = {
+            "stage": stage,
+            "inputs": {str(p): file_digest(p) for p in inputs},
+            "params": params or {},
+            "code": code_version(),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def restore(self, key: str, outputs: Sequence[Path]) -> bool:
+        """Copia las salidas guardadas a sus rutas; False si la clave no está (o está incompleta)."""
+        manifest = self._load()
+        entry = manifest.get(key)
+        obj = self.root / "objects" / key
+        names = _object_names(outputs)
+        if entry is None or not all((obj / name).exists() for name in names):
+            return False
+        for o, name in zip(outputs, names):
+            _copy(obj / name, Path(o))
+        entry["last_used"] = time.time()
+        self._save(manifest)
+        return True
+
+    def store(self, key: str, stage: str, outputs: Sequence[Path]) -> None:
+        """Guarda las salidas bajo la clave y expulsa entradas LRU si se supera ``max_bytes``."""
+        obj = self.root / "objects" / key
+        for o, name in zip(outputs, _object_names(outputs)):
+            _copy(Path(o), obj / name)
+        manifest = self._load()
+        now = time.time()
+        manifest[key] = {
+            "stage": stage,
+            "outputs": [str(o) for o in outputs],
+            "size": _size(obj),
+            "created": now,
+            "last_used": now,
+        }
+        self._save(self._evict(manifest, keep=key))
+
+    def _evict(self, manifest: dict, keep: str) -> dict:
+        total = sum(e["size"] for e in manifest.values())
+        for key, entry in sorted(manifest.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.root / "objects" / key, ignore_errors=True)
+            total -= entry["size"]
+            del manifest[key]
+        return manifest
+
+    def run(
+        self,
+        stage: str,
+        outputs: Sequence[Path],
+        compute: Callable[[], object],
+        inputs: Sequence[Path] = (),
+        params: dict | None = None,
+    ) -> bool:
+        """Restaura ``outputs`` si la etapa ya se calculó; si no, ejecuta ``compute`` y guarda (True en hit)."""
+        key = self.key(stage, inputs, params)
+        if self.restore(key, outputs):
+            return True
+        compute()
+        self.store(key, stage, outputs)
+        return False
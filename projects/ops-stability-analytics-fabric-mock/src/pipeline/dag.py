@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Runner de pipelines como grafo de etapas (DAG)
+Cada ``Node`` declara sus dependencias (``deps``), los archivos que escribe
+(``outputs``) y, opcionalmente, cómo reconstruir su valor desde esos archivos
+(``load``). Los nodos independientes corren en paralelo en un pool de hilos o de
+procesos; el valor de un nodo se libera en cuanto terminan todos sus consumidores.
+
+Con ``state_dir`` cada nodo terminado se registra en ``dag_state.json``:
+
+    pipe = Pipeline("kpi", nodes, state_dir=lh / "Files" / "state" / "dag", params=params)
+    pipe.run()                         # corrida completa
+    pipe.run(resume=True)              # tras un fallo: salta los nodos ya completados
+    pipe.run(rerun=["flags"])          # repite "flags" y todo lo que depende de él
+
+Un nodo completado se reutiliza si sus ``outputs`` siguen en disco y los
+``params`` no cambiaron; si un nodo a ejecutar necesita su valor y no tiene
+``load``, se vuelve a ejecutar también.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+from .instrument import Instrument, StageRecord
+
+__all__ = [
+    "STATE_NAME",
+    "Node",
+    "PipelineError",
+    "Pipeline",
+]
+
+STATE_NAME = "dag_state.json"
+EXECUTORS = ("thread", "process")
+
+@dataclass(frozen=True)
+class Node:
+    """Etapa del grafo: ``fn(*valores de deps)``; ``outputs``/``load`` habilitan la reanudación."""
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+    outputs: tuple[Path, ...] = ()
+    load: Callable[[], Any] | None = None
+
+class PipelineError(RuntimeError):
+    """Falló una etapa; ``node`` es su nombre y ``__cause__`` la excepción original."""
+
+    def __init__(self, node: str, exc: BaseException) -> None:
+        super().__init__(f"stage '{node}' failed: {type(exc).__name__}: {exc}")
+        self.node = node
+
+def _params_key(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class Pipeline:
+    def __init__(
+        self,
+        name: str,
+        nodes: Sequence[Node],
+        state_dir: Path | None = None,
+        params: dict | None = None,
+        workers: int = 4,
+        executor: str = "thread",
+        inst: Instrument | None = None,
+    ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}, got {executor!r}")
+        self.name = name
+        self.nodes = {n.name: n for n in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("duplicate node names")
+        for n in nodes:
+            missing = [d for d in n.deps if d not in self.nodes]
+            if missing:
+                raise ValueError(f"node '{n.name}' depends on unknown {missing}")
+        self.order = self._toposort()
+        self.state_path = Path(state_dir) / f"{name}.{STATE_NAME}" if state_dir else None
+        self.params_key = _params_key(params or {})
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.inst = inst or Instrument(name)
+
+    # -----------------------------
+    # Grafo
+    # -----------------------------
+    def _toposort(self) -> list[str]:
+        """Orden topológico estable (orden de declaración entre nodos listos); falla si hay ciclos."""
+        indeg = {name: len(n.deps) for name, n in self.nodes.items()}
+        order, ready = [], [name for name in self.nodes if indeg[name] == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other in self.dependents(name):
+                indeg[other] -= 1
+                if indeg[other] == 0:
+                    ready.append(other)
+        if len(order) != len(self.nodes):
+            raise ValueError(f"cycle among {sorted(set(self.nodes) - set(order))}")
+        return order
+
+    def dependents(self, name: str) -> list[str]:
+        return [n.name for n in self.nodes.values() if name in n.deps]
+
+    def downstream(self, names: Iterable[str]) -> set[str]:
+        """``names`` y todos los nodos que dependen de ellos (transitivamente)."""
+        out, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise ValueError(f"unknown node '{name}'")
+            if name not in out:
+                out.add(name)
+                stack.extend(self.dependents(name))
+        return out
+
+    # -----------------------------
+    # Estado persistido
+    # -----------------------------
+    def load_state(self) -> dict[str, dict]:
+        """Nodos completados en corridas previas con los mismos ``params`` (vacío si cambiaron)."""
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        state = json.loads(self.state_path.read_text())
+        return state["nodes"] if state.get("params_key") == self.params_key else {}
+
+    def _save_state(self, done: dict[str, dict]) -> None:
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"pipeline": self.name, "params_key": self.params_key, "nodes": done}, indent=2))
+        tmp.replace(self.state_path)
+
+    def plan(self, resume: bool = False, rerun: Iterable[str] = ()) -> list[str]:
+        """Nodos a ejecutar (en orden topológico) dados el estado previo, ``resume`` y ``rerun``."""
+        done = self.load_state() if resume or rerun else {}
+        forced = self.downstream(rerun)
+        todo = {
+            name for name in self.nodes
+            if name in forced or name not in done
+            or not all(Path(p).exists() for p in self.nodes[name].outputs)
+        }
+        # Un nodo reutilizado sin load() no puede entregar su valor: se ejecuta de nuevo
+        changed = True
+        while changed:
+            changed = False
+            for name in list(todo):
+                for dep in self.nodes[name].deps:
+                    if dep not in todo and self.nodes[dep].load is None:
+                        todo.add(dep)
+                        changed = True
+        return [name for name in self.order if name in todo]
+
+    # -----------------------------
+    # Ejecución
+    # -----------------------------
+    def _pool(self) -> Executor:
+        cls = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+        return cls(max_workers=self.workers)
+
+    def _execute(self, node: Node, args: list) -> Any:
+        """Ejecuta un nodo dentro de su etapa de ``inst`` (pool de hilos; con ``workers > 1``, medidas de proceso)."""
+        rows_in = [_rows(a) for a in args]
+        with self.inst.stage(node.name, rows_in=sum(rows_in) if args and None not in rows_in else None,
+                             concurrent=self.workers > 1) as st:
+            out = node.fn(*args)
+            st.rows_out = _rows(out)
+            for p in node.outputs:
+                st.output(p)
+        return out
+
+    def _record(self, node: Node, wall: float, out: Any) -> None:
+        """Etapa registrada desde el proceso padre (pool de procesos: solo wall time y salidas)."""
+        if not self.inst.enabled:
+            return
+        rec = StageRecord(node.name, rows_out=_rows(out), wall_s=round(wall, 6))
+        for p in node.outputs:
+            rec.output(p)
+        self.inst.stages.append(rec)
+
+    def run(self, resume: bool = False, rerun: Iterable[str] = ()) -> dict[str, Any]:
+        """
+        Ejecuta el plan con hasta ``workers`` nodos a la vez. Devuelve los valores de los
+        sumideros ejecutados (nodos sin consumidores). Ante un fallo no lanza nodos nuevos,
+        espera a los que están en curso, guarda el estado y lanza ``PipelineError``.
+        """
+        rerun = list(rerun)
+        reuse = resume or bool(rerun)
+        todo = self.plan(resume=resume, rerun=rerun)
+        done = {k: v for k, v in self.load_state().items() if k not in todo} if reuse else {}
+        self._save_state(done)
+
+        # Consumidores pendientes de cada valor: se libera al llegar a 0
+        consumers = {name: sum(1 for d in self.dependents(name) if d in todo) for name in self.nodes}
+        values: dict[str, Any] = {}
+        results: dict[str, Any] = {}
+        pending = list(todo)
+        running: dict[Future, tuple[str, float]] = {}
+        failed: tuple[str, BaseException] | None = None
+
+        def value(dep: str) -> Any:
+            if dep not in values:  # completado en una corrida previa
+                values[dep] = self.nodes[dep].load()
+            return values[dep]
+
+        with self._pool() as pool:
+            while running or (pending and failed is None):
+                busy = {name for name, _ in running.values()}
+                ready = [n for n in pending if not any(d in pending or d in busy for d in self.nodes[n].deps)]
+                for name in ready[: self.workers - len(running)] if failed is None else []:
+                    node = self.nodes[name]
+                    args = [value(d) for d in node.deps]
+                    pending.remove(name)
+                    fut = (pool.submit(self._execute, node, args) if self.executor == "thread"
+                           else pool.submit(node.fn, *args))
+                    running[fut] = (name, time.perf_counter())
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name, t0 = running.pop(fut)
+                    wall = time.perf_counter() - t0
+                    node = self.nodes[name]
+                    if fut.exception() is not None:
+                        failed = failed or (name, fut.exception())
+                        continue
+                    out = fut.result()
+                    if self.executor == "process":
+                        self._record(node, wall, out)
+                    if consumers[name]:
+                        values[name] = out
+                    elif not self.dependents(name):
+                        results[name] = out
+                    done[name] = {
+                        "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        "wall_s": round(wall, 6),
+                        "outputs": [str(p) for p in node.outputs],
+                    }
+                    self._save_state(done)
+                    for dep in node.deps:
+                        consumers[dep] -= 1
+                        if consumers[dep] <= 0:
+                            values.pop(dep, None)
+        if failed is not None:
+            raise PipelineError(*failed) from failed[1]
+        return results
+
+def _rows(value: Any) -> int | None:
+    try:
+        return len(value)
+    except TypeError:
+        return value if isinstance(value, int) else None
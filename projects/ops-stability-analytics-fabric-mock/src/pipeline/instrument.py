@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentación por etapa + manifest JSON de la corrida
+Opt-in con ``PIPELINE_INSTRUMENT=1``. Cada etapa registra wall/CPU time, filas
+de entrada/salida, bytes escritos y pico de memoria; al final se escribe
+``run_manifest.json`` junto a las salidas.
+
+Hooks opcionales (``PIPELINE_PROFILE=cprofile,tracemalloc``; activan la instrumentación):
+- ``cprofile``: un ``<etapa>.prof`` por etapa en ``profiles/`` junto al manifest.
+- ``tracemalloc``: pico de memoria Python por etapa y principales sitios de asignación.
+RSS, CPU y tracemalloc son del proceso: una etapa con ``concurrent=True`` (otras
+etapas corren a la vez en hilos) no reinicia los picos y se etiqueta ``"process"``.
+Desactivada, ``stage()`` es un contexto vacío (sin medir ni escribir nada).
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage
+    resource = None
+
+__all__ = [
+    "MANIFEST_NAME",
+    "StageRecord",
+    "Instrument",
+    "instrument_from_env",
+]
+
+MANIFEST_NAME = "run_manifest.json"
+PROFILE_HOOKS = ("cprofile", "tracemalloc")
+
+# -----------------------------
+# Medidas de proceso
+# -----------------------------
+def _reset_peak_rss() -> bool:
+    """Reinicia el high-water mark de RSS (Linux); False si no es posible."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb() -> float | None:
+    """Pico de RSS del proceso: VmHWM de /proc, si no ``getrusage``; None si no hay ninguno."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 1024)
+
+def _size(path: Path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+# -----------------------------
+# Registro por etapa
+# -----------------------------
+@dataclass
+class StageRecord:
+    name: str
+    rows_in: int | None = None
+    rows_out: int | None = None
+    bytes_written: int = 0
+    outputs: list[str] = field(default_factory=list)
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float | None = None
+    peak_rss_scope: str = "stage"          # "process" si no se pudo reiniciar el HWM o hubo etapas concurrentes
+    cpu_scope: str = "stage"               # "process": cpu_s incluye las etapas concurrentes
+    peak_traced_mb: float | None = None
+    top_allocations: list[str] = field(default_factory=list)
+    profile: str | None = None
+
+    def output(self, path: Path) -> None:
+        """Suma el tamaño en disco de ``path`` (archivo o dataset) a ``bytes_written``."""
+        self.outputs.append(str(path))
+        self.bytes_written += _size(path)
+
+class Instrument:
+    """
+    Colector de etapas de una corrida::
+
+        inst = instrument_from_env("kpi")
+        with inst.stage("read") as st:
+            raw = load_raw(...)
+            st.rows_out = len(raw)
+        inst.write_manifest(out_dir)
+    """
+
+    def __init__(self, run: str, enabled: bool = False, hooks: tuple[str, ...] = ()) -> None:
+        self.run = run
+        self.hooks = tuple(h for h in hooks if h in PROFILE_HOOKS)
+        self.enabled = enabled or bool(self.hooks)
+        self.stages: list[StageRecord] = []
+        self.params: dict = {}
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._own_tracing = "tracemalloc" in self.hooks and not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None, concurrent: bool = False) -> Iterator[StageRecord]:
+        """``concurrent``: la etapa comparte el proceso con otras en curso (picos y CPU de proceso)."""
+        rec = StageRecord(name, rows_in=rows_in)
+        if not self.enabled:
+            yield rec
+            return
+
+        if concurrent:
+            rec.peak_rss_scope = rec.cpu_scope = "process"  # reiniciar el HWM falsearía el pico de las otras
+        elif not _reset_peak_rss():
+            rec.peak_rss_scope = "process"
+        if "tracemalloc" in self.hooks:
+            if not concurrent:
+                tracemalloc.reset_peak()
+            snap0 = tracemalloc.take_snapshot()
+        prof = cProfile.Profile() if "cprofile" in self.hooks else None
+        t0, c0 = time.perf_counter(), time.process_time()
+        if prof:
+            prof.enable()
+        try:
+            yield rec
+        finally:
+            if prof:
+                prof.disable()
+                self._profiles[name] = prof
+            rec.wall_s = round(time.perf_counter() - t0, 6)
+            rec.cpu_s = round(time.process_time() - c0, 6)
+            peak = _peak_rss_mb()
+            rec.peak_rss_mb = None if peak is None else round(peak, 1)
+            if "tracemalloc" in self.hooks:
+                rec.peak_traced_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                diff = tracemalloc.take_snapshot().compare_to(snap0, "lineno")[:5]
+                rec.top_allocations = [str(d) for d in diff]
+            self.stages.append(rec)
+
+    def write_manifest(self, out_dir: Path, name: str = MANIFEST_NAME) -> Path | None:
+        """
+        Escribe el manifest (y los ``.prof``) en ``out_dir``; None si está desactivada.
+        Cierra la corrida: detiene tracemalloc si lo inició esta instancia.
+        """
+        if not self.enabled:
+            return None
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for stage, prof in self._profiles.items():
+            path = out_dir / "profiles" / f"{self.run}.{stage}.prof"
+            path.parent.mkdir(exist_ok=True)
+            prof.dump_stats(path)
+            next(r for r in self.stages if r.name == stage).profile = str(path)
+
+        manifest = {
+            "run": self.run,
+            "started": self._started.isoformat(timespec="seconds"),
+            "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._t0, 6),
+            "cpu_s": round(time.process_time() - self._c0, 6),
+            "argv": sys.argv,
+            "params": self.params,
+            "hooks": list(self.hooks),
+            "bytes_written": sum(r.bytes_written for r in self.stages),
+            "stages": [asdict(r) for r in self.stages],
+        }
+        path = out_dir / name
+        path.write_text(json.dumps(manifest, indent=2, default=str))
+        print(f"📊 Run manifest → {path}")
+        return path
+
+def instrument_from_env(run: str) -> Instrument:
+    """``PIPELINE_INSTRUMENT=1`` activa; ``PIPELINE_PROFILE`` lista hooks (cprofile, tracemalloc)."""
+    enabled = os.getenv("PIPELINE_INSTRUMENT", "0").lower() in ("1", "true", "yes")
+    hooks = tuple(h.strip().lower() for h in os.getenv("PIPELINE_PROFILE", "").split(",") if h.strip())
+    return Instrument(run, enabled=enabled, hooks=hooks)
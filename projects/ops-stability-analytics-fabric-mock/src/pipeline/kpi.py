@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Orquestación de la corrida KPI (``python -m src.analytics.kpi_calculations``)
+Valida la combinación de opciones, arma el grafo de etapas
+(read → daily → weekly → {stability, flags[, rolling]} → escrituras) y aplica
+caché, validación de Tables y manifest. Las transformaciones viven en
+``src/analytics``; este módulo solo las conecta.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..analytics.kpi_calculations import (
+    build_agent_weekly,
+    build_daily,
+    compute_stability,
+    flag_outliers,
+    load_raw,
+    raw_source,
+    run_incremental,
+)
+from ..cli import kpi_parser
+from ..lakehouse.dataset import PARTITION_COLS, write_dataset
+from .dag import Node, Pipeline, PipelineError
+from .instrument import Instrument, instrument_from_env
+
+__all__ = [
+    "DAG_RUN_ARGS",
+    "check_args",
+    "table_paths",
+    "write_table",
+    "kpi_pipeline",
+    "main",
+]
+
+# Argumentos que no cambian el resultado: no invalidan las etapas completadas
+DAG_RUN_ARGS = ("lakehouse", "cache", "validate", "workers", "resume", "rerun")
+
+# -----------------------------
+# Argumentos y salidas
+# -----------------------------
+def check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Rechaza combinaciones no soportadas con ``parser.error`` (exit 2); normaliza ``--rolling``."""
+    if args.incremental:
+        conflicts = (
+            (args.layout != "file", "--incremental requires --layout file"),
+            (args.streaming, "--incremental and --streaming are mutually exclusive"),
+            (args.approx_eps is not None, "--approx-eps is not supported with --incremental (exact refresh)"),
+            (args.compact, "--compact is not supported with --incremental (state keeps the full schema)"),
+            (args.resume or args.rerun, "--resume/--rerun apply to the stage graph, not to --incremental"),
+            (args.rolling is not None, "--rolling is not supported with --incremental"),
+        )
+        for on, message in conflicts:
+            if on:
+                parser.error(message)
+    if args.backend == "polars":
+        unsupported = [flag for flag, on in (("--incremental", args.incremental), ("--streaming", args.streaming),
+                                             ("--compact", args.compact), ("--approx-eps", args.approx_eps is not None))
+                       if on]
+        if unsupported:
+            parser.error(f"--backend polars does not support {', '.join(unsupported)}")
+        try:
+            import polars  # noqa: F401  (dependencia opcional: requirements-polars.txt)
+        except ImportError:
+            parser.error("--backend polars needs the optional 'polars' package "
+                         "(pip install -r requirements-polars.txt)")
+    if args.rolling is not None:
+        if any(w < 1 for w in args.rolling):
+            parser.error("--rolling windows must be >= 1 week")
+        args.rolling = sorted(set(args.rolling)) or [4, 8, 12]
+
+def table_paths(tables_dir: Path, layout: str) -> dict[str, Path]:
+    """Salida por tabla: ``<tabla>.parquet`` o, con layout ``partitioned``, directorio Hive."""
+    names = ("agent_stability", "weekly_flags", "rolling_stability")
+    suffix = "" if layout == "partitioned" else ".parquet"
+    return {name: tables_dir / f"{name}{suffix}" for name in names}
+
+def write_table(df, out: Path, parts: list[str], layout: str, **opts) -> int:
+    """Escribe una tabla (pandas, Arrow o polars) en ``out``; devuelve sus filas."""
+    if not isinstance(df, (pd.DataFrame, pa.Table)):  # backend polars: se escribe desde Arrow, sin pasar por pandas
+        from ..analytics.polars_backend import to_arrow
+
+        df = to_arrow(df)
+    if layout == "partitioned":
+        write_dataset(df, out, partition_cols=parts, **opts)
+    elif isinstance(df, pa.Table):
+        pq.write_table(df, out)
+    else:
+        df.to_parquet(out, index=False)
+    return len(df)
+
+# -----------------------------
+# Grafo de etapas
+# -----------------------------
+def kpi_pipeline(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    paths: dict[str, Path],
+    inst: Instrument,
+) -> Pipeline:
+    """
+    read → daily → weekly → {stability, flags[, rolling]} → escrituras; las ramas (y sus
+    escrituras) corren en paralelo. Con ``--resume``/``--rerun``, ``weekly`` deja un
+    checkpoint para reanudar; una corrida normal no lo escribe.
+    """
+    lh_root = args.lakehouse
+    source = raw_source(lh_root)
+    state_dir = lh_root / "Files" / "state" / "dag"
+    checkpoint = state_dir / "kpi.weekly.parquet"
+    keep_checkpoint = args.resume or bool(args.rerun)
+    opts = dict(row_group_size=args.row_group_size, compression=args.compression, sort_by=["agent_id"])
+
+    def weekly_checkpoint(weekly):
+        if not keep_checkpoint:
+            return weekly
+        state_dir.mkdir(parents=True, exist_ok=True)
+        if isinstance(weekly, pd.DataFrame):
+            weekly.to_parquet(checkpoint, index=False)
+        else:
+            weekly.write_parquet(checkpoint)
+        return weekly
+
+    def writer(table: str, parts: list[str]):
+        def write(df) -> int:
+            return write_table(df, paths[table], parts, args.layout, **opts)
+        return write
+
+    if args.backend == "polars":
+        import polars as pl
+        from ..analytics import polars_backend as pb
+
+        if source is None:
+            parser.error("--backend polars needs Files/raw/ops_daily.parquet or Files/raw/ops_daily/")
+
+        def load_checkpoint():
+            return pl.read_parquet(checkpoint)
+
+        def read():
+            return pb.scan_raw(source)
+
+        def weekly(daily):
+            return weekly_checkpoint(pb.build_agent_weekly(daily))
+
+        def flags(weekly):
+            return pb.flag_outliers(weekly, k=args.iqr_k)
+
+        stability = pb.compute_stability
+        # read/daily son planes diferidos: el escaneo corre dentro de weekly
+        nodes = [Node("read", read), Node("daily", pb.build_daily, deps=("read",))]
+    else:
+        def load_checkpoint():
+            return pd.read_parquet(checkpoint)
+
+        def stability(weekly):
+            return compute_stability(weekly, approx_eps=args.approx_eps)
+
+        if args.streaming:
+            from ..analytics.streaming import DEFAULT_BATCH_ROWS, batch_rows_for_memory, parse_memory, stream_weekly
+
+            if source is None:
+                parser.error("--streaming needs Files/raw/ops_daily.parquet or Files/raw/ops_daily/")
+            batch_rows = args.batch_rows or (
+                batch_rows_for_memory(source, parse_memory(args.max_memory))
+                if args.max_memory else DEFAULT_BATCH_ROWS
+            )
+
+            # lectura + parciales por lotes en una sola etapa; los sketches de flags, por lote también
+            def weekly():
+                return weekly_checkpoint(stream_weekly(source, batch_rows, compact=args.compact))
+
+            def flags(weekly):
+                return flag_outliers(weekly, k=args.iqr_k, approx_eps=args.approx_eps, shard_rows=batch_rows)
+
+            nodes = []
+        else:
+            def read():
+                return load_raw(lh_root, compact=args.compact)
+
+            def daily(raw):
+                return build_daily(raw, compact=args.compact)
+
+            def weekly(daily):
+                return weekly_checkpoint(build_agent_weekly(daily, compact=args.compact))
+
+            def flags(weekly):
+                return flag_outliers(weekly, k=args.iqr_k, approx_eps=args.approx_eps)
+
+            nodes = [Node("read", read), Node("daily", daily, deps=("read",))]
+
+    weekly_io = dict(outputs=(checkpoint,), load=load_checkpoint) if keep_checkpoint else {}
+    nodes += [
+        Node("weekly", weekly, deps=("daily",) if nodes else (), **weekly_io),
+        Node("stability", stability, deps=("weekly",)),
+        Node("flags", flags, deps=("weekly",)),
+        Node("write_agent_stability", writer("agent_stability", ["team_id"]),
+             deps=("stability",), outputs=(paths["agent_stability"],)),
+        Node("write_weekly_flags", writer("weekly_flags", PARTITION_COLS),
+             deps=("flags",), outputs=(paths["weekly_flags"],)),
+    ]
+    if args.rolling is not None:
+        from ..analytics.rolling import rolling_stability
+
+        def rolling(weekly):
+            weekly = weekly if isinstance(weekly, pd.DataFrame) else weekly.to_pandas()
+            return rolling_stability(weekly, windows=args.rolling)
+
+        nodes += [
+            Node("rolling", rolling, deps=("weekly",)),
+            Node("write_rolling_stability", writer("rolling_stability", PARTITION_COLS),
+                 deps=("rolling",), outputs=(paths["rolling_stability"],)),
+        ]
+    unknown = sorted(set(args.rerun) - {n.name for n in nodes})
+    if unknown:
+        parser.error(f"--rerun: unknown stage(s) {unknown}")
+    # La reanudación solo reutiliza etapas con los mismos parámetros y la misma capa raw
+    params = {k: v for k, v in vars(args).items() if k not in DAG_RUN_ARGS}
+    if source is not None:
+        stat = source.stat()
+        params["source"] = [str(source), stat.st_size, stat.st_mtime_ns]
+    return Pipeline("kpi", nodes, state_dir=state_dir, params=params, workers=args.workers, inst=inst)
+
+# -----------------------------
+# Ejecución
+# -----------------------------
+def _produce(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    paths: dict[str, Path],
+    outputs: list[Path],
+    inst: Instrument,
+) -> list[int | None]:
+    """Filas escritas por salida (None: etapa reutilizada por ``--resume``)."""
+    if args.incremental:
+        with inst.stage("incremental") as st:
+            stability, weekly_flagged = run_incremental(args.lakehouse, k=args.iqr_k)
+            st.rows_out = len(weekly_flagged)
+        for table, df, parts in (("agent_stability", stability, ["team_id"]),
+                                 ("weekly_flags", weekly_flagged, PARTITION_COLS)):
+            with inst.stage(f"write_{table}", rows_in=len(df)) as st:
+                st.rows_out = write_table(df, paths[table], parts, args.layout)
+                st.output(paths[table])
+        return [len(stability), len(weekly_flagged)]
+    try:
+        results = kpi_pipeline(parser, args, paths, inst).run(resume=args.resume, rerun=args.rerun)
+    except PipelineError as e:
+        inst.write_manifest(args.lakehouse / "Tables")
+        raise SystemExit(f"❌ {e} (re-run with --resume to continue from the last completed stage)")
+    return [results.get(f"write_{out.name.removesuffix('.parquet')}") for out in outputs]
+
+def main(argv: list[str] | None = None) -> None:
+    parser = kpi_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+
+    lh_root = args.lakehouse
+    tables_dir = lh_root / "Tables"
+    tables_dir.mkdir(parents=True, exist_ok=True)
+    paths = table_paths(tables_dir, args.layout)
+    outputs = [paths["agent_stability"], paths["weekly_flags"]]
+    if args.rolling is not None:
+        outputs.append(paths["rolling_stability"])
+
+    inst = instrument_from_env("kpi")
+    inst.params = {k: v for k, v in vars(args).items() if k != "lakehouse"}
+
+    cache = None
+    if args.cache and not args.incremental:
+        from .cache import StageCache
+
+        source = raw_source(lh_root) or Path("data/raw/ops_daily.csv")
+        params = {k: v for k, v in vars(args).items() if k not in DAG_RUN_ARGS}
+        cache = StageCache(lh_root / ".cache")
+        with inst.stage("cache_restore") as st:
+            try:
+                key = cache.key("kpi", [source], params)
+            except FileNotFoundError as e:
+                raise SystemExit(f"❌ {e}. Ejecuta primero la generación de datos.")
+            hit = cache.restore(key, outputs)
+            st.rows_out = int(hit)
+        if hit:
+            print(f"♻️  Cache hit → {', '.join(map(str, outputs))}")
+            inst.write_manifest(tables_dir)
+            return
+
+    counts = _produce(parser, args, paths, outputs, inst)
+    if cache is not None:
+        with inst.stage("cache_store"):
+            cache.store(key, "kpi", outputs)
+    for n, out in zip(counts, outputs):
+        print(f"✅ Wrote {n} rows → {out}" if n is not None else f"♻️  Up to date (resumed) → {out}")
+    if args.validate:
+        from ..lakehouse.validate import validate_table
+
+        for out in outputs:
+            with inst.stage(f"validate_{out.stem}") as st:
+                report = validate_table(out)
+                st.rows_out = report.num_rows
+            if not report.ok:
+                inst.write_manifest(tables_dir)
+                raise SystemExit("❌ " + "; ".join(report.errors))
+        print("✅ Validated Tables from Parquet footers")
+    inst.write_manifest(tables_dir)
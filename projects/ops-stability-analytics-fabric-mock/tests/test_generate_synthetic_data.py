@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the synthetic daily data generator.
+Validates schema, chunk-size independence and streaming writes.
+"""
+import pandas as pd
+from src.etl.generate_synthetic_data import (
+    COLUMNS,
+    generate,
+    iter_generate,
+    main,
+    write_sharded,
+    write_stream,
+)
+
+def test_generate_schema_and_size():
+    """Debe producir agentes × días filas con el contrato de columnas."""
+    df = generate(12, 10, seed=7)
+    assert list(df.columns) == COLUMNS
+    assert len(df) == 12 * 10
+    assert (df["productive_hours"] >= 0).all()
+    assert (df["cases_closed"] >= 0).all()
+    assert df["agent_id"].nunique() == 12
+
+def test_chunks_match_full_generation():
+    """El resultado concatenado no depende del tamaño de chunk."""
+    full = generate(25, 14, seed=3)
+    chunked = pd.concat(list(iter_generate(25, 14, seed=3, chunk_rows=50)), ignore_index=True)
+    pd.testing.assert_frame_equal(full, chunked)
+
+def test_write_stream_parquet_and_csv(tmp_path):
+    """La escritura en streaming conserva todas las filas en ambos formatos."""
+    full = generate(9, 8, seed=11)
+
+    n = write_stream(iter_generate(9, 8, seed=11, chunk_rows=16), tmp_path / "d.parquet", "parquet")
+    assert n == len(full)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "d.parquet"), full)
+
+    n = write_stream(iter_generate(9, 8, seed=11, chunk_rows=16), tmp_path / "d.csv", "csv")
+    assert n == len(full)
+    assert len(pd.read_csv(tmp_path / "d.csv")) == len(full)
+
+def test_sharded_output_independent_of_workers(tmp_path):
+    """Los part files por shard reproducen la generación secuencial con 1 o N workers."""
+    kw = dict(chunk_rows=20, shard_agents=4, end="2025-03-31")
+    seq = pd.concat(
+        list(iter_generate(10, 6, seed=5, chunk_rows=20, shard_agents=4, end="2025-03-31")),
+        ignore_index=True,
+    )
+
+    for workers in (1, 3):
+        out = tmp_path / f"w{workers}"
+        n = write_sharded(10, 6, 5, out, workers, **kw)
+        assert n == len(seq)
+        assert len(list(out.glob("part-*.parquet"))) == 3
+        parts = pd.read_parquet(out)
+        pd.testing.assert_frame_equal(parts.reset_index(drop=True), seq)
+
+def test_cache_lives_under_outdir_and_ignores_workers(tmp_path, monkeypatch, capsys):
+    """--cache guarda junto a --outdir; cambiar --workers reutiliza la misma entrada."""
+    monkeypatch.delenv("STAGE_CACHE_DIR", raising=False)
+    outdir = tmp_path / "raw"
+    args = ["--agents", "6", "--days", "4", "--outdir", str(outdir), "--shard-agents", "2", "--cache"]
+    main(args + ["--workers", "2"])
+    main(args + ["--workers", "3"])
+    assert "Cache hit" in capsys.readouterr().out
+    assert (outdir / ".cache" / "manifest.json").exists()
+    assert len(list((outdir / "ops_daily").glob("part-*.parquet"))) == 3
+
+
+def test_switching_to_sharded_output_removes_stale_single_file(tmp_path):
+    """Un ops_daily.parquet previo no debe ocultar el directorio de part files nuevo."""
+    from src.analytics.kpi_calculations import load_raw, raw_source
+
+    raw = tmp_path / "Files" / "raw"
+    main(["--agents", "6", "--days", "7", "--outdir", str(raw)])
+    main(["--agents", "50", "--days", "7", "--outdir", str(raw), "--workers", "2", "--shard-agents", "25"])
+    assert not (raw / "ops_daily.parquet").exists()
+    assert raw_source(tmp_path) == raw / "ops_daily"
+    assert load_raw(tmp_path)["agent_id"].nunique() == 50
+
+def test_switching_between_file_and_partitioned_layouts(tmp_path):
+    """file → partitioned → file: kpi siempre lee la salida de la última corrida."""
+    from src.analytics.kpi_calculations import load_raw, raw_source
+
+    raw = tmp_path / "Files" / "raw"
+    main(["--agents", "4", "--days", "7", "--outdir", str(raw)])
+    main(["--agents", "9", "--days", "7", "--outdir", str(raw), "--layout", "partitioned"])
+    assert raw_source(tmp_path) == raw / "ops_daily"
+    assert load_raw(tmp_path)["agent_id"].nunique() == 9
+
+    main(["--agents", "5", "--days", "7", "--outdir", str(raw)])
+    assert not (raw / "ops_daily").exists()
+    assert load_raw(tmp_path)["agent_id"].nunique() == 5
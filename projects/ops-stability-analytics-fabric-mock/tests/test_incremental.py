@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for incremental KPI recomputation.
+Validates that refreshing only affected weeks/agents equals a full rebuild.
+"""
+import pandas as pd
+from src.analytics.incremental import load_state, max_date, refresh_kpis, save_state
+from src.analytics.kpi_calculations import (
+    build_agent_weekly,
+    build_daily,
+    compute_stability,
+    flag_outliers,
+)
+from src.analytics.weekly_partials import finalize_weekly, weekly_partials
+from src.etl.generate_synthetic_data import generate
+
+def _full(daily: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    weekly = build_agent_weekly(daily)
+    return compute_stability(weekly), flag_outliers(weekly)
+
+def test_incremental_matches_full_rebuild(tmp_path):
+    """Procesar días nuevos por lotes (cortes a media semana) ≡ reconstrucción completa."""
+    daily = build_daily(generate(24, 45, seed=9))
+    # un agente que aparece solo en el último lote
+    late = daily[daily["agent_id"] == "AG001"].tail(5).assign(agent_id="AG999")
+    daily = pd.concat([daily, late], ignore_index=True)
+
+    dates = sorted(daily["date"].unique())
+    cuts = [dates[30], dates[38], dates[-1]]
+
+    first = daily[daily["date"] <= cuts[0]]
+    partials = weekly_partials(first)
+    weekly = finalize_weekly(partials)
+    stability, flags = compute_stability(weekly), flag_outliers(weekly)
+    save_state(tmp_path, partials, max_date(first))
+
+    for prev, cut in zip(cuts, cuts[1:]):
+        partials, watermark = load_state(tmp_path)
+        assert watermark == pd.Timestamp(prev).date().isoformat()
+        batch = daily[(daily["date"] > pd.Timestamp(watermark)) & (daily["date"] <= cut)]
+        partials, stability, flags = refresh_kpis(batch, partials, stability, flags)
+        save_state(tmp_path, partials, max_date(batch, watermark))
+
+    exp_stab, exp_flags = _full(daily)
+    pd.testing.assert_frame_equal(stability[exp_stab.columns], exp_stab, check_exact=False)
+    pd.testing.assert_frame_equal(flags[exp_flags.columns], exp_flags, check_exact=False)
+
+def test_refresh_without_new_rows_is_noop():
+    """Sin filas nuevas se devuelven las mismas tablas."""
+    daily = build_daily(generate(6, 14, seed=2))
+    partials = weekly_partials(daily)
+    stability, flags = _full(daily)
+    p2, s2, f2 = refresh_kpis(daily.iloc[0:0], partials, stability, flags)
+    assert p2 is partials and s2 is stability and f2 is flags
+
+def test_refresh_single_agent_reassigns_quartiles_globally():
+    """Un lote con un solo agente no rompe los cuartiles: CV/CVM solo de ese agente, cuartil sobre todos."""
+    daily = build_daily(generate(16, 28, seed=5))
+    last = daily["date"].max()
+    batch = daily[(daily["date"] == last) & (daily["agent_id"] == "AG003")]
+    history = daily.drop(batch.index)
+
+    partials = weekly_partials(history)
+    stability, flags = _full(history)
+    partials, stability, flags = refresh_kpis(batch, partials, stability, flags)
+
+    exp_stab, exp_flags = _full(daily)
+    assert stability["quartile_efficiency"].notna().all()
+    pd.testing.assert_frame_equal(stability[exp_stab.columns], exp_stab, check_exact=False)
+    pd.testing.assert_frame_equal(flags[exp_flags.columns], exp_flags, check_exact=False)
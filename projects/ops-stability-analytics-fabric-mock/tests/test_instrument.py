@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for stage instrumentation and the JSON run manifest.
+"""
+import json
+from pathlib import Path
+
+from src.pipeline import instrument
+from src.pipeline.dag import Node, Pipeline
+from src.pipeline.instrument import Instrument, instrument_from_env
+
+def test_disabled_instrument_is_noop(tmp_path, monkeypatch):
+    monkeypatch.delenv("PIPELINE_INSTRUMENT", raising=False)
+    monkeypatch.delenv("PIPELINE_PROFILE", raising=False)
+    inst = instrument_from_env("kpi")
+    with inst.stage("read") as st:
+        st.rows_out = 10
+    assert not inst.enabled and inst.stages == []
+    assert inst.write_manifest(tmp_path) is None
+    assert not (tmp_path / "run_manifest.json").exists()
+
+def test_manifest_records_stages_and_hooks(tmp_path):
+    """Filas, bytes escritos, tiempos, pico de memoria y .prof por etapa."""
+    inst = Instrument("kpi", hooks=("cprofile", "tracemalloc"))
+    out = tmp_path / "out.bin"
+    with inst.stage("build", rows_in=3) as st:
+        data = [bytes(1024) for _ in range(64)]
+        st.rows_out = len(data)
+    with inst.stage("write", rows_in=64) as st:
+        out.write_bytes(b"".join(data))
+        st.output(out)
+
+    path = inst.write_manifest(tmp_path)
+    manifest = json.loads(path.read_text())
+    assert manifest["run"] == "kpi" and manifest["hooks"] == ["cprofile", "tracemalloc"]
+    build, write = manifest["stages"]
+    assert (build["name"], build["rows_in"], build["rows_out"]) == ("build", 3, 64)
+    assert write["bytes_written"] == manifest["bytes_written"] == 64 * 1024
+    for st in (build, write):
+        assert st["wall_s"] >= 0 and st["cpu_s"] >= 0 and st["peak_rss_mb"] > 0
+        assert st["peak_traced_mb"] is not None
+        assert (tmp_path / "profiles" / f"kpi.{st['name']}.prof").exists()
+
+def test_parallel_pipeline_labels_process_wide_measures():
+    """Con workers > 1 las etapas comparten proceso: RSS/CPU se etiquetan "process"; en serie, por etapa."""
+    nodes = [Node("a", lambda: [0] * 10), Node("b", len, ("a",)), Node("c", len, ("a",))]
+    for workers, scope in ((2, "process"), (1, "stage")):
+        inst = Instrument("dag", enabled=True)
+        Pipeline("dag", nodes, workers=workers, inst=inst).run()
+        assert [st.cpu_scope for st in inst.stages] == [scope] * 3
+        if workers > 1:
+            assert [st.peak_rss_scope for st in inst.stages] == ["process"] * 3
+
+def test_peak_rss_is_none_without_proc_or_resource(tmp_path, monkeypatch):
+    """Sin /proc ni ``resource`` (Windows) la etapa se mide igual y el pico queda en None."""
+    def no_proc(self, *args, **kwargs):
+        raise OSError("sin /proc")
+
+    monkeypatch.setattr(instrument, "resource", None)
+    monkeypatch.setattr(Path, "read_text", no_proc)
+    inst = Instrument("kpi", enabled=True)
+    with inst.stage("read"):
+        pass
+    (rec,) = inst.stages
+    assert rec.peak_rss_mb is None and rec.wall_s >= 0
@@ -3,12 +3,21 @@
 Unit tests for KPI calculations module
 Validates robustness of statistical coefficients (CV and CVM).
 """
+import sys
+
 import pandas as pd
 import numpy as np
+import pytest
+from src.analytics import kpi_calculations as kpi
 from src.analytics.kpi_calculations import (
+    build_agent_weekly,
+    build_daily,
     coef_variacion,
     coef_variacion_mediana,
+    compute_stability,
+    flag_outliers,
 )
+from src.lakehouse.dataset import read_dataset
 
 # --------------------------------------------------------------------
 # Tests for coeficiente de variación (CV)
@@ -40,4 +49,114 @@ def test_coef_variacion_mediana_with_constant_series():
     """CVM de una serie constante debe ser 0."""
     s = pd.Series([5, 5, 5, 5])
     cvm = coef_variacion_mediana(s)
-    assert cvm == 0, f"CVM incorrecto para serie constante: {cvm}"
\ No newline at end of file
+    assert cvm == 0, f"CVM incorrecto para serie constante: {cvm}"
+# --------------------------------------------------------------------
+# Tests for the dense agent×week stability engine
+# --------------------------------------------------------------------
+def _reference_stability(df_week: pd.DataFrame) -> pd.DataFrame:
+    """Ruta original: groupby().agg con callables Python por agente."""
+    return df_week.groupby(["agent_id", "team_id"]).agg(
+        cv_hours=("hours_mean", coef_variacion),
+        cvm_hours=("hours_mean", coef_variacion_mediana),
+        cv_cases=("cases_mean", coef_variacion),
+        cvm_cases=("cases_mean", coef_variacion_mediana),
+    ).reset_index()
+
+def test_compute_stability_matches_groupby_callables():
+    """El motor matricial coincide con coef_variacion/coef_variacion_mediana por agente."""
+    rng = np.random.default_rng(0)
+    weekly = pd.DataFrame({
+        "agent_id": np.repeat([f"A{i}" for i in range(30)], 12),
+        "team_id": np.repeat([f"T{i % 4}" for i in range(30)], 12),
+        "iso_year": 2025,
+        "iso_week": np.tile(np.arange(1, 13), 30),
+        "hours_mean": rng.normal(6, 1, 360),
+        "cases_mean": rng.normal(18, 4, 360),
+    })
+    weekly = weekly.sample(frac=0.8, random_state=1)          # semanas faltantes
+    weekly.loc[weekly["agent_id"] == "A0", "hours_mean"] = 0.0  # media 0 → NaN
+    weekly.loc[weekly["agent_id"] == "A1", "cases_mean"] = np.where(
+        np.arange((weekly["agent_id"] == "A1").sum()) % 2 == 0, 0.0, -1.0
+    )                                                            # mediana 0 posible
+    single = pd.DataFrame({"agent_id": ["Z"], "team_id": ["T9"], "iso_year": [2025],
+                           "iso_week": [1], "hours_mean": [5.0], "cases_mean": [10.0]})
+    weekly = pd.concat([weekly, single], ignore_index=True)    # 1 semana → std NaN
+
+    got = compute_stability(weekly)
+    exp = _reference_stability(weekly)
+    pd.testing.assert_frame_equal(
+        got[list(exp.columns)].reset_index(drop=True), exp,
+        check_exact=False, check_column_type=False, rtol=1e-9, atol=1e-12,
+    )
+    assert np.isnan(got.loc[got["agent_id"] == "A0", "cv_hours"]).all()
+    assert "quartile_efficiency" in got.columns
+
+# --------------------------------------------------------------------
+# Tests for the compact-schema mode
+# --------------------------------------------------------------------
+def _daily_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-12-23", periods=35, freq="D").strftime("%Y-%m-%d")
+    n = 12
+    df = pd.DataFrame({
+        "date": np.repeat(dates, n),
+        "agent_id": np.tile([f"AG{i:03d}" for i in range(n)], len(dates)),
+        "team_id": np.tile([f"T{(i % 3) + 1}" for i in range(n)], len(dates)),
+        "productive_hours": rng.normal(6, 1, len(dates) * n).round(2),
+        "cases_closed": rng.poisson(18, len(dates) * n),
+    })
+    df.loc[::11, "productive_hours"] = np.nan
+    return df.sample(frac=1.0, random_state=3, ignore_index=True)  # orden de llegada arbitrario
+
+def test_compact_mode_matches_full_schema():
+    """Esquema compacto: mismos valores y columnas, tipos reducidos, sin mutar la entrada."""
+    raw = _daily_frame()
+    before = raw.copy()
+
+    weekly = build_agent_weekly(build_daily(raw))
+    weekly_c = build_agent_weekly(build_daily(raw, compact=True), compact=True)
+    pd.testing.assert_frame_equal(raw, before)
+
+    assert list(weekly_c.columns) == list(weekly.columns)
+    assert isinstance(weekly_c["agent_id"].dtype, pd.CategoricalDtype)
+    assert weekly_c["iso_week"].dtype == np.int16
+    pd.testing.assert_frame_equal(weekly_c, weekly, check_dtype=False, check_categorical=False)
+
+    for fn in (compute_stability, flag_outliers):
+        got, exp = fn(weekly_c), fn(weekly)
+        assert list(got.columns) == list(exp.columns)
+        pd.testing.assert_frame_equal(got, exp, check_dtype=False, check_categorical=False)
+
+def test_compact_partitioned_layout_end_to_end(tmp_path):
+    """--layout partitioned --compact: los IDs categóricos se ordenan al escribir y las tablas coinciden."""
+    raw_dir = tmp_path / "Files" / "raw"
+    raw_dir.mkdir(parents=True)
+    _daily_frame().to_parquet(raw_dir / "ops_daily.parquet", index=False)
+
+    kpi.main(["--lakehouse", str(tmp_path), "--layout", "partitioned", "--compact"])
+    got = read_dataset(tmp_path / "Tables" / "weekly_flags")
+    exp = flag_outliers(build_agent_weekly(build_daily(_daily_frame())))
+    keys = ["agent_id", "team_id", "iso_year", "iso_week"]
+    got = got.astype({"agent_id": str}).sort_values(keys, ignore_index=True)
+    pd.testing.assert_frame_equal(got[exp.columns], exp, check_dtype=False, check_column_type=False)
+    assert len(read_dataset(tmp_path / "Tables" / "agent_stability")) == 12
+
+def test_polars_backend_without_polars_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    """polars es un extra opcional: sin él, --backend polars termina con un error de uso claro."""
+    monkeypatch.setitem(sys.modules, "polars", None)  # import polars → ImportError
+    with pytest.raises(SystemExit) as exc:
+        kpi.main(["--lakehouse", str(tmp_path), "--backend", "polars"])
+    assert exc.value.code == 2
+    assert "requirements-polars.txt" in capsys.readouterr().err
+
+def test_null_keys_are_dropped_like_groupby():
+    """Filas con agent_id/team_id nulo no rompen el motor matricial: se descartan como en groupby."""
+    from src.analytics.rolling import rolling_stability
+
+    weekly = build_agent_weekly(build_daily(_daily_frame()))
+    weekly["agent_id"] = weekly["agent_id"].astype(object)
+    weekly.loc[[0, 5], "agent_id"] = None
+    clean = weekly.dropna(subset=["agent_id"]).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(compute_stability(weekly), compute_stability(clean))
+    pd.testing.assert_frame_equal(rolling_stability(weekly, windows=[4]), rolling_stability(clean, windows=[4]))
@@ -5,7 +5,7 @@ Validates binary consistency, schema integrity, and multi-team robustness.
 """
 import pandas as pd
 import numpy as np
-from src.analytics.kpi_calculations import build_agent_weekly, flag_outliers
+from src.analytics.kpi_calculations import build_agent_weekly, flag_outliers, iqr_bounds
 
 def _build_mock_df() -> pd.DataFrame:
     """Construye dataset sintético pequeño y reproducible."""
@@ -62,4 +62,59 @@ def test_flags_multiple_teams_isolated():
 
     # Flags deben existir pero sin mezclar equipos
     grouped = flagged.groupby("team_id")[["out_hours_flag", "out_cases_flag"]].nunique().max(axis=1)
-    assert (grouped >= 1).all(), "Al menos un flag debe calcularse por equipo"
\ No newline at end of file
+    assert (grouped >= 1).all(), "Al menos un flag debe calcularse por equipo"
+
+def _reference_flags(weekly: pd.DataFrame, col: str, k: float = 1.5) -> pd.Series:
+    """Ruta original: transform con iqr_bounds por grupo."""
+    def flag_series(s: pd.Series) -> pd.Series:
+        lo, hi = iqr_bounds(s, k)
+        return (s.lt(lo) | s.gt(hi)).astype(int)
+    return weekly.groupby(["team_id", "iso_year", "iso_week"])[col].transform(flag_series)
+
+def test_flags_match_iqr_bounds_per_group():
+    """La pasada vectorizada coincide con iqr_bounds por equipo/semana para varios k."""
+    rng = np.random.default_rng(4)
+    n = 600
+    weekly = pd.DataFrame({
+        "agent_id": [f"A{i % 50}" for i in range(n)],
+        "team_id": rng.choice(["T1", "T2", "T3"], n),
+        "iso_year": rng.choice([2024, 2025], n),
+        "iso_week": rng.integers(1, 6, n),
+        "hours_mean": rng.standard_t(2, n) + 6,
+        "cases_mean": rng.standard_t(2, n) * 4 + 18,
+    })
+    for k in (1.0, 1.5, 3.0):
+        flagged = flag_outliers(weekly, k=k)
+        for col, flag in [("hours_mean", "out_hours_flag"), ("cases_mean", "out_cases_flag")]:
+            exp = _reference_flags(weekly, col, k)
+            assert (flagged[flag].to_numpy() == exp.to_numpy()).all(), f"{flag} difiere con k={k}"
+        assert flagged[["out_hours_flag", "out_cases_flag"]].to_numpy().sum() > 0
+
+def test_flags_custom_metrics():
+    """Acepta una lista configurable de métricas y nombra su flag como out_<métrica>_flag."""
+    weekly = build_agent_weekly(_build_mock_df())
+    weekly["aht_mean"] = [1.0, 50.0, 2.0, 3.0]
+    flagged = flag_outliers(weekly, metrics=["aht_mean"])
+    assert "out_aht_flag" in flagged.columns
+    assert "out_hours_flag" not in flagged.columns
+
+def test_flags_null_team_rows_get_zero():
+    """Filas con team_id nulo no forman grupo: flag 0, como groupby/transform; el resto no cambia."""
+    rng = np.random.default_rng(7)
+    n = 400
+    weekly = pd.DataFrame({
+        "agent_id": [f"A{i % 40}" for i in range(n)],
+        "team_id": rng.choice(["T1", "T2"], n).astype(object),
+        "iso_year": 2025,
+        "iso_week": rng.integers(1, 4, n),
+        "hours_mean": rng.standard_t(2, n) + 6,
+        "cases_mean": rng.standard_t(2, n) * 4 + 18,
+    })
+    weekly.loc[::9, "team_id"] = None
+    weekly.loc[::9, "hours_mean"] = 1e6  # sería outlier en cualquier grupo
+    for approx_eps in (None, 0.05):
+        flagged = flag_outliers(weekly, approx_eps=approx_eps)
+        assert (flagged.loc[::9, ["out_hours_flag", "out_cases_flag"]] == 0).all().all()
+    flagged = flag_outliers(weekly)
+    exp = _reference_flags(weekly, "hours_mean").fillna(0)
+    assert (flagged["out_hours_flag"].to_numpy() == exp.to_numpy()).all()
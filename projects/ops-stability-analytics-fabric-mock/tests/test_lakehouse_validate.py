@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for footer-only Parquet validation.
+Covers schema/type checks, statistics-based binary flags and the sampled fallback.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.analytics.kpi_calculations import build_agent_weekly, build_daily, flag_outliers
+from src.etl.generate_synthetic_data import generate
+from src.lakehouse.dataset import write_dataset
+from src.lakehouse.validate import validate_parquet, validate_table
+
+def _flags() -> pd.DataFrame:
+    return flag_outliers(build_agent_weekly(build_daily(generate(12, 28, seed=3))))
+
+def test_valid_outputs_pass_from_footer_only(tmp_path):
+    """Flags enteros: min/max de cada row group bastan, sin lecturas muestreadas."""
+    flags = _flags()
+    out = tmp_path / "weekly_flags.parquet"
+    flags.to_parquet(out, index=False, row_group_size=16)
+    report = validate_table(out)
+    assert report.ok, report.errors
+    assert report.num_rows == len(flags) and report.sampled == []
+
+    write_dataset(flags, tmp_path / "weekly_flags", row_group_size=8)  # dataset Hive
+    report = validate_table(tmp_path / "weekly_flags")
+    assert report.ok and report.num_rows == len(flags)
+
+def test_schema_errors_and_empty(tmp_path):
+    flags = _flags().drop(columns=["cases_mean"]).astype({"iso_week": str})
+    out = tmp_path / "weekly_flags.parquet"
+    flags.to_parquet(out, index=False)
+    errors = validate_table(out).errors
+    assert any("falta columna cases_mean" in e for e in errors)
+    assert any("iso_week" in e and "integer" in e for e in errors)
+
+    _flags().head(0).to_parquet(out, index=False)
+    assert any("vacío" in e for e in validate_table(out).errors)
+
+def test_binary_flags_from_stats_and_sampled_fallback(tmp_path):
+    out = tmp_path / "t.parquet"
+    cols = {"f": "number"}
+
+    pq.write_table(pa.table({"f": [0, 1, 2]}), out)  # max > 1 → falla solo con estadísticas
+    report = validate_parquet(out, cols, binary=["f"])
+    assert not report.ok and report.sampled == []
+
+    pq.write_table(pa.table({"f": [0.0, 0.5, 1.0]}), out)  # float en [0, 1]: se muestrea
+    report = validate_parquet(out, cols, binary=["f"])
+    assert not report.ok and report.sampled == ["f"]
+
+    pq.write_table(pa.table({"f": [0.0, None, 1.0]}), out, write_statistics=False)  # sin estadísticas
+    report = validate_parquet(out, cols, binary=["f"])
+    assert report.ok and report.sampled == ["f"]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the asyncio live-ingestion mode.
+Validates parity with the batch KPIs, watermark handling and the event sources.
+"""
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from src.analytics import kpi_calculations as kpi
+from src.analytics import live
+from src.analytics.live import Event, LiveAggregator, run_live, socket_events, tail_events
+from src.lakehouse.dataset import read_dataset
+from src.etl.generate_synthetic_data import generate
+
+KEYS = ["agent_id", "team_id", "iso_year", "iso_week"]
+
+def _events(daily: pd.DataFrame, lateness: int, seed: int = 0) -> list:
+    """Eventos fuera de orden (hasta ``lateness`` días), horas en dos mitades y parte como JSON."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for row in daily.itertuples(index=False):
+        d = row.date.date().isoformat()
+        for kind, value in (("hours", row.productive_hours / 2), ("hours", row.productive_hours / 2),
+                            ("case", row.cases_closed)):
+            out.append((row.date + timedelta(days=int(rng.integers(0, lateness + 1))),
+                        Event(d, row.agent_id, row.team_id, kind, float(value))))
+    out.sort(key=lambda x: x[0])
+    return [e.to_json() if i % 3 == 0 else e for i, (_, e) in enumerate(out)]
+
+async def _stream(events):
+    for i, e in enumerate(events):
+        if i % 500 == 0:
+            await asyncio.sleep(0.002)  # deja correr flushes a mitad de stream
+        yield e
+
+def test_live_matches_batch_across_restart(tmp_path):
+    """Eventos desordenados dentro del margen + reinicio a mitad de stream ≡ KPIs batch."""
+    daily = kpi.build_daily(generate(30, 60, seed=7))
+    events = _events(daily, lateness=2)
+    state = tmp_path / "Files" / "state" / "live"
+    half = len(events) // 2
+
+    first = LiveAggregator(lateness_days=2)
+    asyncio.run(run_live(_stream(events[:half]), first, tmp_path, layout="partitioned",
+                         flush_seconds=0.01, state_dir=state))
+    resumed = LiveAggregator.load(state, lateness_days=2)
+    assert resumed.stats["events"] == half and resumed.weeks  # celdas abiertas restauradas
+    agg = asyncio.run(run_live(_stream(events[half:]), resumed, tmp_path, layout="partitioned",
+                               flush_seconds=0.01, state_dir=state))
+    s = agg.stats
+    assert (s["events"], s["late_dropped"], s["invalid"]) == (len(events), 0, 0) and s["flushes"] > 2
+
+    weekly = kpi.build_agent_weekly(daily)
+    want = kpi.flag_outliers(weekly)
+    got = read_dataset(tmp_path / "Tables" / "weekly_flags").sort_values(KEYS, ignore_index=True)
+    pd.testing.assert_frame_equal(got[want.columns], want, check_dtype=False, check_column_type=False)
+    want = kpi.compute_stability(weekly)
+    got = read_dataset(tmp_path / "Tables" / "agent_stability").sort_values(KEYS[:2], ignore_index=True)
+    pd.testing.assert_frame_equal(got[want.columns], want, check_dtype=False, check_column_type=False)
+
+def test_watermark_closes_weeks_and_drops_late_events():
+    agg = LiveAggregator(lateness_days=0)
+    monday = date(2025, 3, 3)
+    for i in range(7):
+        assert agg.add(Event((monday + timedelta(days=i)).isoformat(), "A1", "T1", "hours", 8.0 + i))
+    agg.add(Event(monday.isoformat(), "A1", "T1", "case", 3))
+    agg.flush()
+    assert agg.stability["quartile_efficiency"].isna().all()  # una semana: sin CV → cuartil nulo
+
+    assert agg.add('{"date": "2025-03-17", "agent_id": "A1", "team_id": "T1", "kind": "case"}')
+    agg.flush()  # watermark 2025-03-17: cierra hasta el domingo 16
+    assert agg.horizon == date(2025, 3, 16) and list(agg.weeks) == [(2025, 12)]
+    assert not agg.add(Event("2025-03-09", "A1", "T1", "hours", 1.0))  # semana cerrada
+    assert not agg.add("not json") and not agg.add(Event("2025-03-18", "A1", "T1", "overtime", 1.0))
+    assert agg.stats["late_dropped"] == 1 and agg.stats["invalid"] == 2
+
+    flags = agg.flags.set_index("iso_week")
+    assert flags.loc[10, "hours_mean"] == 11.0 and flags.loc[10, "cases_mean"] == 3 / 7
+    assert flags.loc[12, "hours_mean"] == 0.0 and flags.loc[12, "cases_mean"] == 1.0
+
+def test_far_future_event_is_invalid_and_keeps_watermark():
+    """Un evento con fecha muy futura (reloj roto) no adelanta el watermark ni cierra semanas."""
+    agg = LiveAggregator(lateness_days=1)
+    today = date.today()
+    assert agg.add(Event(today.isoformat(), "A1", "T1", "hours", 8.0))
+    assert not agg.add(Event("2099-01-01", "A1", "T1", "hours", 8.0))
+    assert agg.add(Event((today + timedelta(days=1)).isoformat(), "A2", "T1", "hours", 7.0))  # dentro del margen
+    assert agg.stats["invalid"] == 1 and agg.max_date == today + timedelta(days=1)
+    agg.flush()
+    assert agg.add(Event((today - timedelta(days=1)).isoformat(), "A1", "T1", "case", 2))
+
+    unchecked = LiveAggregator(max_future_days=None)
+    assert unchecked.add(Event("2099-01-01", "A1", "T1", "hours", 8.0))
+
+async def _until(cond, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not cond():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+def test_tail_and_socket_sources(tmp_path):
+    path = tmp_path / "events.jsonl"
+    line = Event("2025-03-03", "A1", "T1", "hours", 7.5).to_json()
+
+    async def scenario():
+        stop = asyncio.Event()
+        path.write_text(line + "\n" + line[:10])  # la última línea aún está a medias
+        tailed = []
+
+        async def collect():
+            async for e in tail_events(path, stop, poll_seconds=0.01):
+                tailed.append(e)
+
+        task = asyncio.create_task(collect())
+        await _until(lambda: len(tailed) == 1)
+        await asyncio.sleep(0.05)
+        assert len(tailed) == 1
+        with path.open("a") as fh:
+            fh.write(line[10:] + "\n")
+        await _until(lambda: len(tailed) == 2)
+        stop.set()
+        await task
+
+        stop, ready = asyncio.Event(), asyncio.get_running_loop().create_future()
+        agg = LiveAggregator()
+        consumer = asyncio.create_task(run_live(socket_events("127.0.0.1", 0, stop, ready=ready), agg,
+                                                tmp_path, flush_seconds=0.05))
+        host, port = await ready
+        _, writer = await asyncio.open_connection(host, port)
+        writer.write((line + "\n").encode() * 3)
+        await writer.drain()
+        writer.close()
+        await _until(lambda: agg.stats["events"] == 3)
+        stop.set()
+        await consumer
+        return tailed, agg
+
+    tailed, agg = asyncio.run(scenario())
+    assert [Event.from_json(e) for e in tailed] == [Event.from_json(line)] * 2
+    assert agg.stats["events"] == 3 and agg.flags["hours_mean"].tolist() == [22.5]
+    assert (tmp_path / "Tables" / "weekly_flags.parquet").exists()
+
+def test_live_main_bootstraps_from_incremental_state(tmp_path):
+    """El batch incremental cubre los primeros días; el modo live sigue desde su watermark."""
+    raw = tmp_path / "Files" / "raw" / "ops_daily.parquet"
+    raw.parent.mkdir(parents=True)
+    full = generate(12, 40, seed=3)
+    cut = next(d for d in sorted(full["date"].unique())[20:] if pd.Timestamp(d).isoweekday() == 3)  # miércoles
+    full[full["date"] <= cut].to_parquet(raw, index=False)
+    kpi.main(["--lakehouse", str(tmp_path), "--incremental"])
+
+    full.to_parquet(raw, index=False)
+    live.main(["--lakehouse", str(tmp_path), "--replay", "--bootstrap", "--flush-seconds", "0.05"])
+
+    weekly = kpi.build_agent_weekly(kpi.build_daily(full))
+    want = kpi.flag_outliers(weekly)
+    got = pd.read_parquet(tmp_path / "Tables" / "weekly_flags.parquet")
+    pd.testing.assert_frame_equal(got[want.columns], want, check_dtype=False, check_column_type=False)
+    state = LiveAggregator.load(tmp_path / "Files" / "state" / "live")
+    assert state.stats["late_dropped"] == 2 * (full["date"] <= cut).sum()  # días ya consolidados por el batch
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Startup tests for the unified CLI (scripts/ops_analytics.py at the repo root).
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+CLI = Path(__file__).resolve().parents[3] / "scripts" / "ops_analytics.py"
+HEAVY = ("pandas", "numpy", "pyarrow", "psycopg")
+
+# Corre la CLI en un intérprete nuevo e imprime qué módulos pesados quedaron cargados
+PROBE = """
+import runpy, sys
+sys.argv = [{cli!r}, *{argv!r}]
+try:
+    runpy.run_path({cli!r}, run_name="__main__")
+except SystemExit as e:
+    code = e.code
+print("\\n@@", code, sorted(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def _probe(argv: list[str]) -> tuple[str, str]:
+    code = PROBE.format(cli=str(CLI), argv=argv, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    usage, _, status = out.rpartition("\n@@ ")
+    return usage, status.strip()
+
+
+@pytest.mark.parametrize("command", ["generate", "kpi", "live", "smoke", "seed", "load"])
+def test_command_help_skips_heavy_imports(command):
+    usage, status = _probe([command, "--help"])
+    assert f"usage: ops-analytics {command}" in usage
+    assert status == "0 []"
+
+
+def test_top_level_help_skips_heavy_imports():
+    usage, status = _probe(["--help"])
+    assert "COMMAND" in usage and status == "0 []"
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the DAG stage runner and its use in the kpi run (src/pipeline/kpi.py).
+Validates parallel branches, resume after failure and selective reruns.
+"""
+import threading
+
+import pandas as pd
+import pytest
+from src.pipeline import kpi
+from src.etl.generate_synthetic_data import generate
+from src.pipeline.dag import Node, Pipeline, PipelineError
+
+def _double(x):
+    return 2 * x
+
+def _graph(tmp_path, calls, fail=()):
+    """a → {b, c} → d, con a/d persistidos en disco (``load`` solo en a)."""
+    out_a, out_d = tmp_path / "a.txt", tmp_path / "d.txt"
+
+    def step(name, fn):
+        def run(*args):
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError(f"boom {name}")
+            return fn(*args)
+        return run
+
+    def write_a():
+        out_a.write_text("1")
+        return 1
+
+    def write_d(b, c):
+        out_d.write_text(str(b + c))
+        return b + c
+
+    return [
+        Node("a", step("a", write_a), outputs=(out_a,), load=lambda: int(out_a.read_text())),
+        Node("b", step("b", lambda a: a + 10), deps=("a",)),
+        Node("c", step("c", lambda a: a + 100), deps=("a",)),
+        Node("d", step("d", write_d), deps=("b", "c"), outputs=(out_d,)),
+    ]
+
+def test_independent_nodes_run_concurrently():
+    """b y c se esperan mutuamente: solo termina si corren a la vez."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(a):
+        barrier.wait()
+        return a
+
+    nodes = [
+        Node("a", lambda: 1),
+        Node("b", meet, deps=("a",)),
+        Node("c", meet, deps=("a",)),
+        Node("d", lambda b, c: b + c, deps=("b", "c")),
+    ]
+    assert Pipeline("t", nodes, workers=2).run() == {"d": 2}
+
+def test_resume_skips_completed_stages(tmp_path):
+    calls = []
+    with pytest.raises(PipelineError) as err:
+        Pipeline("t", _graph(tmp_path, calls, fail={"c"}), state_dir=tmp_path, workers=1).run()
+    assert err.value.node == "c" and isinstance(err.value.__cause__, RuntimeError)
+
+    calls.clear()
+    result = Pipeline("t", _graph(tmp_path, calls), state_dir=tmp_path, workers=1).run(resume=True)
+    # b no tiene load(): d lo necesita, así que se recalcula; a se reconstruye desde disco
+    assert sorted(calls) == ["b", "c", "d"] and result == {"d": 112}
+
+    calls.clear()
+    assert Pipeline("t", _graph(tmp_path, calls), state_dir=tmp_path).run(resume=True) == {}
+    assert calls == []
+
+def test_rerun_node_and_downstream(tmp_path):
+    calls = []
+    Pipeline("t", _graph(tmp_path, calls), state_dir=tmp_path).run()
+    calls.clear()
+    Pipeline("t", _graph(tmp_path, calls), state_dir=tmp_path).run(rerun=["c"])
+    assert sorted(calls) == ["b", "c", "d"]  # b: entrada de d sin load()
+
+    calls.clear()  # params distintos invalidan el estado: corrida completa
+    Pipeline("t", _graph(tmp_path, calls), state_dir=tmp_path, params={"k": 2}).run(resume=True)
+    assert sorted(calls) == ["a", "b", "c", "d"]
+
+def test_process_executor_and_cycles():
+    nodes = [Node("a", int, ()), Node("b", _double, ("a",)), Node("c", _double, ("b",))]
+    assert Pipeline("p", nodes, executor="process", workers=2).run() == {"c": 0}
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline("x", [Node("a", int, ("b",)), Node("b", int, ("a",))])
+
+def test_kpi_main_resumes_after_failed_stage(tmp_path, monkeypatch):
+    raw_dir = tmp_path / "Files" / "raw"
+    raw_dir.mkdir(parents=True)
+    generate(12, 28, seed=5).to_parquet(raw_dir / "ops_daily.parquet", index=False)
+    argv = ["--lakehouse", str(tmp_path)]
+
+    kpi.main(argv)  # corrida normal: sin checkpoint semanal
+    state = tmp_path / "Files" / "state" / "dag"
+    assert not (state / "kpi.weekly.parquet").exists()
+
+    original = kpi.flag_outliers
+    monkeypatch.setattr(kpi, "flag_outliers", lambda *a, **k: 1 / 0)
+    with pytest.raises(SystemExit, match="flags"):
+        kpi.main(argv + ["--rerun", "read"])
+    assert (state / "kpi.weekly.parquet").exists() and (state / "kpi.dag_state.json").exists()
+
+    monkeypatch.setattr(kpi, "flag_outliers", original)
+    monkeypatch.setattr(kpi, "load_raw", lambda *a, **k: pytest.fail("read should be resumed"))
+    kpi.main(argv + ["--resume"])
+
+    weekly = kpi.build_agent_weekly(kpi.build_daily(generate(12, 28, seed=5)))
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "Tables" / "weekly_flags.parquet"), original(weekly), check_dtype=False
+    )
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Parity tests: Polars backend vs the pandas KPI path.
+Same weekly means, CV/CVM, quartiles and IQR flags from the same raw Parquet.
+"""
+import pandas as pd
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from src.analytics import kpi_calculations as kpi
+from src.analytics import polars_backend as pb
+from src.etl.generate_synthetic_data import generate
+from src.lakehouse.dataset import with_iso_columns, write_dataset
+
+def _assert_same(pandas_df: pd.DataFrame, polars_df) -> None:
+    pd.testing.assert_frame_equal(
+        pandas_df.reset_index(drop=True), polars_df.to_pandas(),
+        check_dtype=False, check_column_type=False, rtol=1e-12,
+    )
+
+@pytest.fixture(scope="module")
+def raw_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("raw") / "ops_daily.parquet"
+    generate(80, 120, seed=21).to_parquet(path, index=False)
+    return path
+
+def test_weekly_means_match_pandas(raw_file):
+    weekly = kpi.build_agent_weekly(kpi.build_daily(pd.read_parquet(raw_file)))
+    _assert_same(weekly, pb.build_agent_weekly(pb.build_daily(pb.scan_raw(raw_file))))
+
+@pytest.mark.parametrize("k", [1.0, 1.5])
+def test_stability_and_flags_match_pandas_exactly(raw_file, k):
+    """Misma tabla semanal (con empates forzados): CVM, cuartiles y flags idénticos bit a bit."""
+    weekly = kpi.build_agent_weekly(kpi.build_daily(pd.read_parquet(raw_file)))
+    weekly["hours_mean"] = weekly["hours_mean"].round(1)
+    weekly_pl = pl.from_pandas(weekly)
+
+    stability, stability_pl = kpi.compute_stability(weekly), pb.compute_stability(weekly_pl).to_pandas()
+    _assert_same(stability, pl.from_pandas(stability_pl))
+    for col in ("cvm_hours", "cvm_cases", "quartile_efficiency"):
+        assert stability[col].equals(stability_pl[col].astype(stability[col].dtype))
+    flags, flags_pl = kpi.flag_outliers(weekly, k=k), pb.flag_outliers(weekly_pl, k=k).to_pandas()
+    for col in kpi.FLAG_COLUMNS.values():
+        assert (flags[col].to_numpy() == flags_pl[col].to_numpy()).all()
+
+def test_hive_dataset_source_matches_file(raw_file, tmp_path):
+    write_dataset(with_iso_columns(pd.read_parquet(raw_file)), tmp_path / "ops_daily")
+    from_file = pb.build_agent_weekly(pb.build_daily(pb.scan_raw(raw_file)))
+    from_dataset = pb.build_agent_weekly(pb.build_daily(pb.scan_raw(tmp_path / "ops_daily")))
+    assert from_dataset.equals(from_file)
+
+def test_kpi_main_polars_backend_writes_same_tables(raw_file, tmp_path):
+    tables = {}
+    for backend in ("pandas", "polars"):
+        lh = tmp_path / backend
+        (lh / "Files" / "raw").mkdir(parents=True)
+        (lh / "Files" / "raw" / "ops_daily.parquet").write_bytes(raw_file.read_bytes())
+        kpi.main(["--lakehouse", str(lh), "--backend", backend, "--validate"])
+        tables[backend] = {name: pd.read_parquet(lh / "Tables" / f"{name}.parquet")
+                           for name in ("agent_stability", "weekly_flags")}
+    for name, df in tables["pandas"].items():
+        pd.testing.assert_frame_equal(df, tables["polars"][name], check_dtype=False, rtol=1e-12)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for rolling-window stability KPIs.
+Checks the online window statistics against a full recompute of each window.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analytics import kpi_calculations as kpi
+from src.analytics.rolling import RollingWindow, rolling_stability
+from src.etl.generate_synthetic_data import generate
+
+@pytest.mark.parametrize("size", [1, 4, 12])
+def test_window_matches_full_recompute(size):
+    """Con huecos (NaN), empates y filas en 0: mismo CV/CVM que recalcular cada ventana."""
+    rng = np.random.default_rng(size)
+    m = np.round(rng.normal(40, 5, (200, 40)))
+    m[rng.random(m.shape) < 0.25] = np.nan
+    m[:3] = 0.0
+    win = RollingWindow(len(m), size)
+    for t in range(m.shape[1]):
+        win.push(m[:, t])
+        window = m[:, max(0, t - size + 1): t + 1]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            np.testing.assert_allclose(win.cv(), kpi.cv_matrix(window), rtol=1e-9, atol=0)
+            np.testing.assert_array_equal(win.cvm(), kpi.cvm_matrix(window))
+
+def test_rolling_table_matches_compute_stability_per_window():
+    weekly = kpi.build_agent_weekly(kpi.build_daily(generate(40, 120, seed=3)))
+    out = rolling_stability(weekly, windows=(4, 8))
+    weeks = np.unique(weekly["iso_year"] * 100 + weekly["iso_week"])
+
+    assert set(out["window_weeks"]) == {4, 8}
+    assert len(out) == 40 * ((len(weeks) - 3) + (len(weeks) - 7))  # solo ventanas completas
+    assert out.duplicated(["agent_id", "window_weeks", "iso_year", "iso_week"]).sum() == 0
+
+    for w, t in ((4, 3), (8, len(weeks) - 1)):
+        cut = weekly[(weekly["iso_year"] * 100 + weekly["iso_week"]).isin(weeks[t - w + 1: t + 1])]
+        want = kpi.compute_stability(cut).sort_values("agent_id", ignore_index=True)
+        got = out[(out["window_weeks"] == w) & (out["iso_year"] * 100 + out["iso_week"] == weeks[t])]
+        got = got.sort_values("agent_id", ignore_index=True)
+        pd.testing.assert_frame_equal(got[want.columns], want, check_dtype=False, rtol=1e-9)
+
+def test_unrankable_window_gets_null_quartile():
+    """Sin ningún agente con 2+ semanas en la ventana no hay CV: cuartil nulo en vez de error."""
+    weekly = pd.DataFrame({
+        "agent_id": ["A1", "A2"], "team_id": ["T1", "T1"],
+        "iso_year": [2025, 2025], "iso_week": [1, 2],
+        "hours_mean": [8.0, 7.5], "cases_mean": [3.0, 2.5],
+    })
+    out = rolling_stability(weekly, windows=(1,))
+    assert out["quartile_efficiency"].isna().all()
+    assert out["n_weeks"].tolist() == [1, 1]
+
+def test_quartile_uses_first_metric_when_hours_absent():
+    """Sin hours_mean el cuartil sale del CV de la primera métrica pedida."""
+    weekly = kpi.build_agent_weekly(kpi.build_daily(generate(40, 60, seed=8)))
+    out = rolling_stability(weekly, windows=(4,), metrics=("cases_mean",))
+    assert "cv_hours" not in out.columns and out["quartile_efficiency"].notna().all()
+    week = out[out["iso_year"] * 100 + out["iso_week"] == (out["iso_year"] * 100 + out["iso_week"]).max()]
+    want = pd.qcut(week["cv_cases"], q=4, labels=[1, 2, 3, 4]).astype(int)
+    assert (week["quartile_efficiency"].astype(int) == want).all()
+    with pytest.raises(ValueError, match="métrica"):
+        rolling_stability(weekly, metrics=())
+
+def test_kpi_main_writes_rolling_table(tmp_path):
+    raw_dir = tmp_path / "Files" / "raw"
+    raw_dir.mkdir(parents=True)
+    generate(10, 42, seed=1).to_parquet(raw_dir / "ops_daily.parquet", index=False)
+    kpi.main(["--lakehouse", str(tmp_path), "--rolling", "4", "--validate"])
+
+    table = pd.read_parquet(tmp_path / "Tables" / "rolling_stability.parquet")
+    assert set(table["window_weeks"]) == {4}
+    assert table["quartile_efficiency"].between(1, 4).all()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for mergeable KLL quantile sketches.
+Reports the accuracy of the approximate path against the exact one.
+"""
+import numpy as np
+import pandas as pd
+from src.analytics.kpi_calculations import _sketch_grouped_quantiles, compute_stability, flag_outliers
+from src.analytics.sketches import KLLSketch, grouped_sketches, k_for_eps, merge_grouped, sketch_median_mad
+
+EPS = 0.01
+
+def _rank_error(data: np.ndarray, sk: KLLSketch, qs: np.ndarray) -> float:
+    s = np.sort(data)
+    est = sk.quantiles(qs)
+    ranks = np.searchsorted(s, est, side="right") / s.size
+    return float(np.max(np.abs(ranks - qs)))
+
+def test_sketch_is_exact_below_capacity():
+    """Con pocos valores no hay compactación: cuantiles exactos (cota inferior)."""
+    v = np.arange(1, 101, dtype=float)
+    sk = KLLSketch(EPS).update(v)
+    assert sk.n == 100
+    assert sk.quantile(0.0) == 1 and sk.quantile(1.0) == 100
+    assert sk.quantile(0.5) == np.median(v)
+
+def test_merged_partition_sketches_within_error_bound():
+    """Sketches por partición combinados mantienen el error de rango ≤ eps."""
+    rng = np.random.default_rng(1)
+    data = np.concatenate([rng.lognormal(2, 0.7, 60_000), rng.normal(40, 3, 40_000)])
+    parts = np.array_split(rng.permutation(data), 8)
+
+    merged = KLLSketch(EPS, seed=0)
+    for i, p in enumerate(parts):
+        merged.merge(KLLSketch(EPS, seed=i).update(p))
+
+    qs = np.linspace(0.01, 0.99, 99)
+    err = _rank_error(data, merged, qs)
+    assert merged.n == data.size
+    assert sum(l.size for l in merged.levels) < data.size / 50, "El sketch no compacta"
+    assert err <= EPS, f"Error de rango {err:.4f} > eps={EPS}"
+
+def test_merge_grouped_dicts():
+    codes = np.array([0, 1, 0, 1, 2])
+    vals = np.array([1.0, 10.0, 2.0, 20.0, 5.0])
+    a = dict(enumerate(grouped_sketches(codes[:3], vals[:3], 3, EPS)))
+    b = dict(enumerate(grouped_sketches(codes[3:], vals[3:], 3, EPS)))
+    merged = merge_grouped(a, b)
+    assert [merged[g].n for g in range(3)] == [2, 2, 1]
+
+def test_approx_kpis_accuracy_vs_exact():
+    """Precisión del modo aproximado frente al exacto en grupos grandes (reportada en asserts)."""
+    rng = np.random.default_rng(7)
+    n_agents, n_weeks = 6_000, 40
+    weekly = pd.DataFrame({
+        "agent_id": np.repeat([f"A{i:05d}" for i in range(n_agents)], n_weeks),
+        "team_id": np.repeat(rng.choice(["T1", "T2"], n_agents), n_weeks),
+        "iso_year": 2025,
+        "iso_week": np.tile(np.arange(1, n_weeks + 1), n_agents),
+    })
+    base = np.repeat(rng.normal(6, 1, n_agents), n_weeks)
+    weekly["hours_mean"] = base * (1 + rng.normal(0, 0.15, len(weekly)))
+    weekly["cases_mean"] = 3 * base * (1 + rng.standard_t(3, len(weekly)) * 0.1)
+
+    exact_f = flag_outliers(weekly)
+    approx_f = flag_outliers(weekly, approx_eps=EPS)
+    flags = ["out_hours_flag", "out_cases_flag"]
+    agree = (exact_f[flags] == approx_f[flags]).to_numpy().mean()
+    assert agree >= 0.995, f"Concordancia de flags IQR {agree:.4%}"
+
+    exact_s = compute_stability(weekly)
+    approx_s = compute_stability(weekly, approx_eps=EPS)
+    rel = np.nanmax(np.abs(approx_s["cvm_hours"] - exact_s["cvm_hours"]) / exact_s["cvm_hours"])
+    assert rel == 0, f"Error relativo máx. CVM {rel:.4f}"  # 40 semanas ≤ k: sin compactar, exacto
+    q_agree = (approx_s["quartile_efficiency"].astype(int) == exact_s["quartile_efficiency"]).mean()
+    assert q_agree >= 0.99, f"Concordancia de cuartiles {q_agree:.4%}"
+    np.testing.assert_allclose(approx_s["cv_hours"], exact_s["cv_hours"])
+
+
+def _within_rank(sorted_x: np.ndarray, est: float, q: float, eps: float) -> bool:
+    """``est`` es un cuantil ``q`` válido con tolerancia de rango ``eps``."""
+    lo = np.searchsorted(sorted_x, est, side="left") / sorted_x.size
+    hi = np.searchsorted(sorted_x, est, side="right") / sorted_x.size
+    return lo - eps <= q <= hi + eps
+
+def test_cvm_sketch_beyond_capacity_within_rank_bound():
+    """Grupos mayores que k compactan: mediana y MAD respetan el error de rango eps."""
+    eps, n_agents, n_weeks = 0.05, 200, 400
+    assert n_weeks > 4 * k_for_eps(eps)
+    rng = np.random.default_rng(11)
+    codes = np.repeat(np.arange(n_agents), n_weeks)
+    values = np.repeat(rng.normal(6, 1, n_agents), n_weeks) * rng.lognormal(0, 0.2, codes.size)
+
+    med, mad = sketch_median_mad(codes, values, n_agents, eps)
+    for g in range(n_agents):
+        x = values[codes == g]
+        assert _within_rank(np.sort(x), med[g], 0.5, eps), f"mediana fuera de cota (agente {g})"
+        assert _within_rank(np.sort(np.abs(x - med[g])), mad[g], 0.5, eps), f"MAD fuera de cota (agente {g})"
+
+    weekly = pd.DataFrame({
+        "agent_id": [f"A{c:03d}" for c in codes],
+        "team_id": "T1",
+        "iso_year": 2020 + np.tile(np.arange(n_weeks), n_agents) // 50,
+        "iso_week": 1 + np.tile(np.arange(n_weeks), n_agents) % 50,
+        "hours_mean": values,
+        "cases_mean": values,
+    })
+    approx = compute_stability(weekly, approx_eps=eps)
+    np.testing.assert_allclose(approx["cvm_hours"], 1.4826 * mad / med)
+    exact = compute_stability(weekly)
+    rel = np.max(np.abs(approx["cvm_hours"] - exact["cvm_hours"]) / exact["cvm_hours"])
+    assert 0 < rel < 0.25, f"Error relativo máx. CVM {rel:.4f}"  # compacta de verdad, error acotado
+
+def test_sharded_flag_sketches_merge_within_bound():
+    """Sketches por lote combinados con merge_grouped: Q1/Q3 dentro de eps y flags casi idénticos."""
+    eps, n = 0.02, 30_000
+    rng = np.random.default_rng(5)
+    weekly = pd.DataFrame({
+        "agent_id": [f"A{i % 3000:04d}" for i in range(n)],
+        "team_id": rng.choice(["T1", "T2", "T3"], n),
+        "iso_year": 2025,
+        "iso_week": rng.integers(1, 4, n),
+        "hours_mean": rng.standard_t(3, n) + 7,
+        "cases_mean": rng.lognormal(3, 0.4, n),
+    })
+    exact = flag_outliers(weekly)
+    sharded = flag_outliers(weekly, approx_eps=eps, shard_rows=4_000)
+    cols = ["out_hours_flag", "out_cases_flag"]
+    assert (sharded[cols] == exact[cols]).to_numpy().mean() >= 0.995
+
+    codes = weekly.groupby(["team_id", "iso_year", "iso_week"], sort=False).ngroup().to_numpy()
+    counts = np.bincount(codes)
+    assert counts.min() > k_for_eps(eps)  # todos los grupos pasan por sketches (8 lotes cada uno)
+    values = weekly["hours_mean"].to_numpy()
+    q = _sketch_grouped_quantiles(codes, values, [0.25, 0.75], len(counts), eps, shard_rows=4_000)
+    for g in range(len(counts)):
+        x = np.sort(values[codes == g])
+        assert _within_rank(x, q[g, 0], 0.25, eps) and _within_rank(x, q[g, 1], 0.75, eps)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the in-process smoke runner (scripts/smoke_check.py).
+"""
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "smoke_check", Path(__file__).resolve().parents[1] / "scripts" / "smoke_check.py"
+)
+smoke = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = smoke  # dataclasses resuelve las anotaciones vía sys.modules
+spec.loader.exec_module(smoke)
+
+def test_fabric_chain_runs_in_process(tmp_path):
+    results = smoke.run_smoke([smoke.fabric_checks(tmp_path, n_agents=6, days=21, seed=7)])
+    assert [r.name for r in results] == ["fabric.generate", "fabric.kpi", "fabric.validate"]
+    assert all(r.ok and r.seconds >= 0 for r in results), results
+    assert (tmp_path / "Files" / "raw" / "ops_daily.parquet").exists()
+    assert (tmp_path / "Tables" / "weekly_flags.parquet").exists()
+
+def test_fabric_kpi_failure_is_reported(tmp_path, monkeypatch):
+    """kpi_calculations.main sale con SystemExit: se reporta como fallo del check, sin abortar el smoke."""
+    monkeypatch.chdir(tmp_path)  # sin data/raw/ops_daily.csv de respaldo
+    kpis = dict(smoke.fabric_checks(tmp_path))["fabric.kpi"]
+    (result,) = smoke.run_chain([("fabric.kpi", kpis)])
+    assert not result.ok and "ops_daily" in result.detail
+
+def test_chains_run_concurrently_and_stop_on_failure():
+    """Dos cadenas se esperan mutuamente (solo posible en paralelo); un fallo corta su cadena."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet() -> str:
+        barrier.wait()
+        return "met"
+
+    def broken() -> str:
+        smoke.fail("sin datos")
+
+    chains = [
+        [("a.meet", meet), ("a.broken", broken), ("a.never", lambda: "ran")],
+        [("b.meet", meet)],
+    ]
+    results = smoke.run_smoke(chains)
+    assert [(r.name, r.ok) for r in results] == [("a.meet", True), ("a.broken", False), ("b.meet", True)]
+    assert results[1].detail == "sin datos"
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the content-addressed stage cache.
+Validates hits/misses on inputs and params, restore of outputs and LRU eviction.
+"""
+import json
+
+import pytest
+from src.pipeline.cache import StageCache
+
+def _stage(out, payload, calls):
+    def compute():
+        calls.append(payload)
+        out.write_text(payload)
+    return compute
+
+def test_cache_hit_restores_outputs(tmp_path):
+    """Misma entrada + parámetros → no recalcula y restaura la salida."""
+    cache = StageCache(tmp_path / ".cache")
+    src, out = tmp_path / "in.txt", tmp_path / "out" / "table.parquet"
+    src.write_text("raw-v1")
+    out.parent.mkdir()
+    calls = []
+
+    assert not cache.run("kpi", [out], _stage(out, "A", calls), inputs=[src], params={"k": 1.5})
+    out.unlink()
+    assert cache.run("kpi", [out], _stage(out, "B", calls), inputs=[src], params={"k": 1.5})
+    assert calls == ["A"] and out.read_text() == "A"
+
+    manifest = json.loads((tmp_path / ".cache" / "manifest.json").read_text())
+    assert [e["stage"] for e in manifest.values()] == ["kpi"]
+
+def test_cache_miss_on_input_or_param_change(tmp_path):
+    cache = StageCache(tmp_path / ".cache")
+    src, out = tmp_path / "in.txt", tmp_path / "out.parquet"
+    src.write_text("raw-v1")
+    calls = []
+
+    cache.run("kpi", [out], _stage(out, "A", calls), inputs=[src], params={"k": 1.5})
+    cache.run("kpi", [out], _stage(out, "B", calls), inputs=[src], params={"k": 3.0})
+    src.write_text("raw-v2")
+    cache.run("kpi", [out], _stage(out, "C", calls), inputs=[src], params={"k": 1.5})
+    assert calls == ["A", "B", "C"]
+
+def test_cache_lru_eviction_by_size(tmp_path):
+    """Al superar max_bytes se expulsa la entrada menos usada recientemente."""
+    cache = StageCache(tmp_path / ".cache", max_bytes=250)
+    out = tmp_path / "out.bin"
+    calls = []
+    for seed in (1, 2):
+        cache.run("gen", [out], _stage(out, "x" * 100 + str(seed), calls), params={"seed": seed})
+    cache.run("gen", [out], _stage(out, "unused", calls), params={"seed": 1})  # hit → seed 1 reciente
+    cache.run("gen", [out], _stage(out, "y" * 100, calls), params={"seed": 3})
+
+    manifest = json.loads((tmp_path / ".cache" / "manifest.json").read_text())
+    assert len(manifest) == 2
+    assert cache.run("gen", [out], _stage(out, "again", calls), params={"seed": 1})
+    assert not cache.run("gen", [out], _stage(out, "again", calls), params={"seed": 2})
+
+def test_cache_outputs_with_same_name_do_not_collide(tmp_path):
+    """Salidas homónimas en directorios distintos se guardan por ruta relativa."""
+    cache = StageCache(tmp_path / ".cache")
+    outs = [tmp_path / "Tables" / "a" / "part.parquet", tmp_path / "Tables" / "b" / "part.parquet"]
+
+    def compute():
+        for i, o in enumerate(outs):
+            o.parent.mkdir(parents=True, exist_ok=True)
+            o.write_text(f"table-{i}")
+
+    assert not cache.run("kpi", outs, compute, params={})
+    for o in outs:
+        o.unlink()
+    assert cache.run("kpi", outs, compute, params={})
+    assert [o.read_text() for o in outs] == ["table-0", "table-1"]
+
+def test_cache_missing_input_is_reported(tmp_path):
+    cache = StageCache(tmp_path / ".cache")
+    with pytest.raises(FileNotFoundError, match="Entrada.*'kpi'.*ops_daily.parquet"):
+        cache.key("kpi", [tmp_path / "ops_daily.parquet"])
+
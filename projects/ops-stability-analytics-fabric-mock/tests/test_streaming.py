@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the out-of-core streaming KPI pipeline.
+Validates that folding row batches reproduces the in-memory weekly table.
+"""
+import pandas as pd
+import pytest
+from src.analytics.kpi_calculations import build_agent_weekly, build_daily
+from src.analytics.streaming import iter_raw_batches, parse_memory, stream_weekly
+from src.etl.generate_synthetic_data import iter_generate, write_partitioned, write_stream
+
+def test_stream_weekly_matches_in_memory(tmp_path):
+    """Lotes pequeños (cortan semanas y agentes) ≡ build_agent_weekly en memoria."""
+    raw = tmp_path / "ops_daily.parquet"
+    write_stream(iter_generate(15, 40, seed=4, chunk_rows=100), raw, "parquet")
+
+    batches = list(iter_raw_batches(raw, batch_rows=97))
+    assert max(len(b) for b in batches) <= 97
+
+    exp = build_agent_weekly(build_daily(pd.read_parquet(raw)))
+    got = stream_weekly(raw, batch_rows=97)
+    pd.testing.assert_frame_equal(got, exp, check_exact=False)
+
+def test_stream_weekly_over_hive_dataset(tmp_path):
+    """También recorre datasets particionados (ignora columnas de partición)."""
+    root = tmp_path / "ops_daily"
+    write_partitioned(iter_generate(8, 20, seed=6, chunk_rows=50), root)
+    exp = build_agent_weekly(build_daily(pd.concat(list(iter_generate(8, 20, seed=6)))))
+    got = stream_weekly(root, batch_rows=30)
+    pd.testing.assert_frame_equal(got, exp, check_exact=False)
+
+def test_parse_memory():
+    assert parse_memory("512MB") == 512 * 2**20
+    assert parse_memory("2g") == 2 * 2**30
+    assert parse_memory("1000") == 1000
+    with pytest.raises(ValueError):
+        parse_memory("lots")
@@ -0,0 +1,26 @@
+-- Rollup materializado de ops.v_exec_finance (equipo × semana ISO)
+-- Lo mantiene src/sql/rollup.py: solo se recalculan las semanas ISO tocadas por la última carga.
+-- Requiere ops.v_exec_finance (views_enriched.sql); las columnas heredan sus tipos.
+CREATE TABLE IF NOT EXISTS ops.exec_finance_weekly AS
+SELECT * FROM ops.v_exec_finance
+WITH NO DATA;
+
+ALTER TABLE ops.exec_finance_weekly
+  ADD COLUMN IF NOT EXISTS refreshed_at timestamptz NOT NULL DEFAULT now();
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_exec_finance_weekly_key
+  ON ops.exec_finance_weekly (team_id, iso_year, iso_week);
+
+-- Dashboards filtran por semana: índice covering (index-only scan de los KPIs)
+CREATE INDEX IF NOT EXISTS ix_exec_finance_weekly_week
+  ON ops.exec_finance_weekly (iso_year, iso_week)
+  INCLUDE (team_id, revenue, hours, cost_real, margin, utilization);
+
+-- Refresh por semanas: lectura de los hechos por (semana, equipo) sin recorrer la tabla
+CREATE INDEX IF NOT EXISTS ix_synthetic_weekly_perf_week_team
+  ON ops.synthetic_weekly_perf (iso_year, iso_week, team_id)
+  INCLUDE (revenue, hours, cases_total);
+
+CREATE INDEX IF NOT EXISTS ix_synthetic_capacity_weekly_week_team
+  ON ops.synthetic_capacity_weekly (iso_year, iso_week, team_id)
+  INCLUDE (capacity_hours);
@@ -0,0 +1,60 @@
+-- Stability por agente (CV / CVM / cuartil) sobre ops.weekly_perf
+-- Dialecto común DuckDB / PostgreSQL; mismas definiciones que kpi_calculations.compute_stability:
+--   CV  = STDDEV_SAMP / AVG (NULL si la media es 0 o hay < 2 semanas)
+--   CVM = 1.4826 · MAD / mediana (NULL si la mediana es 0)
+--   quartile_efficiency = cortes en los cuantiles 0.25/0.5/0.75 de cv_hours (como pd.qcut;
+--   CV nulo → mediana). NTILE(4) reparte por conteo y difiere con empates o n no múltiplo de 4.
+WITH med AS (
+  SELECT
+    agent_id,
+    team_id,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY hours_mean) AS med_hours,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY cases_mean) AS med_cases
+  FROM ops.weekly_perf
+  GROUP BY agent_id, team_id
+),
+agg AS (
+  SELECT
+    wp.agent_id,
+    wp.team_id,
+    STDDEV_SAMP(wp.hours_mean) / NULLIF(AVG(wp.hours_mean), 0) AS cv_hours,
+    STDDEV_SAMP(wp.cases_mean) / NULLIF(AVG(wp.cases_mean), 0) AS cv_cases,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ABS(wp.hours_mean - m.med_hours)) AS mad_hours,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ABS(wp.cases_mean - m.med_cases)) AS mad_cases,
+    m.med_hours,
+    m.med_cases
+  FROM ops.weekly_perf wp
+  JOIN med m ON m.agent_id = wp.agent_id AND m.team_id = wp.team_id
+  GROUP BY wp.agent_id, wp.team_id, m.med_hours, m.med_cases
+),
+stab AS (
+  SELECT
+    agent_id,
+    team_id,
+    cv_hours,
+    (1.4826 * mad_hours / NULLIF(med_hours, 0)) AS cvm_hours,
+    cv_cases,
+    (1.4826 * mad_cases / NULLIF(med_cases, 0)) AS cvm_cases,
+    COALESCE(cv_hours, (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY cv_hours) FROM agg)) AS cv_fill
+  FROM agg
+),
+cuts AS (
+  SELECT
+    PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY cv_fill) AS q1,
+    PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY cv_fill) AS q2,
+    PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY cv_fill) AS q3
+  FROM stab
+)
+SELECT
+  s.agent_id,
+  s.team_id,
+  s.cv_hours,
+  s.cvm_hours,
+  s.cv_cases,
+  s.cvm_cases,
+  1 + (CASE WHEN s.cv_fill > c.q1 THEN 1 ELSE 0 END)
+    + (CASE WHEN s.cv_fill > c.q2 THEN 1 ELSE 0 END)
+    + (CASE WHEN s.cv_fill > c.q3 THEN 1 ELSE 0 END) AS quartile_efficiency
+FROM stab s
+CROSS JOIN cuts c
+ORDER BY s.agent_id, s.team_id;
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Carga masiva a Postgres con ``COPY FROM STDIN`` (psycopg 3)
+Cada DataFrame se transmite por trozos (CSV o binario) a una tabla temporal de
+staging y se intercambia en la tabla destino dentro de la misma transacción:
+``TRUNCATE`` + ``INSERT ... SELECT`` solo toman el lock al final, así que los
+lectores de ``ops.v_exec_finance`` ven los datos anteriores o los nuevos, nunca
+una tabla vacía. La tabla destino conserva su OID: vistas e índices siguen válidos.
+Tablas independientes se cargan en paralelo sobre un pool de conexiones.
+
+Modo ``delta`` (``upsert_table``): en lugar de vaciar la tabla, el staging se
+compara por clave primaria contra lo ya cargado y solo las filas nuevas o con
+valores distintos pasan por ``INSERT ... ON CONFLICT DO UPDATE``.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+import pandas as pd
+import psycopg
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+from .config import LOAD_MODES
+from .instrument import Instrument
+
+__all__ = [
+    "COPY_FORMATS",
+    "DEFAULT_CHUNK_ROWS",
+    "conninfo_from_env",
+    "pg_types",
+    "copy_dataframe",
+    "load_table",
+    "load_tables",
+    "upsert_table",
+    "upsert_tables",
+    "LOAD_MODES",
+]
+
+COPY_FORMATS = ("csv", "binary")
+DEFAULT_CHUNK_ROWS = 100_000
+
+# -----------------------------
+# Conexión
+# -----------------------------
+def conninfo_from_env(connect_timeout: int = 5) -> str:
+    """Conninfo desde ``POSTGRES_*`` (mismo fallback host=db → localhost que ``make_engine_from_env``)."""
+    params = {
+        "host": os.getenv("POSTGRES_HOST", "db"),
+        "port": os.getenv("POSTGRES_PORT", "5432"),
+        "dbname": os.getenv("POSTGRES_DB", "ops_analytics"),
+        "user": os.getenv("POSTGRES_USER", "ops_user"),
+        "password": os.getenv("POSTGRES_PASSWORD", "ops_pass"),
+        "connect_timeout": connect_timeout,
+    }
+    conninfo = make_conninfo(**params)
+    try:
+        psycopg.connect(conninfo).close()
+        return conninfo
+    except psycopg.OperationalError:
+        if params["host"] == "localhost":
+            raise
+    return make_conninfo(**{**params, "host": "localhost"})
+
+# -----------------------------
+# Tipos y DDL
+# -----------------------------
+def _pg_type(s: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(s):
+        return "bool"
+    if pd.api.types.is_integer_dtype(s):
+        return "int8"
+    if pd.api.types.is_float_dtype(s):
+        return "float8"
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return "timestamptz" if getattr(s.dtype, "tz", None) else "timestamp"
+    first = s.dropna().iloc[0] if s.notna().any() else None
+    if isinstance(first, dt.date) and not isinstance(first, dt.datetime):
+        return "date"
+    return "text"
+
+def pg_types(df: pd.DataFrame) -> list[str]:
+    """Tipo Postgres por columna, inferido del dtype (también usado por ``COPY`` binario)."""
+    return [_pg_type(df[c]) for c in df.columns]
+
+def _idents(cols: Iterable[str], alias: str | None = None) -> sql.Composable:
+    return sql.SQL(", ").join(sql.Identifier(alias, c) if alias else sql.Identifier(c) for c in cols)
+
+def _columns_ddl(df: pd.DataFrame) -> sql.Composable:
+    return sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(c), sql.SQL(t)) for c, t in zip(df.columns, pg_types(df))
+    )
+
+# -----------------------------
+# COPY
+# -----------------------------
+def _create_table(target: sql.Composable, df: pd.DataFrame, keys: list[str] | None) -> sql.Composable:
+    """``CREATE TABLE IF NOT EXISTS`` con los tipos de ``df`` y, si hay ``keys``, su clave primaria."""
+    if not keys:
+        return sql.SQL("CREATE TABLE IF NOT EXISTS {} ({})").format(target, _columns_ddl(df))
+    return sql.SQL("CREATE TABLE IF NOT EXISTS {} ({}, PRIMARY KEY ({}))").format(
+        target, _columns_ddl(df), _idents(keys)
+    )
+
+def _chunks(df: pd.DataFrame, chunk_rows: int) -> Iterable[pd.DataFrame]:
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start : start + chunk_rows]
+
+def _rows(chunk: pd.DataFrame) -> Iterable[tuple]:
+    # NaN/NaT → NULL; tolist() entrega escalares de Python (int/float/str/date)
+    cols = [
+        s.astype(object).where(s.notna(), None).tolist() if s.hasnans else s.tolist()
+        for _, s in chunk.items()
+    ]
+    return zip(*cols)
+
+def copy_dataframe(
+    cur: psycopg.Cursor,
+    table: sql.Composable,
+    df: pd.DataFrame,
+    fmt: str = "csv",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """
+    ``COPY table (cols) FROM STDIN`` en trozos de ``chunk_rows`` filas.
+    ``csv`` serializa cada trozo con ``to_csv`` (vacío = NULL); ``binary`` envía
+    las filas con los tipos de ``pg_types`` (sin parseo de texto en el servidor).
+    """
+    if fmt not in COPY_FORMATS:
+        raise ValueError(f"fmt must be one of {COPY_FORMATS}, got {fmt!r}")
+    cols = _idents(df.columns)
+    stmt = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT {})").format(table, cols, sql.SQL(fmt))
+    with cur.copy(stmt) as copy:
+        if fmt == "binary":
+            copy.set_types(pg_types(df))
+        for chunk in _chunks(df, chunk_rows):
+            if fmt == "csv":
+                copy.write(chunk.to_csv(index=False, header=False))
+            else:
+                for row in _rows(chunk):
+                    copy.write_row(row)
+    return len(df)
+
+# -----------------------------
+# Staging + swap
+# -----------------------------
+def load_table(
+    conn: psycopg.Connection,
+    table: str,
+    df: pd.DataFrame,
+    schema: str = "ops",
+    fmt: str = "csv",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    keys: list[str] | None = None,
+) -> int:
+    """
+    Reemplaza ``schema.table`` por ``df`` en una sola transacción:
+    1. ``CREATE TEMP TABLE`` de staging con los tipos del DataFrame (``ON COMMIT DROP``);
+    2. ``COPY`` del DataFrame al staging (sin locks sobre la tabla destino);
+    3. ``TRUNCATE`` + ``INSERT ... SELECT`` al destino (cast a los tipos del esquema).
+    Si la tabla no existe se crea con los tipos inferidos y clave primaria ``keys``
+    (la misma que usa ``upsert_table``: una carga delta posterior necesita el ``ON CONFLICT``).
+    """
+    target = sql.Identifier(schema, table)
+    staging = sql.Identifier(f"{table}__staging")
+    cols = _idents(df.columns)
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(_create_table(target, df, keys))
+        cur.execute(
+            sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(staging, _columns_ddl(df))
+        )
+        copy_dataframe(cur, staging, df, fmt=fmt, chunk_rows=chunk_rows)
+        cur.execute(sql.SQL("TRUNCATE TABLE {}").format(target))
+        cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(target, cols, cols, staging))
+    return len(df)
+
+def upsert_table(
+    conn: psycopg.Connection,
+    table: str,
+    df: pd.DataFrame,
+    keys: list[str],
+    schema: str = "ops",
+    fmt: str = "csv",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    update: bool = True,
+    touched: list[str] | None = None,
+) -> dict:
+    """
+    Upsert delta de ``df`` en ``schema.table`` (clave primaria ``keys``), en una transacción:
+    1. ``COPY`` a un staging con los tipos del DataFrame;
+    2. cast a los tipos del destino (misma precisión que lo ya cargado);
+    3. ``LEFT JOIN`` por clave: solo filas sin clave en el destino o con
+       ``ROW(valores) IS DISTINCT FROM`` se envían a ``INSERT ... ON CONFLICT DO UPDATE``.
+    Con ``update=False`` solo se insertan claves nuevas (``DO NOTHING``). Filas del
+    destino ausentes en ``df`` se conservan. Devuelve conteos inserted/updated/unchanged;
+    con ``touched`` (p.ej. ``["iso_year", "iso_week"]``) agrega ``"touched"``: los valores
+    distintos de esas columnas en las filas escritas.
+    """
+    target = sql.Identifier(schema, table)
+    raw = sql.Identifier(f"{table}__staging")
+    typed = sql.Identifier(f"{table}__typed")
+    cols = list(df.columns)
+    values = [c for c in cols if c not in keys] if update else []
+    on_key = sql.SQL(" AND ").join(
+        sql.SQL("t.{k} = s.{k}").format(k=sql.Identifier(k)) for k in keys
+    )
+    changed = sql.SQL("t.{} IS NULL").format(sql.Identifier(keys[0]))
+    if values:
+        changed = sql.SQL("{} OR ROW({}) IS DISTINCT FROM ROW({})").format(
+            changed, _idents(values, "s"), _idents(values, "t")
+        )
+        action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+            sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in values
+        ))
+    else:
+        action = sql.SQL("DO NOTHING")
+
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(_create_table(target, df, keys))
+        cur.execute(sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(raw, _columns_ddl(df)))
+        copy_dataframe(cur, raw, df, fmt=fmt, chunk_rows=chunk_rows)
+        cur.execute(sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+            typed, _idents(cols), target
+        ))
+        cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(typed, _idents(cols), _idents(cols), raw))
+        cur.execute(sql.SQL(
+            "INSERT INTO {target} ({cols}) SELECT {s_cols} FROM {typed} s "
+            "LEFT JOIN {target} t ON {on_key} WHERE {changed} "
+            "ON CONFLICT ({keys}) {action} RETURNING (xmax = 0){extra}"
+        ).format(
+            target=target, cols=_idents(cols), s_cols=_idents(cols, "s"), typed=typed,
+            on_key=on_key, changed=changed, keys=_idents(keys), action=action,
+            extra=sql.SQL(", {}").format(_idents(touched)) if touched else sql.SQL(""),
+        ))
+        rows = cur.fetchall()
+    inserted = sum(r[0] for r in rows)
+    updated = len(rows) - inserted
+    stats = {"inserted": inserted, "updated": updated, "unchanged": len(df) - inserted - updated}
+    if touched:
+        stats["touched"] = sorted({tuple(r[1:]) for r in rows})
+    return stats
+
+def _parallel(
+    dfs: dict[str, pd.DataFrame],
+    conninfo: str,
+    schema: str,
+    workers: int,
+    inst: Instrument | None,
+    task: Callable[[psycopg.Connection, str], object],
+) -> dict:
+    """Ejecuta ``task(conn, name)`` por tabla sobre un pool (primero las más grandes)."""
+    inst = inst or Instrument("seed")
+    workers = max(1, min(workers, len(dfs)))
+    with psycopg.connect(conninfo, autocommit=True) as cx:
+        cx.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+
+    def _one(name: str):
+        with inst.stage(f"load_{name}", rows_in=len(dfs[name])) as st:
+            with pool.connection() as conn:
+                result = task(conn, name)
+            st.rows_out = len(dfs[name])
+        return result
+
+    order = sorted(dfs, key=lambda n: len(dfs[n]), reverse=True)
+    with ConnectionPool(conninfo, min_size=1, max_size=workers, open=True) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            done = dict(zip(order, ex.map(_one, order)))
+    return {name: done[name] for name in dfs}
+
+def load_tables(
+    dfs: dict[str, pd.DataFrame],
+    conninfo: str,
+    schema: str = "ops",
+    prefix: str = "synthetic_",
+    workers: int = 4,
+    fmt: str = "csv",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    inst: Instrument | None = None,
+    keys: dict[str, list[str]] | None = None,
+) -> dict[str, int]:
+    """
+    Carga cada ``dfs[name]`` en ``schema.<prefix><name>`` con ``load_table``,
+    hasta ``workers`` tablas a la vez (un pool de conexiones; primero las más grandes).
+    ``keys[name]`` es la clave primaria si la tabla se crea aquí.
+    Con ``inst`` cada tabla es una etapa ``load_<name>``; en paralelo el pico de
+    memoria es el del proceso. Devuelve filas cargadas por tabla.
+    """
+    keys = keys or {}
+
+    def _load(conn: psycopg.Connection, name: str) -> int:
+        n = load_table(conn, f"{prefix}{name}", dfs[name], schema, fmt, chunk_rows, keys.get(name))
+        print(f"🗄 Loaded {schema}.{prefix}{name} ({n:,} rows, COPY {fmt})")
+        return n
+
+    return _parallel(dfs, conninfo, schema, workers, inst, _load)
+
+def upsert_tables(
+    dfs: dict[str, pd.DataFrame],
+    keys: dict[str, list[str]],
+    conninfo: str,
+    schema: str = "ops",
+    prefix: str = "synthetic_",
+    workers: int = 4,
+    fmt: str = "csv",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    inst: Instrument | None = None,
+    update: bool = True,
+    touched: list[str] | None = None,
+) -> dict[str, dict]:
+    """
+    Como ``load_tables`` pero en modo delta (``upsert_table`` con ``keys[name]``).
+    ``touched`` se pide solo a las tablas que tienen todas esas columnas.
+    """
+    def _upsert(conn: psycopg.Connection, name: str) -> dict:
+        track = touched if touched and set(touched) <= set(dfs[name].columns) else None
+        stats = upsert_table(conn, f"{prefix}{name}", dfs[name], keys[name], schema, fmt, chunk_rows, update, track)
+        print(
+            f"🗄 Upserted {schema}.{prefix}{name}: {stats['inserted']:,} inserted, "
+            f"{stats['updated']:,} updated, {stats['unchanged']:,} unchanged"
+        )
+        return stats
+
+    return _parallel(dfs, conninfo, schema, workers, inst, _upsert)
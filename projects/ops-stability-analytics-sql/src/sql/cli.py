@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Declaración de argumentos de los entry points (seed, load)
+Solo stdlib: ``<cmd> --help`` en la CLI unificada construye el parser desde aquí sin
+importar pandas, NumPy ni psycopg. Cada ``main(argv)`` usa el mismo parser.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from .config import DEFAULT_SEED, FILES, LOAD_MODES, N_AGENTS, TEAMS, WEEKS
+
+__all__ = [
+    "seed_parser",
+    "load_parser",
+]
+
+# -----------------------------
+# Parsers por subcomando
+# -----------------------------
+def seed_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``src.sql.generate_rich_seed``."""
+    parser = argparse.ArgumentParser(description="Generate the enriched synthetic seed (Parquet + optional Postgres)")
+    parser.add_argument("--agents", type=int, default=int(os.getenv("SEED_AGENTS", N_AGENTS)), help="Number of agents")
+    parser.add_argument("--weeks", type=int, default=int(os.getenv("SEED_WEEKS", WEEKS)), help="ISO weeks of history")
+    parser.add_argument("--teams", type=int, default=len(TEAMS), help="Number of teams (T1..Tn)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--case-detail", action="store_true", help="Also write case_events.parquet (one row per case)")
+    parser.add_argument("--load-workers", type=int, default=4, help="Tables loaded concurrently (WRITE_DB=1)")
+    parser.add_argument("--copy-format", choices=["csv", "binary"], default="binary", help="COPY FROM STDIN format")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows per COPY chunk")
+    parser.add_argument("--load-mode", choices=["full", "delta"], default=os.getenv("LOAD_MODE", "full"),
+                        help="full: staging swap; delta: upsert only new/changed rows by primary key")
+    parser.add_argument("--out-dir", type=Path, default=FILES, help="Parquet output directory")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Independent stages (builders, Parquet writes) run at once")
+    return parser
+
+def load_parser() -> argparse.ArgumentParser:
+    """Argumentos de ``src.sql.load_kpis``."""
+    parser = argparse.ArgumentParser(description="Load lakehouse KPI tables into ops.weekly_perf / ops.agent_stability")
+    parser.add_argument("--tables-dir", type=Path, default=Path(os.getenv("KPI_TABLES_DIR", "lakehouse_sim/Tables")),
+                        help="Directory with weekly_flags / agent_stability (file or dataset)")
+    parser.add_argument("--mode", choices=LOAD_MODES, default="delta", help="delta: upsert changed rows; full: replace")
+    parser.add_argument("--workers", type=int, default=2, help="Tables loaded concurrently")
+    parser.add_argument("--copy-format", choices=["csv", "binary"], default="binary", help="COPY FROM STDIN format")
+    return parser
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Valores por defecto del seed y de la carga a Postgres
+Solo stdlib: ``src/sql/cli.py`` los usa para declarar argumentos sin importar
+pandas, NumPy ni psycopg.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+DEFAULT_SEED = 123
+
+N_AGENTS = 60
+TEAMS = [f"T{i}" for i in range(1, 7)]
+WEEKS = 26
+
+# Lakehouse sim outputs (parquet); los directorios se crean al escribir
+LH = Path("lakehouse_sim")
+FILES = LH / "Files" / "enriched"
+TABLES = LH / "Tables"
+
+# full: staging + swap; delta: upsert por clave primaria
+LOAD_MODES = ("full", "delta")
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Runner del seed como grafo de etapas (DAG)
+Cada ``Node`` declara sus dependencias (``deps``) y los archivos que escribe
+(``outputs``, para los bytes del manifest). Los nodos independientes corren en
+paralelo en un pool de hilos; el valor de un nodo se libera en cuanto terminan
+todos sus consumidores:
+
+    Pipeline("seed", nodes, workers=4, inst=inst).run()   # → valores de los sumideros
+
+Subconjunto del runner de fabric-mock (``src/pipeline/dag.py``): el seed se
+regenera completo en cada corrida, sin estado persistido ni reanudación.
+"""
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from .instrument import Instrument
+
+__all__ = [
+    "Node",
+    "PipelineError",
+    "Pipeline",
+]
+
+@dataclass(frozen=True)
+class Node:
+    """Etapa del grafo: ``fn(*valores de deps)``; ``outputs`` suma sus bytes a la etapa."""
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+    outputs: tuple[Path, ...] = ()
+
+class PipelineError(RuntimeError):
+    """Falló una etapa; ``node`` es su nombre y ``__cause__`` la excepción original."""
+
+    def __init__(self, node: str, exc: BaseException) -> None:
+        super().__init__(f"stage '{node}' failed: {type(exc).__name__}: {exc}")
+        self.node = node
+
+class Pipeline:
+    def __init__(
+        self,
+        name: str,
+        nodes: Sequence[Node],
+        workers: int = 4,
+        inst: Instrument | None = None,
+    ) -> None:
+        self.name = name
+        self.nodes = {n.name: n for n in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("duplicate node names")
+        for n in nodes:
+            missing = [d for d in n.deps if d not in self.nodes]
+            if missing:
+                raise ValueError(f"node '{n.name}' depends on unknown {missing}")
+        self.order = self._toposort()
+        self.workers = max(1, workers)
+        self.inst = inst or Instrument(name)
+
+    # -----------------------------
+    # Grafo
+    # -----------------------------
+    def _toposort(self) -> list[str]:
+        """Orden topológico estable (orden de declaración entre nodos listos); falla si hay ciclos."""
+        indeg = {name: len(n.deps) for name, n in self.nodes.items()}
+        order, ready = [], [name for name in self.nodes if indeg[name] == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other in self.dependents(name):
+                indeg[other] -= 1
+                if indeg[other] == 0:
+                    ready.append(other)
+        if len(order) != len(self.nodes):
+            raise ValueError(f"cycle among {sorted(set(self.nodes) - set(order))}")
+        return order
+
+    def dependents(self, name: str) -> list[str]:
+        return [n.name for n in self.nodes.values() if name in n.deps]
+
+    # -----------------------------
+    # Ejecución
+    # -----------------------------
+    def _execute(self, node: Node, args: list) -> Any:
+        """Ejecuta un nodo dentro de su etapa de ``inst`` (con ``workers > 1``, medidas de proceso)."""
+        rows_in = [_rows(a) for a in args]
+        with self.inst.stage(node.name, rows_in=sum(rows_in) if args and None not in rows_in else None,
+                             concurrent=self.workers > 1) as st:
+            out = node.fn(*args)
+            st.rows_out = _rows(out)
+            for p in node.outputs:
+                st.output(p)
+        return out
+
+    def run(self) -> dict[str, Any]:
+        """
+        Ejecuta el grafo con hasta ``workers`` nodos a la vez. Devuelve los valores de los
+        sumideros (nodos sin consumidores). Ante un fallo no lanza nodos nuevos, espera a
+        los que están en curso y lanza ``PipelineError``.
+        """
+        consumers = {name: len(self.dependents(name)) for name in self.nodes}
+        values: dict[str, Any] = {}
+        results: dict[str, Any] = {}
+        pending = list(self.order)
+        running: dict[Future, str] = {}
+        failed: tuple[str, BaseException] | None = None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while running or (pending and failed is None):
+                busy = set(running.values())
+                ready = [n for n in pending if not any(d in pending or d in busy for d in self.nodes[n].deps)]
+                for name in ready[: self.workers - len(running)] if failed is None else []:
+                    node = self.nodes[name]
+                    pending.remove(name)
+                    running[pool.submit(self._execute, node, [values[d] for d in node.deps])] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    if fut.exception() is not None:
+                        failed = failed or (name, fut.exception())
+                        continue
+                    if consumers[name]:
+                        values[name] = fut.result()
+                    else:
+                        results[name] = fut.result()
+                    for dep in self.nodes[name].deps:
+                        consumers[dep] -= 1
+                        if consumers[dep] == 0:
+                            values.pop(dep, None)
+        if failed is not None:
+            raise PipelineError(*failed) from failed[1]
+        return results
+
+def _rows(value: Any) -> int | None:
+    try:
+        return len(value)
+    except TypeError:
+        return value if isinstance(value, int) else None
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Motor embebido (DuckDB) para la capa SQL sobre el lakehouse Parquet
+Registra ``lakehouse_sim/Files/enriched/*.parquet`` como ``ops.synthetic_*`` y
+ejecuta los mismos archivos SQL que Postgres (``sql/views_enriched.sql`` y
+``sql/stability.sql``) en proceso, con ejecución vectorizada: sin red ni contenedor.
+
+    con = connect()                      # vistas ops.* sobre el Parquet
+    exec_finance(con)                    # ops.v_exec_finance → DataFrame
+    stability(con)                       # CV/CVM/cuartil por agente → DataFrame
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+__all__ = [
+    "SQL_DIR",
+    "DEFAULT_FILES_DIR",
+    "connect",
+    "register_parquet",
+    "run_sql_file",
+    "exec_finance",
+    "stability",
+]
+
+SQL_DIR = Path(__file__).resolve().parents[2] / "sql"
+DEFAULT_FILES_DIR = Path("lakehouse_sim") / "Files" / "enriched"
+
+# ops.weekly_perf (schema.sql) derivada de la tabla enriquecida cuando no hay KPIs del lakehouse
+WEEKLY_PERF_FROM_SYNTHETIC = """
+CREATE OR REPLACE VIEW ops.weekly_perf AS
+SELECT agent_id, team_id, iso_week, iso_year, hours_mean, cases_mean, out_hours_flag, out_cases_flag
+FROM ops.synthetic_weekly_perf
+"""
+
+# -----------------------------
+# Registro de tablas
+# -----------------------------
+def _sql_string(value: str) -> str:
+    """Literal de cadena SQL con comillas simples escapadas (DDL de vistas no admite parámetros)."""
+    return "'" + value.replace("'", "''") + "'"
+
+def _parquet_source(path: Path) -> str:
+    """Expresión ``read_parquet`` para un archivo o un dataset Hive (directorio)."""
+    path = Path(path)
+    if path.is_dir():
+        glob = (path / "**" / "*.parquet").as_posix()
+        return f"read_parquet({_sql_string(glob)}, hive_partitioning = true)"
+    return f"read_parquet({_sql_string(path.as_posix())})"
+
+def register_parquet(con: duckdb.DuckDBPyConnection, name: str, path: Path) -> None:
+    """Crea (o reemplaza) la vista ``name`` sobre el Parquet en ``path``; sin copiar datos."""
+    con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {_parquet_source(path)}")
+
+def run_sql_file(con: duckdb.DuckDBPyConnection, path: Path) -> duckdb.DuckDBPyConnection:
+    """Ejecuta un archivo ``.sql`` (una o varias sentencias) y devuelve la conexión."""
+    return con.execute(Path(path).read_text(encoding="utf-8"))
+
+def connect(
+    files_dir: Path = DEFAULT_FILES_DIR,
+    tables_dir: Path | None = None,
+    database: str = ":memory:",
+    threads: int | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """
+    Conexión DuckDB con el esquema ``ops`` listo:
+    - ``ops.synthetic_<nombre>`` por cada ``files_dir/<nombre>.parquet``;
+    - ``ops.v_exec_finance`` desde ``sql/views_enriched.sql``;
+    - ``ops.weekly_perf`` desde ``tables_dir/weekly_flags`` (salida de kpi_calculations,
+      archivo o dataset) o, sin ``tables_dir``, desde ``ops.synthetic_weekly_perf``.
+    """
+    con = duckdb.connect(database)
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    con.execute("CREATE SCHEMA IF NOT EXISTS ops")
+    for path in sorted(Path(files_dir).glob("*.parquet")):
+        register_parquet(con, f"ops.synthetic_{path.stem}", path)
+
+    run_sql_file(con, SQL_DIR / "views_enriched.sql")
+    if tables_dir is not None:
+        src = Path(tables_dir) / "weekly_flags"
+        register_parquet(con, "ops.weekly_perf", src if src.is_dir() else src.with_suffix(".parquet"))
+    elif (Path(files_dir) / "weekly_perf.parquet").exists():
+        con.execute(WEEKLY_PERF_FROM_SYNTHETIC)
+    return con
+
+# -----------------------------
+# Consultas
+# -----------------------------
+def exec_finance(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    """``ops.v_exec_finance`` ordenada por equipo/semana ISO."""
+    return con.execute(
+        "SELECT * FROM ops.v_exec_finance ORDER BY team_id, iso_year, iso_week"
+    ).df()
+
+def stability(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    """CV/CVM/cuartil por agente (``sql/stability.sql``) sobre ``ops.weekly_perf``."""
+    return run_sql_file(con, SQL_DIR / "stability.sql").df()
+
+# -----------------------------
+# CLI
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ops SQL layer in-process (DuckDB) over lakehouse Parquet")
+    parser.add_argument("query", choices=["exec_finance", "stability"], help="Query to run")
+    parser.add_argument("--files-dir", type=Path, default=DEFAULT_FILES_DIR, help="Enriched Parquet directory")
+    parser.add_argument("--tables-dir", type=Path, default=None,
+                        help="Lakehouse Tables/ with weekly_flags (default: derive from synthetic_weekly_perf)")
+    parser.add_argument("--out", type=Path, default=None, help="Write the result to this Parquet file")
+    args = parser.parse_args()
+
+    con = connect(args.files_dir, args.tables_dir)
+    df = exec_finance(con) if args.query == "exec_finance" else stability(con)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(args.out, index=False)
+        print(f"💾 Wrote {len(df):,} rows → {args.out}")
+    else:
+        print(df.to_string(index=False, max_rows=20))
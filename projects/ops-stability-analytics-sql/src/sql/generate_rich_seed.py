@@ -6,16 +6,16 @@ import numpy as np
 import pandas as pd
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.exc import OperationalError
+
+from .cli import seed_parser
+from .config import DEFAULT_SEED, FILES, LOAD_MODES, N_AGENTS, TEAMS, WEEKS
+from .dag import Node, Pipeline
+from .instrument import Instrument, instrument_from_env
 
 # ----------------------------
 # Configuración y constantes
 # ----------------------------
-RNG = np.random.default_rng(123)
-
-N_AGENTS = 60
-TEAMS = [f"T{i}" for i in range(1, 7)]
+# DEFAULT_SEED, N_AGENTS, TEAMS, WEEKS y rutas de salida: src/sql/config.py (solo stdlib)
 ROLES = ["Analyst", "Senior Analyst", "Lead"]
 SALARY_BANDS = {
     "Analyst": (18000, 26000),
@@ -27,67 +27,52 @@ HOURS_CAPACITY_WEEK = {"Analyst": 40, "Senior Analyst": 42, "Lead": 45}
 CASE_TYPES = ["Standard", "Priority", "Escalation"]
 CASE_PRICE = {"Standard": 110.0, "Priority": 150.0, "Escalation": 220.0}
 
-WEEKS = 26
-
-# Lakehouse sim outputs (parquet)
-LH = Path("lakehouse_sim")
-FILES = LH / "Files" / "enriched"
-TABLES = LH / "Tables"
-for p in [FILES, TABLES]:
-    p.mkdir(parents=True, exist_ok=True)
-
 # ----------------------------
 # Utilidades
 # ----------------------------
-def _random_salary(role: str) -> float:
-    lo, hi = SALARY_BANDS[role]
-    return float(RNG.normal((lo + hi) / 2, (hi - lo) / 6))
-
-def _hourly_cost(monthly_salary: float) -> float:
-    # Costo/hora aprox: salario mensual / (4.33 semanas * 40h) + 25% overhead
+def _hourly_cost(monthly_salary):
+    # Costo/hora aprox: salario mensual / (4.33 semanas * 40h) + 25% overhead (escalar o arreglo)
     base = monthly_salary / (4.33 * 40.0)
-    return float(base * 1.25)
+    return base * 1.25
+
+def _rng(rng: np.random.Generator | None) -> np.random.Generator:
+    """Generador recibido o uno nuevo con ``DEFAULT_SEED`` (sin estado global entre llamadas)."""
+    return rng if rng is not None else np.random.default_rng(DEFAULT_SEED)
 
 # ----------------------------
 # Constructores de dataframes
 # ----------------------------
-def build_dimensions():
+def build_dimensions(
+    n_agents: int = N_AGENTS,
+    teams: list[str] | None = None,
+    rng: np.random.Generator | None = None,
+):
+    """Dimensiones team / agent / case_pricing; sorteos de rol, salario y antigüedad en bloque."""
+    teams = list(teams or TEAMS)
+    rng = _rng(rng)
+
     # Teams
     df_team = pd.DataFrame(
-        {"team_id": TEAMS, "team_name": [f"Team {t[1:]}" for t in TEAMS]}
+        {"team_id": teams, "team_name": [f"Team {t[1:]}" for t in teams]}
     )
 
     # Agents
-    agents = []
-    for i in range(1, N_AGENTS + 1):
-        role = RNG.choice(ROLES, p=[0.55, 0.35, 0.10])
-        team = TEAMS[(i % len(TEAMS))]
-        salary = max(10000.0, _random_salary(role))
-        hourly = _hourly_cost(salary)
-        hire_date = pd.Timestamp.today().normalize() - pd.Timedelta(
-            days=int(RNG.integers(120, 1200))
-        )
-        agents.append(
-            (
-                f"AG{str(i).zfill(3)}",
-                team,
-                role,
-                round(salary, 2),
-                round(hourly, 2),
-                hire_date.date(),
-            )
-        )
-    df_agent = pd.DataFrame(
-        agents,
-        columns=[
-            "agent_id",
-            "team_id",
-            "role",
-            "monthly_salary",
-            "hourly_cost",
-            "hire_date",
-        ],
+    ids = np.arange(1, n_agents + 1)
+    r_idx = rng.choice(len(ROLES), size=n_agents, p=[0.55, 0.35, 0.10])
+    lo, hi = np.array([SALARY_BANDS[r] for r in ROLES], dtype=float).T
+    salary = np.maximum(10000.0, rng.normal((lo + hi)[r_idx] / 2, (hi - lo)[r_idx] / 6))
+    hourly = _hourly_cost(salary)
+    hire_date = pd.Timestamp.today().normalize() - pd.to_timedelta(
+        rng.integers(120, 1200, size=n_agents), unit="D"
     )
+    df_agent = pd.DataFrame({
+        "agent_id": [f"AG{str(i).zfill(3)}" for i in ids],
+        "team_id": np.asarray(teams, dtype=object)[ids % len(teams)],
+        "role": np.asarray(ROLES, dtype=object)[r_idx],
+        "monthly_salary": salary.round(2),
+        "hourly_cost": hourly.round(2),
+        "hire_date": hire_date.date,
+    })
 
     # Pricing por tipo de caso
     df_case_price = pd.DataFrame(
@@ -97,10 +82,10 @@ def build_dimensions():
 
     return df_team, df_agent, df_case_price
 
-def build_calendar_weeks():
-    # Últimas WEEKS semanas ISO
-    end = pd.Timestamp.today().normalize()
-    start = end - pd.Timedelta(weeks=WEEKS)
+def build_calendar_weeks(weeks: int = WEEKS, end: pd.Timestamp | None = None):
+    """Últimas ``weeks`` semanas ISO (una fila por año/semana) hasta ``end`` (hoy por defecto)."""
+    end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+    start = end - pd.Timedelta(weeks=weeks)
     days = pd.date_range(start=start, end=end, freq="D")
     cal = pd.DataFrame({"date": days})
     iso = cal["date"].dt.isocalendar()
@@ -111,109 +96,184 @@ def build_calendar_weeks():
     )
     return cal[["iso_year", "iso_week"]].reset_index(drop=True)
 
-def build_capacity_budget(df_agent: pd.DataFrame, cal_weeks: pd.DataFrame):
-    # Capacidad por agente/semana y presupuesto por equipo/semana
-    rows_cap, rows_budget = [], []
-
-    for _, a in df_agent.iterrows():
-        role = a["role"]
-        cap = HOURS_CAPACITY_WEEK[role]
-        for _, w in cal_weeks.iterrows():
-            rows_cap.append(
-                (a["agent_id"], a["team_id"], int(w["iso_year"]), int(w["iso_week"]), cap)
-            )
-    df_capacity = pd.DataFrame(
-        rows_cap, columns=["agent_id", "team_id", "iso_year", "iso_week", "capacity_hours"]
-    )
-
-    team_hourly_mean = df_agent.groupby("team_id")["hourly_cost"].mean().to_dict()
-    for team in TEAMS:
-        for _, w in cal_weeks.iterrows():
-            cap_team = df_capacity.loc[
-                (df_capacity["team_id"] == team)
-                & (df_capacity["iso_year"] == w["iso_year"])
-                & (df_capacity["iso_week"] == w["iso_week"]),
-                "capacity_hours",
-            ].sum()
-            planned_hours = float(cap_team * 0.85 * RNG.uniform(0.95, 1.05))
-            planned_cost = planned_hours * float(team_hourly_mean[team])
-            rows_budget.append(
-                (team, int(w["iso_year"]), int(w["iso_week"]), round(planned_hours, 2), round(planned_cost, 2))
-            )
-    df_budget = pd.DataFrame(
-        rows_budget, columns=["team_id", "iso_year", "iso_week", "planned_hours", "planned_cost"]
-    )
+def build_capacity_budget(
+    df_agent: pd.DataFrame,
+    cal_weeks: pd.DataFrame,
+    teams: list[str] | None = None,
+    rng: np.random.Generator | None = None,
+):
+    """
+    Capacidad por agente/semana (agentes × semanas con repeat/tile) y presupuesto por
+    equipo/semana. La capacidad de un equipo no depende de la semana, así que se agrega
+    una sola vez por equipo y el factor de plan se sortea en bloque.
+    Equipos sin agentes quedan con capacidad 0 y costo NaN.
+    """
+    teams = list(teams or TEAMS)
+    rng = _rng(rng)
+    n_w = len(cal_weeks)
+    years = cal_weeks["iso_year"].to_numpy()
+    weeks = cal_weeks["iso_week"].to_numpy()
+
+    agent_cap = df_agent["role"].map(HOURS_CAPACITY_WEEK).to_numpy()
+    df_capacity = pd.DataFrame({
+        "agent_id": np.repeat(df_agent["agent_id"].to_numpy(), n_w),
+        "team_id": np.repeat(df_agent["team_id"].to_numpy(), n_w),
+        "iso_year": np.tile(years, len(df_agent)),
+        "iso_week": np.tile(weeks, len(df_agent)),
+        "capacity_hours": np.repeat(agent_cap, n_w),
+    })
+
+    team_cap = pd.Series(agent_cap, index=df_agent["team_id"]).groupby(level=0).sum()
+    team_cap = team_cap.reindex(teams, fill_value=0).to_numpy(dtype=float)
+    team_hourly_mean = df_agent.groupby("team_id")["hourly_cost"].mean().reindex(teams).to_numpy()
+
+    df_budget = pd.DataFrame({
+        "team_id": np.repeat(np.asarray(teams, dtype=object), n_w),
+        "iso_year": np.tile(years, len(teams)),
+        "iso_week": np.tile(weeks, len(teams)),
+    })
+    planned_hours = np.repeat(team_cap, n_w) * 0.85 * rng.uniform(0.95, 1.05, size=len(df_budget))
+    planned_cost = planned_hours * np.repeat(team_hourly_mean, n_w)
+    df_budget["planned_hours"] = planned_hours.round(2)
+    df_budget["planned_cost"] = planned_cost.round(2)
     return df_capacity, df_budget
 
-def build_weekly_perf(df_agent: pd.DataFrame, cal_weeks: pd.DataFrame, df_case_price: pd.DataFrame):
-    # Rendimiento semanal por agente, con estacionalidad y mix de casos
-    records = []
-    for _, a in df_agent.iterrows():
-        base_hours = RNG.normal(34, 4)
-        for _, w in cal_weeks.iterrows():
-            season = 1.0 + 0.10 * np.sin((w["iso_week"] % 10) / 10 * 2 * np.pi)
-            hours = max(10.0, RNG.normal(base_hours * season, 3.0))
-
-            mix = RNG.dirichlet([8, 3, 1])  # mayormente Standard
-            cases_total = max(5.0, RNG.normal(hours * RNG.uniform(2.4, 3.4), 4.0))
-            cases = (cases_total * mix).round(0).astype(int)
-            case_counts = dict(zip(CASE_TYPES, cases))
-            revenue = sum(case_counts[ct] * CASE_PRICE[ct] for ct in CASE_TYPES)
-
-            # Flags simples (IQR-like aprox)
-            cph = cases_total / max(hours, 1.0)
-            out_hours = int(hours < 24 or hours > 50)
-            out_cases = int(cph < 1.8 or cph > 4.2)
-
-            records.append(
-                (
-                    a["agent_id"],
-                    a["team_id"],
-                    int(w["iso_year"]),
-                    int(w["iso_week"]),
-                    float(hours),
-                    float(cases_total),
-                    int(case_counts["Standard"]),
-                    int(case_counts["Priority"]),
-                    int(case_counts["Escalation"]),
-                    float(revenue),
-                    out_hours,
-                    out_cases,
-                )
-            )
-
-    cols = [
-        "agent_id",
-        "team_id",
-        "iso_year",
-        "iso_week",
-        "hours",
-        "cases_total",
-        "cases_standard",
-        "cases_priority",
-        "cases_escalation",
-        "revenue",
-        "out_hours_flag",
-        "out_cases_flag",
-    ]
-    df_wp = pd.DataFrame(records, columns=cols)
+WEEKLY_PERF_COLS = [
+    "agent_id",
+    "team_id",
+    "iso_year",
+    "iso_week",
+    "hours",
+    "cases_total",
+    "cases_standard",
+    "cases_priority",
+    "cases_escalation",
+    "revenue",
+    "out_hours_flag",
+    "out_cases_flag",
+]
+
+def build_weekly_perf(
+    df_agent: pd.DataFrame,
+    cal_weeks: pd.DataFrame,
+    df_case_price: pd.DataFrame,
+    rng: np.random.Generator | None = None,
+):
+    """
+    Rendimiento semanal por agente, con estacionalidad y mix de casos.
+    Simulación en bloque sobre la grilla agentes × semanas (orden agente, semana):
+    cada sorteo (horas base, horas, mix Dirichlet, tasa y total de casos) es un
+    solo llamado al generador; revenue = conteos por tipo · precio.
+    """
+    rng = _rng(rng)
+    n_a, n_w = len(df_agent), len(cal_weeks)
+    n = n_a * n_w
+    iso_week = cal_weeks["iso_week"].to_numpy()
+
+    base_hours = rng.normal(34, 4, size=n_a)
+    season = 1.0 + 0.10 * np.sin((iso_week % 10) / 10 * 2 * np.pi)
+    hours = np.maximum(10.0, rng.normal(np.outer(base_hours, season).ravel(), 3.0))
+
+    mix = rng.dirichlet([8, 3, 1], size=n)  # mayormente Standard
+    rate = rng.uniform(2.4, 3.4, size=n)
+    cases_total = np.maximum(5.0, rng.normal(hours * rate, 4.0))
+    cases = (cases_total[:, None] * mix).round(0).astype(np.int64)
+    price = df_case_price.set_index("case_type")["price_per_case"].reindex(CASE_TYPES).to_numpy(dtype=float)
+    revenue = cases @ price
+
+    # Flags simples (IQR-like aprox)
+    cph = cases_total / np.maximum(hours, 1.0)
+    out_hours = ((hours < 24) | (hours > 50)).astype(np.int64)
+    out_cases = ((cph < 1.8) | (cph > 4.2)).astype(np.int64)
+
+    df_wp = pd.DataFrame({
+        "agent_id": np.repeat(df_agent["agent_id"].to_numpy(), n_w),
+        "team_id": np.repeat(df_agent["team_id"].to_numpy(), n_w),
+        "iso_year": np.tile(cal_weeks["iso_year"].to_numpy(dtype=np.int64), n_a),
+        "iso_week": np.tile(iso_week.astype(np.int64), n_a),
+        "hours": hours,
+        "cases_total": cases_total,
+        "cases_standard": cases[:, 0],
+        "cases_priority": cases[:, 1],
+        "cases_escalation": cases[:, 2],
+        "revenue": revenue,
+        "out_hours_flag": out_hours,
+        "out_cases_flag": out_cases,
+    }, columns=WEEKLY_PERF_COLS)
 
     # Medias “semanales” compatibles con modelo
     df_wp["hours_mean"] = df_wp["hours"]
     df_wp["cases_mean"] = df_wp["cases_total"]
     return df_wp
 
+def build_case_events(
+    df_wp: pd.DataFrame,
+    df_case_price: pd.DataFrame,
+    rng: np.random.Generator | None = None,
+):
+    """
+    Detalle a nivel de caso: una fila por caso de ``df_wp`` (conteos por tipo).
+    Se expande con ``np.repeat`` sobre los conteos y el día de la semana se sortea
+    en bloque; agent/team/case_type quedan como categóricos (diccionario en Parquet)
+    y año/semana ISO como int16: el detalle tiene ~100 filas por agente-semana.
+    """
+    rng = _rng(rng)
+    counts = df_wp[["cases_standard", "cases_priority", "cases_escalation"]].to_numpy().ravel()
+    n_types = len(CASE_TYPES)
+    row = np.repeat(np.repeat(np.arange(len(df_wp)), n_types), counts)
+    ctype = np.repeat(np.tile(np.arange(n_types), len(df_wp)), counts)
+
+    # Lunes de cada semana ISO (sobre semanas únicas) + día sorteado
+    yw = df_wp["iso_year"].to_numpy() * 100 + df_wp["iso_week"].to_numpy()
+    uniq, w_idx = np.unique(yw, return_inverse=True)
+    monday = pd.to_datetime([f"{u // 100}-W{u % 100:02d}-1" for u in uniq], format="%G-W%V-%u").to_numpy()
+    date = monday[w_idx[row]] + rng.integers(0, 7, size=len(row)).astype("timedelta64[D]")
+
+    agent = pd.Categorical(df_wp["agent_id"])
+    team = pd.Categorical(df_wp["team_id"])
+    price = df_case_price.set_index("case_type")["price_per_case"].reindex(CASE_TYPES).to_numpy(dtype=float)
+    return pd.DataFrame({
+        "date": date,
+        "agent_id": pd.Categorical.from_codes(agent.codes[row], agent.categories),
+        "team_id": pd.Categorical.from_codes(team.codes[row], team.categories),
+        "iso_year": df_wp["iso_year"].to_numpy(dtype=np.int16)[row],
+        "iso_week": df_wp["iso_week"].to_numpy(dtype=np.int16)[row],
+        "case_type": pd.Categorical.from_codes(ctype, CASE_TYPES),
+        "price_per_case": price[ctype],
+    })
+
 # ----------------------------
 # Persistencia
 # ----------------------------
-def write_parquet(dfs: dict[str, pd.DataFrame]):
-    for name, df in dfs.items:
-        out = FILES / f"{name}.parquet"
-        df.to_parquet(out, index=False)
-        print(f"💾 Wrote {len(df):,} rows → {out}")
+def write_table(df: pd.DataFrame, out: Path) -> Path:
+    """Escribe una tabla a Parquet (sin índice)."""
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(out, index=False)
+    print(f"💾 Wrote {len(df):,} rows → {out}")
+    return out
+
+def write_parquet(
+    dfs: dict[str, pd.DataFrame],
+    out_dir: Path = FILES,
+    inst: Instrument | None = None,
+) -> list[Path]:
+    """Un ``<nombre>.parquet`` por tabla en ``out_dir``; con ``inst``, etapa ``write_<nombre>``."""
+    inst = inst or Instrument("seed")
+    paths = []
+    for name, df in dfs.items():
+        out = Path(out_dir) / f"{name}.parquet"
+        with inst.stage(f"write_{name}", rows_in=len(df)) as st:
+            write_table(df, out)
+            st.rows_out = len(df)
+            st.output(out)
+        paths.append(out)
+    return paths
 
 def make_engine_from_env():
     """Crea engine usando .env, con fallback host=db → localhost."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import OperationalError
+
     host = os.getenv("POSTGRES_HOST", "db")
     port = os.getenv("POSTGRES_PORT", "5432")
     db   = os.getenv("POSTGRES_DB", "ops_analytics")
@@ -234,66 +294,153 @@ def make_engine_from_env():
             return _make("localhost")
         raise
 
-def write_postgres(dfs: dict[str, pd.DataFrame]):
-    """Carga idempotente: CREATE SCHEMA si no existe; TRUNCATE+append si existe, replace si no."""
+DB_TABLES = [
+    "team", "agent", "case_pricing",
+    "calendar_weeks", "capacity_weekly", "budget_weekly",
+    "weekly_perf",
+]
+# Claves primarias (schema_enriched.sql): upsert del modo delta y DDL si la carga crea la tabla
+DB_KEYS = {
+    "team": ["team_id"],
+    "agent": ["agent_id"],
+    "case_pricing": ["case_type"],
+    "calendar_weeks": ["iso_year", "iso_week"],
+    "capacity_weekly": ["agent_id", "iso_year", "iso_week"],
+    "budget_weekly": ["team_id", "iso_year", "iso_week"],
+    "weekly_perf": ["agent_id", "iso_year", "iso_week"],
+}
+
+def write_postgres(
+    dfs: dict[str, pd.DataFrame],
+    inst: Instrument | None = None,
+    workers: int = 4,
+    fmt: str = "binary",
+    chunk_rows: int | None = None,
+    mode: str = "full",
+):
+    """
+    Carga idempotente vía ``COPY`` (ver ``bulk_load``), hasta ``workers`` tablas en paralelo:
+    - ``full``: cada tabla ``ops.synthetic_*`` se llena en un staging y se intercambia en una transacción;
+    - ``delta``: upsert por clave primaria solo de filas nuevas o cambiadas (``DB_KEYS``).
+    Al final refresca el rollup ``ops.exec_finance_weekly`` (``rollup``): todas las semanas
+    en ``full``; en ``delta`` solo las semanas ISO con filas escritas (todas si cambió
+    ``agent``, que define el costo/hora por equipo).
+    Con ``inst`` cada tabla se registra como etapa ``load_<tabla>``.
+    """
     load_dotenv()
     if os.environ.get("WRITE_DB", "0") != "1":
         print("WRITE_DB=0 → skipping DB load")
         return
 
-    eng = make_engine_from_env()
+    import psycopg
+
+    from .bulk_load import DEFAULT_CHUNK_ROWS, conninfo_from_env, load_tables, upsert_tables
+    from .rollup import ROLLUP_TABLE, refresh_exec_finance
+
+    if mode not in LOAD_MODES:
+        raise ValueError(f"mode must be one of {LOAD_MODES}, got {mode!r}")
+    inst = inst or Instrument("seed")
+    conninfo = conninfo_from_env()
+    tables = {name: dfs[name] for name in DB_TABLES}
+    opts = dict(workers=workers, fmt=fmt, chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS, inst=inst)
+    weeks = None
+    if mode == "delta":
+        result = upsert_tables(tables, DB_KEYS, conninfo, touched=["iso_year", "iso_week"], **opts)
+        agent = result["agent"]
+        if agent["inserted"] + agent["updated"] == 0:
+            weeks = sorted({wk for stats in result.values() for wk in stats.get("touched", [])})
+    else:
+        result = load_tables(tables, conninfo, keys=DB_KEYS, **opts)
+
+    with inst.stage("refresh_rollup") as st, psycopg.connect(conninfo) as conn:
+        st.rows_out = refresh_exec_finance(conn, weeks)
+    scope = "all weeks" if weeks is None else f"{len(weeks)} touched week(s)"
+    print(f"♻️ Refreshed ops.{ROLLUP_TABLE} ({st.rows_out:,} rows, {scope})")
+    return result
 
-    # Asegura esquema
-    with eng.begin() as cx:
-        cx.execute(text("CREATE SCHEMA IF NOT EXISTS ops"))
+# ----------------------------
+# Grafo de etapas
+# ----------------------------
+# tabla → (nodo que la construye, posición en su salida; None = la salida entera)
+SEED_TABLES = {
+    "team": ("dimensions", 0),
+    "agent": ("dimensions", 1),
+    "case_pricing": ("dimensions", 2),
+    "calendar_weeks": ("calendar", None),
+    "capacity_weekly": ("capacity_budget", 0),
+    "budget_weekly": ("capacity_budget", 1),
+    "weekly_perf": ("weekly_perf", None),
+    "case_events": ("case_events", None),
+}
 
-    insp = inspect(eng)
-    order = [
-        "team", "agent", "case_pricing",
-        "calendar_weeks", "capacity_weekly", "budget_weekly",
-        "weekly_perf",
+def seed_pipeline(
+    agents: int,
+    weeks: int,
+    teams: list[str],
+    rng: np.random.Generator,
+    out_dir: Path = FILES,
+    case_detail: bool = False,
+    workers: int = 4,
+    inst: Instrument | None = None,
+) -> Pipeline:
+    """
+    DAG del seed. Los constructores que consumen ``rng`` quedan encadenados
+    (dimensions → capacity_budget → weekly_perf → case_events) para que el orden
+    de sorteos, y por tanto los datos, no dependan de ``workers``; ``calendar`` y
+    las escrituras ``write_<tabla>`` corren en paralelo. El sumidero ``tables``
+    devuelve ``{tabla: DataFrame}`` para la carga a Postgres.
+    """
+    nodes = [
+        Node("dimensions", lambda: build_dimensions(agents, teams, rng)),
+        Node("calendar", lambda: build_calendar_weeks(weeks)),
+        Node("capacity_budget", lambda dims, cal: build_capacity_budget(dims[1], cal, teams, rng),
+             deps=("dimensions", "calendar")),
+        Node("weekly_perf", lambda dims, cal, _: build_weekly_perf(dims[1], cal, dims[2], rng),
+             deps=("dimensions", "calendar", "capacity_budget")),
     ]
-
-    for name in order:
-        tbl = f"synthetic_{name}"
-        full = f"ops.{tbl}"
-
-        if insp.has_table(tbl, schema="ops"):
-            # existe → vaciar y luego append
-            with eng.begin() as cx:
-                cx.execute(text(f"TRUNCATE TABLE {full} RESTART IDENTITY"))
-            dfs[name].to_sql(tbl, eng, schema="ops", if_exists="append", index=False)
-        else:
-            # no existe → crear
-            dfs[name].to_sql(tbl, eng, schema="ops", if_exists="replace", index=False)
-
-        print(f"🗄 Upserted {full} ({len(dfs[name])} rows)")
+    if case_detail:
+        nodes.append(Node("case_events", lambda wp, dims: build_case_events(wp, dims[2], rng),
+                          deps=("weekly_perf", "dimensions")))
+    tables = {name: src for name, src in SEED_TABLES.items() if case_detail or name != "case_events"}
+    producers = tuple(dict.fromkeys(src for src, _ in tables.values()))
+
+    def select(value, idx: int | None) -> pd.DataFrame:
+        return value if idx is None else value[idx]
+
+    def writer(name: str) -> Node:
+        src, idx = tables[name]
+        out = Path(out_dir) / f"{name}.parquet"
+        return Node(f"write_{name}", lambda v: write_table(select(v, idx), out), deps=(src,), outputs=(out,))
+
+    nodes += [writer(name) for name in tables]
+    nodes.append(Node("tables", lambda *vals: {
+        name: select(vals[producers.index(src)], idx) for name, (src, idx) in tables.items()
+    }, deps=producers))
+    return Pipeline("seed", nodes, workers=workers, inst=inst)
 
 # ----------------------------
 # Main (E2E)
 # ----------------------------
-if __name__ == "__main__":
-    # 1) Build dataframes
-    df_team, df_agent, df_case_price = build_dimensions()
-    cal_weeks = build_calendar_weeks()
-    df_capacity, df_budget = build_capacity_budget(df_agent, cal_weeks)
-    df_wp = build_weekly_perf(df_agent, cal_weeks, df_case_price)
-
-    dfs = {
-        "team": df_team,
-        "agent": df_agent,
-        "case_pricing": df_case_price,
-        "calendar_weeks": cal_weeks,
-        "capacity_weekly": df_capacity,
-        "budget_weekly": df_budget,
-        "weekly_perf": df_wp,
-    }
-
-    # 2) Parquet local
-    for name, df in dfs.items():
-        out = FILES / f"{name}.parquet"
-        df.to_parquet(out, index=False)
-        print(f"💾 Wrote {len(df):,} rows → {out}")
+def main(argv: list[str] | None = None) -> None:
+    load_dotenv()
+    parser = seed_parser()
+    args = parser.parse_args(argv)
+
+    teams = [f"T{i}" for i in range(1, args.teams + 1)]
+    rng = np.random.default_rng(args.seed)
+    inst = instrument_from_env("seed")
+    inst.params = {**vars(args), "write_db": os.environ.get("WRITE_DB", "0")}
+
+    # 1) Grafo: constructores → una escritura Parquet por tabla (en paralelo)
+    dfs = seed_pipeline(args.agents, args.weeks, teams, rng, args.out_dir, args.case_detail,
+                        workers=args.workers, inst=inst).run()["tables"]
 
-    # 3) Carga a Postgres (si WRITE_DB=1)
-    write_postgres(dfs)
\ No newline at end of file
+    # 2) Carga a Postgres (si WRITE_DB=1)
+    write_postgres(dfs, inst, workers=args.load_workers, fmt=args.copy_format, chunk_rows=args.chunk_rows,
+                   mode=args.load_mode)
+
+    # 3) Manifest de la corrida (si PIPELINE_INSTRUMENT=1)
+    inst.write_manifest(args.out_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Carga de KPIs del lakehouse a las tablas de ``sql/schema.sql``
+Lee ``Tables/weekly_flags`` y ``Tables/agent_stability`` (archivo o dataset Parquet
+generados por ``kpi_calculations``) y los carga en ``ops.weekly_perf`` y
+``ops.agent_stability``. Modo ``delta`` (por defecto): upsert solo de filas nuevas
+o cambiadas; ``full``: reemplazo vía staging. Las dimensiones ``ops.team`` /
+``ops.agent`` solo reciben las claves que falten (requeridas por las FKs).
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from .bulk_load import conninfo_from_env, load_tables, upsert_tables
+from .cli import load_parser
+from .config import LOAD_MODES
+from .instrument import Instrument, instrument_from_env
+
+__all__ = [
+    "KPI_TABLES",
+    "read_kpi_tables",
+    "load_kpis",
+]
+
+# tabla destino → (salida del lakehouse, clave primaria, columnas de schema.sql)
+KPI_TABLES = {
+    "weekly_perf": (
+        "weekly_flags",
+        ["agent_id", "iso_year", "iso_week"],
+        ["agent_id", "team_id", "iso_week", "iso_year",
+         "hours_mean", "cases_mean", "out_hours_flag", "out_cases_flag"],
+    ),
+    "agent_stability": (
+        "agent_stability",
+        ["agent_id"],
+        ["agent_id", "team_id", "cv_hours", "cvm_hours", "cv_cases", "cvm_cases", "quartile_efficiency"],
+    ),
+}
+
+def _read(path: Path) -> pd.DataFrame:
+    for p in (path, path.with_suffix(".parquet")):
+        if p.exists():
+            return pd.read_parquet(p)
+    raise FileNotFoundError(f"{path} (.parquet) not found")
+
+def read_kpi_tables(tables_dir: Path) -> dict[str, pd.DataFrame]:
+    """Salidas de ``kpi_calculations`` recortadas a las columnas de ``schema.sql``."""
+    out = {}
+    for table, (source, _, cols) in KPI_TABLES.items():
+        df = _read(Path(tables_dir) / source)
+        # Datasets Hive: las columnas de partición vuelven como categóricas
+        out[table] = df[cols].astype({c: str for c in ("agent_id", "team_id")})
+        for c in ("iso_year", "iso_week"):
+            if c in out[table]:
+                out[table][c] = out[table][c].astype("int64")
+    return out
+
+def _dimensions(kpis: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    pairs = pd.concat([df[["agent_id", "team_id"]] for df in kpis.values()]).drop_duplicates("agent_id")
+    team = pd.DataFrame({"team_id": sorted(pairs["team_id"].unique())})
+    team["team_name"] = "Team " + team["team_id"].str.lstrip("T")
+    return {"team": team, "agent": pairs.reset_index(drop=True)}
+
+def load_kpis(
+    tables_dir: Path,
+    conninfo: str,
+    mode: str = "delta",
+    schema: str = "ops",
+    workers: int = 2,
+    fmt: str = "binary",
+    inst: Instrument | None = None,
+) -> dict:
+    """Carga ``ops.weekly_perf`` / ``ops.agent_stability``; devuelve conteos por tabla."""
+    if mode not in LOAD_MODES:
+        raise ValueError(f"mode must be one of {LOAD_MODES}, got {mode!r}")
+    kpis = read_kpi_tables(tables_dir)
+
+    # Dimensiones primero (FKs): solo claves nuevas, sin tocar nombres/fechas existentes
+    dims = _dimensions(kpis)
+    for name, df in dims.items():  # team antes que agent
+        upsert_tables({name: df}, {name: list(df.columns[:1])}, conninfo, schema=schema, prefix="",
+                      workers=1, fmt=fmt, inst=inst, update=False)
+
+    keys = {table: spec[1] for table, spec in KPI_TABLES.items()}
+    if mode == "delta":
+        return upsert_tables(kpis, keys, conninfo, schema=schema, prefix="", workers=workers, fmt=fmt, inst=inst)
+    return load_tables(kpis, conninfo, schema=schema, prefix="", workers=workers, fmt=fmt, inst=inst, keys=keys)
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv: list[str] | None = None) -> None:
+    parser = load_parser()
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    inst = instrument_from_env("load_kpis")
+    inst.params = {**vars(args), "tables_dir": str(args.tables_dir)}
+    load_kpis(args.tables_dir, conninfo_from_env(), mode=args.mode, workers=args.workers,
+              fmt=args.copy_format, inst=inst)
+    inst.write_manifest(args.tables_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Rollup materializado de ``ops.v_exec_finance``
+``ops.exec_finance_weekly`` guarda el resultado de la vista por equipo/semana ISO
+(``sql/rollup_exec_finance.sql``, con índices covering). El refresh recalcula solo
+las semanas indicadas, en una transacción (DELETE + INSERT), así que los dashboards
+no vuelven a agregar las tablas de hechos completas.
+
+``REFRESH_SQL`` replica la lógica de ``views_enriched.sql`` con el filtro de semanas
+dentro de cada agregación: sobre la vista, Postgres no lo empuja al lado nulable de
+los LEFT JOIN (capacidad/presupuesto) y agregaría esas tablas completas.
+``write_postgres`` lo invoca al final de cada carga con las semanas tocadas.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from pathlib import Path
+from typing import Iterable
+
+import psycopg
+from psycopg import sql
+
+from .bulk_load import conninfo_from_env
+
+__all__ = [
+    "ROLLUP_TABLE",
+    "schema_sql",
+    "ensure_rollup",
+    "refresh_exec_finance",
+]
+
+SQL_DIR = Path(__file__).resolve().parents[2] / "sql"
+ROLLUP_TABLE = "exec_finance_weekly"
+ROLLUP_COLS = [
+    "team_id", "iso_year", "iso_week", "revenue", "hours", "cases", "cost_real",
+    "margin", "utilization", "hours_variance_pct", "cost_variance_pct",
+]
+
+# Misma lógica que ops.v_exec_finance; {weeks} filtra cada tabla de hechos por semana ISO
+REFRESH_SQL = """
+WITH cap_team AS (
+  SELECT team_id, iso_year, iso_week, SUM(capacity_hours) AS capacity_hours
+  FROM {schema}.synthetic_capacity_weekly
+  WHERE {weeks}
+  GROUP BY team_id, iso_year, iso_week
+), wp AS (
+  SELECT
+    w.team_id, w.iso_year, w.iso_week,
+    SUM(w.revenue) AS revenue,
+    SUM(w.hours)   AS hours,
+    SUM(w.cases_total) AS cases
+  FROM {schema}.synthetic_weekly_perf w
+  WHERE {weeks}
+  GROUP BY w.team_id, w.iso_year, w.iso_week
+), team_hourly AS (
+  SELECT team_id, AVG(hourly_cost) AS hourly_cost
+  FROM {schema}.synthetic_agent
+  GROUP BY team_id
+)
+SELECT
+  w.team_id,
+  w.iso_year,
+  w.iso_week,
+  w.revenue,
+  w.hours,
+  w.cases,
+  (w.hours * th.hourly_cost) AS cost_real,
+  (w.revenue - (w.hours * th.hourly_cost)) AS margin,
+  (w.hours / NULLIF(ct.capacity_hours,0)) AS utilization,
+  ((w.hours - b.planned_hours) / NULLIF(b.planned_hours,0)) AS hours_variance_pct,
+  (((w.hours * th.hourly_cost) - b.planned_cost) / NULLIF(b.planned_cost,0)) AS cost_variance_pct
+FROM wp w
+LEFT JOIN cap_team ct
+  ON ct.team_id = w.team_id AND ct.iso_year = w.iso_year AND ct.iso_week = w.iso_week
+LEFT JOIN {schema}.synthetic_budget_weekly b
+  ON b.team_id = w.team_id AND b.iso_year = w.iso_year AND b.iso_week = w.iso_week
+LEFT JOIN team_hourly th
+  ON th.team_id = w.team_id
+"""
+
+def _weeks_filter(weeks: list[tuple[int, int]] | None) -> sql.Composable:
+    """``TRUE`` o un OR de (iso_year, iso_week) literales: usa los índices por semana."""
+    if weeks is None:
+        return sql.SQL("TRUE")
+    return sql.SQL(" OR ").join(
+        sql.SQL("(iso_year = {} AND iso_week = {})").format(sql.Literal(int(y)), sql.Literal(int(w)))
+        for y, w in weeks
+    )
+
+def schema_sql(name: str, schema: str = "ops") -> str:
+    """Texto de ``sql/<name>`` con el esquema ``ops`` reemplazado por ``schema``."""
+    text = (SQL_DIR / name).read_text(encoding="utf-8")
+    if schema == "ops":
+        return text
+    text = re.sub(r"\bops\.", f"{schema}.", text)
+    return re.sub(r"SCHEMA IF NOT EXISTS ops\b", f"SCHEMA IF NOT EXISTS {schema}", text)
+
+def ensure_rollup(conn: psycopg.Connection, schema: str = "ops") -> None:
+    """Crea la vista (si falta), la tabla rollup y sus índices; idempotente."""
+    if conn.execute("SELECT to_regclass(%s)", (f"{schema}.v_exec_finance",)).fetchone()[0] is None:
+        conn.execute(schema_sql("views_enriched.sql", schema))
+    conn.execute(schema_sql("rollup_exec_finance.sql", schema))
+
+def refresh_exec_finance(
+    conn: psycopg.Connection,
+    weeks: Iterable[tuple[int, int]] | None = None,
+    schema: str = "ops",
+) -> int:
+    """
+    Recalcula ``exec_finance_weekly`` para ``weeks`` [(iso_year, iso_week), ...];
+    ``None`` = todas las semanas (y elimina semanas que ya no existen). Devuelve filas escritas.
+    """
+    target = sql.Identifier(schema, ROLLUP_TABLE)
+    cols = sql.SQL(", ").join(map(sql.Identifier, ROLLUP_COLS))
+    if weeks is not None:
+        weeks = sorted(set(weeks))
+        if not weeks:
+            return 0
+    select = sql.SQL(REFRESH_SQL).format(schema=sql.Identifier(schema), weeks=_weeks_filter(weeks))
+    with conn.transaction(), conn.cursor() as cur:
+        ensure_rollup(conn, schema)
+        cur.execute(sql.SQL("DELETE FROM {} WHERE {}").format(target, _weeks_filter(weeks)))
+        cur.execute(sql.SQL("INSERT INTO {} ({}) {}").format(target, cols, select))
+        return cur.rowcount
+
+# -----------------------------
+# CLI
+# -----------------------------
+def _parse_week(value: str) -> tuple[int, int]:
+    year, week = value.upper().split("-W")
+    return int(year), int(week)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the materialized ops.exec_finance_weekly rollup")
+    parser.add_argument("--weeks", nargs="+", type=_parse_week, default=None, metavar="YYYY-Www",
+                        help="ISO weeks to recompute (default: all)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    with psycopg.connect(conninfo_from_env()) as conn:
+        n = refresh_exec_finance(conn, args.weeks)
+    scope = "all weeks" if args.weeks is None else f"{len(set(args.weeks))} week(s)"
+    print(f"♻️ Refreshed ops.{ROLLUP_TABLE}: {n:,} rows ({scope})")
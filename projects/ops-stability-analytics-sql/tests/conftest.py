@@ -0,0 +1,28 @@
+import os
+import uuid
+
+import pytest
+
+PG_TEST_DSN = os.getenv("PG_TEST_DSN")  # p.ej. "host=localhost user=ops_user password=ops_pass dbname=ops_analytics"
+
+
+@pytest.fixture
+def conn():
+    """Conexión a PG_TEST_DSN con un esquema desechable (``conn.schema``); skip sin servidor."""
+    psycopg = pytest.importorskip("psycopg")
+    if not PG_TEST_DSN:
+        pytest.skip("PG_TEST_DSN not set")
+    try:
+        cx = psycopg.connect(PG_TEST_DSN, connect_timeout=3)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"PostgreSQL not reachable: {e}")
+    schema = f"ops_test_{uuid.uuid4().hex[:8]}"
+    cx.execute(f"CREATE SCHEMA {schema}")
+    cx.commit()
+    cx.schema = schema
+    cx.dsn = PG_TEST_DSN
+    yield cx
+    cx.rollback()
+    cx.execute(f"DROP SCHEMA {schema} CASCADE")
+    cx.commit()
+    cx.close()
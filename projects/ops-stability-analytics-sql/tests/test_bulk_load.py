@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from src.sql.bulk_load import load_table, load_tables, upsert_table  # noqa: E402
+
+
+def _frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "agent_id": [f"AG{i:03d}" for i in range(n)],
+        "iso_week": np.arange(n) % 52 + 1,
+        "hours": rng.normal(34, 4, n),
+        "hire_date": pd.date_range("2024-01-01", periods=n, freq="D").date,
+    })
+    df.loc[0, "hours"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("fmt", ["csv", "binary"])
+def test_load_table_roundtrip_and_replace(conn, fmt):
+    df = _frame(250)
+    load_table(conn, "perf", df, schema=conn.schema, fmt=fmt, chunk_rows=64)
+    cur = conn.execute(f"SELECT * FROM {conn.schema}.perf ORDER BY agent_id")
+    got = pd.DataFrame(cur.fetchall(), columns=[c.name for c in cur.description])
+    assert len(got) == 250
+    assert got["hours"].isna().sum() == 1
+    assert np.allclose(got["hours"].iloc[1:].astype(float), df["hours"].iloc[1:])
+    assert got["hire_date"].tolist() == df["hire_date"].tolist()
+
+    load_table(conn, "perf", _frame(10, seed=1), schema=conn.schema, fmt=fmt)
+    assert conn.execute(f"SELECT count(*) FROM {conn.schema}.perf").fetchone()[0] == 10
+
+
+def test_swap_keeps_dependent_views(conn):
+    s = conn.schema
+    load_table(conn, "perf", _frame(20), schema=s)
+    conn.execute(f"CREATE VIEW {s}.v_perf AS SELECT count(*) AS n FROM {s}.perf")
+    conn.commit()
+    load_table(conn, "perf", _frame(30), schema=s)
+    assert conn.execute(f"SELECT n FROM {s}.v_perf").fetchone()[0] == 30
+
+
+def test_load_tables_concurrent(conn):
+    dfs = {"a": _frame(100), "b": _frame(50, seed=2), "c": _frame(5, seed=3)}
+    loaded = load_tables(dfs, conn.dsn, schema=conn.schema, prefix="t_", workers=3, fmt="binary")
+    assert loaded == {"a": 100, "b": 50, "c": 5}
+    for name, df in dfs.items():
+        n = conn.execute(f"SELECT count(*) FROM {conn.schema}.t_{name}").fetchone()[0]
+        assert n == len(df)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "binary"])
+def test_upsert_delta_counts(conn, fmt):
+    s = conn.schema
+    # Tipos de schema_enriched.sql: float64 → numeric en el destino
+    conn.execute(f"""CREATE TABLE {s}.perf (
+        agent_id text, iso_week int, hours numeric, hire_date date, PRIMARY KEY (agent_id, iso_week))""")
+    conn.commit()
+    df = _frame(100)
+    keys = ["agent_id", "iso_week"]
+    assert upsert_table(conn, "perf", df, keys, schema=s, fmt=fmt) == {"inserted": 100, "updated": 0, "unchanged": 0}
+    assert upsert_table(conn, "perf", df, keys, schema=s, fmt=fmt) == {"inserted": 0, "updated": 0, "unchanged": 100}
+
+    nxt = pd.concat([df, _frame(105).iloc[100:]], ignore_index=True)
+    nxt.loc[[3, 7], "hours"] += 1.0
+    nxt.loc[0, "hours"] = 30.0  # NULL → valor
+    stats = upsert_table(conn, "perf", nxt, keys, schema=s, fmt=fmt)
+    assert stats == {"inserted": 5, "updated": 3, "unchanged": 97}
+    assert conn.execute(f"SELECT hours FROM {s}.perf WHERE agent_id = 'AG000'").fetchone()[0] == 30
+
+
+def test_upsert_insert_only_keeps_existing_values(conn):
+    s = conn.schema
+    upsert_table(conn, "dim", pd.DataFrame({"team_id": ["T1"], "team_name": ["Ops"]}), ["team_id"], schema=s)
+    new = pd.DataFrame({"team_id": ["T1", "T2"], "team_name": ["Team 1", "Team 2"]})
+    stats = upsert_table(conn, "dim", new, ["team_id"], schema=s, update=False)
+    assert stats == {"inserted": 1, "updated": 0, "unchanged": 1}
+    assert conn.execute(f"SELECT team_name FROM {s}.dim WHERE team_id = 'T1'").fetchone()[0] == "Ops"
+
+
+def test_full_load_then_delta_upsert(conn):
+    """La carga full crea la tabla con clave primaria: un delta posterior puede usar ON CONFLICT."""
+    s = conn.schema
+    df = _frame(40)
+    load_tables({"perf": df}, conn.dsn, schema=s, prefix="", workers=1, keys={"perf": ["agent_id", "iso_week"]})
+    changed = df.copy()
+    changed.loc[5, "hours"] = 99.0
+    stats = upsert_table(conn, "perf", changed, ["agent_id", "iso_week"], schema=s)
+    assert (stats["inserted"], stats["updated"]) == (0, 1)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the seed stage graph runner (src/sql/dag.py).
+"""
+import pytest
+
+from src.sql.dag import Node, Pipeline, PipelineError
+
+
+def test_pipeline_returns_sinks_and_reports_failed_stage():
+    nodes = [Node("a", lambda: 2), Node("b", lambda a: a * 3, ("a",)), Node("c", lambda a: a + 1, ("a",))]
+    assert Pipeline("seed", nodes, workers=2).run() == {"b": 6, "c": 3}
+    with pytest.raises(PipelineError, match="stage 'b'"):
+        Pipeline("seed", [nodes[0], Node("b", lambda a: 1 / 0, ("a",))]).run()
+
+
+def test_pipeline_rejects_unknown_deps_and_cycles():
+    with pytest.raises(ValueError, match="unknown"):
+        Pipeline("seed", [Node("a", lambda x: x, ("x",))])
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline("seed", [Node("a", lambda b: b, ("b",)), Node("b", lambda a: a, ("a",))])
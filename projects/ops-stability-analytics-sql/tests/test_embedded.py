@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the embedded DuckDB engine (src/sql/embedded.py).
+"""
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("duckdb")
+
+from src.sql import embedded  # noqa: E402
+
+FABRIC_SRC = Path(__file__).resolve().parents[2] / "ops-stability-analytics-fabric-mock" / "src"
+
+
+def _fabric_kpi():
+    # Ambos proyectos se llaman ``src``: el de fabric-mock se carga con alias
+    if "fabric_src" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "fabric_src", FABRIC_SRC / "__init__.py", submodule_search_locations=[str(FABRIC_SRC)]
+        )
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules["fabric_src"] = mod
+        spec.loader.exec_module(mod)
+    return importlib.import_module("fabric_src.analytics.kpi_calculations")
+
+
+@pytest.fixture(scope="module")
+def lake(tmp_path_factory):
+    root = tmp_path_factory.mktemp("lake")
+    seed = importlib.import_module("src.sql.generate_rich_seed")
+    rng = np.random.default_rng(17)
+    df_team, df_agent, df_case_price = seed.build_dimensions(45, rng=rng)  # 45: no múltiplo de 4
+    cal = seed.build_calendar_weeks(20, end="2025-02-10")
+    df_capacity, df_budget = seed.build_capacity_budget(df_agent, cal, rng=rng)
+    df_wp = seed.build_weekly_perf(df_agent, cal, df_case_price, rng)
+    df_wp = df_wp[~((df_wp["agent_id"] == "AG007") & (df_wp.index % 20 > 0))]  # 1 semana → CV nulo
+    dfs = {
+        "team": df_team, "agent": df_agent, "case_pricing": df_case_price, "calendar_weeks": cal,
+        "capacity_weekly": df_capacity, "budget_weekly": df_budget, "weekly_perf": df_wp,
+    }
+    files = root / "enriched"
+    files.mkdir()
+    for name, df in dfs.items():
+        df.to_parquet(files / f"{name}.parquet", index=False)
+    return files, dfs
+
+
+def test_stability_sql_matches_pandas(lake):
+    files, dfs = lake
+    got = embedded.stability(embedded.connect(files))
+
+    kpi = _fabric_kpi()
+    week = dfs["weekly_perf"][["agent_id", "team_id", "iso_year", "iso_week", "hours_mean", "cases_mean"]]
+    want = kpi.compute_stability(week.reset_index(drop=True))
+
+    assert got["agent_id"].tolist() == want["agent_id"].tolist()
+    for col in ["cv_hours", "cvm_hours", "cv_cases", "cvm_cases"]:
+        np.testing.assert_allclose(got[col].to_numpy(float), want[col].to_numpy(float), rtol=1e-9, equal_nan=True)
+    assert got["cv_hours"].isna().sum() == 1
+    assert got["quartile_efficiency"].tolist() == want["quartile_efficiency"].tolist()
+
+
+def test_exec_finance_matches_pandas(lake):
+    files, dfs = lake
+    got = embedded.exec_finance(embedded.connect(files))
+
+    keys = ["team_id", "iso_year", "iso_week"]
+    wp = dfs["weekly_perf"].groupby(keys, as_index=False)[["revenue", "hours"]].sum()
+    cap = dfs["capacity_weekly"].groupby(keys, as_index=False)["capacity_hours"].sum()
+    hourly = dfs["agent"].groupby("team_id")["hourly_cost"].mean().rename("hourly_cost")
+    want = (
+        wp.merge(cap, on=keys, how="left").merge(dfs["budget_weekly"], on=keys, how="left")
+        .merge(hourly, on="team_id", how="left").sort_values(keys, ignore_index=True)
+    )
+    cost = want["hours"] * want["hourly_cost"]
+
+    assert got[keys].to_numpy().tolist() == want[keys].to_numpy().tolist()
+    np.testing.assert_allclose(got["cost_real"], cost, rtol=1e-9)
+    np.testing.assert_allclose(got["margin"], want["revenue"] - cost, rtol=1e-9)
+    np.testing.assert_allclose(got["utilization"], want["hours"] / want["capacity_hours"], rtol=1e-9)
+    np.testing.assert_allclose(
+        got["cost_variance_pct"], (cost - want["planned_cost"]) / want["planned_cost"], rtol=1e-9
+    )
+
+
+def test_register_parquet_escapes_quoted_paths(lake, tmp_path):
+    files, dfs = lake
+    odd = tmp_path / "o'brien's lake"
+    (odd / "team").mkdir(parents=True)
+    dfs["team"].to_parquet(odd / "team.parquet", index=False)
+    dfs["team"].to_parquet(odd / "team" / "part-0.parquet", index=False)
+
+    con = embedded.connect(files)
+    embedded.register_parquet(con, "team_file", odd / "team.parquet")
+    embedded.register_parquet(con, "team_dataset", odd / "team")
+    for view in ("team_file", "team_dataset"):
+        assert con.execute(f"SELECT count(*) FROM {view}").fetchone()[0] == len(dfs["team"])
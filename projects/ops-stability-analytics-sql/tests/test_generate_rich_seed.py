@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the rich seed generator (src/sql/generate_rich_seed.py).
+"""
+import importlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def seed():
+    return importlib.import_module("src.sql.generate_rich_seed")
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """Importar el módulo no crea directorios, no fija estado RNG global ni carga SQLAlchemy."""
+    code = ("import os, sys, src.sql.generate_rich_seed as m; "
+            "print(os.listdir('.'), hasattr(m, 'RNG'), 'sqlalchemy' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])})
+    assert out.stdout.strip() == "[] False False"
+
+
+def test_capacity_budget_shapes_and_values(seed):
+    rng = np.random.default_rng(7)
+    teams = ["T1", "T2", "T3", "T4"]
+    _, df_agent, _ = seed.build_dimensions(50, teams, rng)
+    cal = seed.build_calendar_weeks(8, end="2025-03-31")
+    df_capacity, df_budget = seed.build_capacity_budget(df_agent, cal, teams, rng)
+
+    assert len(df_capacity) == 50 * len(cal)
+    assert len(df_budget) == len(teams) * len(cal)
+    roles = df_agent.set_index("agent_id")["role"]
+    expected = df_capacity["agent_id"].map(roles).map(seed.HOURS_CAPACITY_WEEK)
+    assert (df_capacity["capacity_hours"] == expected).all()
+
+    # Plan = 0.85 × capacidad del equipo × U(0.95, 1.05)
+    team_cap = df_capacity.groupby(["team_id", "iso_year", "iso_week"])["capacity_hours"].sum()
+    b = df_budget.set_index(["team_id", "iso_year", "iso_week"])
+    ratio = b["planned_hours"] / (0.85 * team_cap.reindex(b.index))
+    assert ratio.between(0.95 - 1e-4, 1.05 + 1e-4).all()
+
+
+def test_capacity_budget_is_seeded(seed):
+    def run():
+        rng = np.random.default_rng(11)
+        _, df_agent, _ = seed.build_dimensions(20, rng=rng)
+        cal = seed.build_calendar_weeks(4, end="2025-01-15")
+        return seed.build_capacity_budget(df_agent, cal, rng=rng)[1]
+
+    assert run().equals(run())
+
+
+def test_weekly_perf_batched_invariants(seed):
+    rng = np.random.default_rng(3)
+    _, df_agent, df_case_price = seed.build_dimensions(30, rng=rng)
+    cal = seed.build_calendar_weeks(6, end="2025-06-30")
+    df_wp = seed.build_weekly_perf(df_agent, cal, df_case_price, rng)
+
+    assert len(df_wp) == 30 * len(cal)
+    assert list(df_wp.columns[:12]) == seed.WEEKLY_PERF_COLS
+    assert (df_wp["hours"] >= 10).all() and (df_wp["cases_total"] >= 5).all()
+
+    counts = df_wp[["cases_standard", "cases_priority", "cases_escalation"]]
+    prices = [seed.CASE_PRICE[ct] for ct in seed.CASE_TYPES]
+    assert np.allclose(df_wp["revenue"], counts.to_numpy() @ prices)
+    cph = df_wp["cases_total"] / df_wp["hours"].clip(lower=1.0)
+    assert (df_wp["out_cases_flag"] == ((cph < 1.8) | (cph > 4.2))).all()
+    assert (df_wp["out_hours_flag"] == ((df_wp["hours"] < 24) | (df_wp["hours"] > 50))).all()
+
+
+def test_case_events_expand_weekly_counts(seed):
+    rng = np.random.default_rng(5)
+    _, df_agent, df_case_price = seed.build_dimensions(5, rng=rng)
+    cal = seed.build_calendar_weeks(3, end="2025-01-06")  # cruza el cambio de año ISO
+    df_wp = seed.build_weekly_perf(df_agent, cal, df_case_price, rng)
+    events = seed.build_case_events(df_wp, df_case_price, rng)
+
+    got = events.groupby(["agent_id", "iso_year", "iso_week", "case_type"], observed=True).size()
+    for ct, col in zip(seed.CASE_TYPES, ["cases_standard", "cases_priority", "cases_escalation"]):
+        want = df_wp.set_index(["agent_id", "iso_year", "iso_week"])[col]
+        want = want[want > 0]
+        assert got.xs(ct, level="case_type").sort_index().tolist() == want.sort_index().tolist()
+
+    iso = events["date"].dt.isocalendar()
+    assert (iso.year.to_numpy() == events["iso_year"]).all()
+    assert (iso.week.to_numpy() == events["iso_week"]).all()
+
+
+def test_seed_pipeline_matches_serial_build(seed, tmp_path):
+    """El DAG escribe una tabla por nodo y reproduce el orden de sorteos de la construcción en serie."""
+    rng = np.random.default_rng(9)
+    teams = ["T1", "T2"]
+    df_team, df_agent, df_case_price = seed.build_dimensions(12, teams, rng)
+    cal = seed.build_calendar_weeks(5)
+    _, df_budget = seed.build_capacity_budget(df_agent, cal, teams, rng)
+    df_wp = seed.build_weekly_perf(df_agent, cal, df_case_price, rng)
+    events = seed.build_case_events(df_wp, df_case_price, rng)
+
+    for workers in (1, 4):
+        out = tmp_path / f"w{workers}"
+        pipe = seed.seed_pipeline(12, 5, teams, np.random.default_rng(9), out, case_detail=True, workers=workers)
+        dfs = pipe.run()["tables"]
+        assert sorted(p.stem for p in out.glob("*.parquet")) == sorted(seed.SEED_TABLES)
+        assert dfs["budget_weekly"].equals(df_budget) and dfs["weekly_perf"].equals(df_wp)
+        assert dfs["case_events"].equals(events)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the stage instrumentation (src/sql/instrument.py).
+"""
+import json
+from pathlib import Path
+
+from src.sql import instrument
+from src.sql.instrument import Instrument
+
+
+def test_manifest_records_stages(tmp_path):
+    inst = Instrument("seed", enabled=True)
+    out = tmp_path / "team.parquet"
+    with inst.stage("write_team", rows_in=4) as st:
+        out.write_bytes(bytes(2048))
+        st.output(out)
+
+    manifest = json.loads(inst.write_manifest(tmp_path).read_text())
+    (stage,) = manifest["stages"]
+    assert (stage["name"], stage["rows_in"], stage["bytes_written"]) == ("write_team", 4, 2048)
+    assert stage["wall_s"] >= 0 and stage["peak_rss_mb"] > 0
+
+
+def test_peak_rss_is_none_without_proc_or_resource(monkeypatch):
+    """Sin /proc ni ``resource`` (Windows) la etapa se mide igual y el pico queda en None."""
+    def no_proc(self, *args, **kwargs):
+        raise OSError("sin /proc")
+
+    monkeypatch.setattr(instrument, "resource", None)
+    monkeypatch.setattr(Path, "read_text", no_proc)
+    inst = Instrument("seed", enabled=True)
+    with inst.stage("write_team"):
+        pass
+    (rec,) = inst.stages
+    assert rec.peak_rss_mb is None and rec.wall_s >= 0
@@ -0,0 +1,66 @@
+import importlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("psycopg")
+
+from src.sql.bulk_load import load_tables, upsert_table  # noqa: E402
+from src.sql.rollup import ROLLUP_COLS, refresh_exec_finance, schema_sql  # noqa: E402
+
+TABLES = ["team", "agent", "calendar_weeks", "capacity_weekly", "budget_weekly", "weekly_perf"]
+
+
+@pytest.fixture
+def seeded(conn):
+    seed = importlib.import_module("src.sql.generate_rich_seed")
+    rng = np.random.default_rng(21)
+    df_team, df_agent, df_case_price = seed.build_dimensions(40, rng=rng)
+    cal = seed.build_calendar_weeks(10, end="2025-03-03")
+    df_capacity, df_budget = seed.build_capacity_budget(df_agent, cal, rng=rng)
+    df_wp = seed.build_weekly_perf(df_agent, cal, df_case_price, rng)
+    dfs = dict(zip(TABLES, [df_team, df_agent, cal, df_capacity, df_budget, df_wp]))
+    conn.execute(schema_sql("schema_enriched.sql", conn.schema))  # tipos y PKs reales
+    conn.commit()
+    load_tables(dfs, conn.dsn, schema=conn.schema, workers=2)
+    return conn, dfs
+
+
+def _diff(conn) -> int:
+    """Filas que difieren entre la vista y el rollup (en ambos sentidos)."""
+    s, cols = conn.schema, ", ".join(ROLLUP_COLS)
+    q = f"""
+        SELECT count(*) FROM (
+          (SELECT {cols} FROM {s}.v_exec_finance EXCEPT SELECT {cols} FROM {s}.exec_finance_weekly)
+          UNION ALL
+          (SELECT {cols} FROM {s}.exec_finance_weekly EXCEPT SELECT {cols} FROM {s}.v_exec_finance)
+        ) d"""
+    return conn.execute(q).fetchone()[0]
+
+
+def test_rollup_matches_view(seeded):
+    conn, dfs = seeded
+    n = refresh_exec_finance(conn, schema=conn.schema)
+    assert n == len(dfs["budget_weekly"])
+    assert _diff(conn) == 0
+
+
+def test_refresh_only_touched_weeks(seeded):
+    conn, dfs = seeded
+    s = conn.schema
+    refresh_exec_finance(conn, schema=s)
+    before = dict(conn.execute(f"SELECT iso_week, refreshed_at FROM {s}.exec_finance_weekly").fetchall())
+
+    wp = dfs["weekly_perf"].copy()
+    week = int(wp["iso_week"].iloc[3])
+    wp.loc[wp["iso_week"] == week, "revenue"] += 100.0
+    stats = upsert_table(conn, "synthetic_weekly_perf", wp, ["agent_id", "iso_year", "iso_week"],
+                         schema=s, touched=["iso_year", "iso_week"])
+    assert [w for _, w in stats["touched"]] == [week]
+    assert _diff(conn) > 0  # rollup desactualizado
+
+    n = refresh_exec_finance(conn, stats["touched"], schema=s)
+    assert n == dfs["team"].shape[0]
+    assert _diff(conn) == 0
+    after = dict(conn.execute(f"SELECT iso_week, refreshed_at FROM {s}.exec_finance_weekly").fetchall())
+    assert {w for w in after if after[w] != before[w]} == {week}
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ops-analytics • CLI unificada de ambos proyectos
+- Subcomandos: generate, kpi, live, smoke (Fabric-mock) y seed, load (SQL).
+- Arranque liviano: solo argparse/importlib; pandas, NumPy, SQLAlchemy y el ``src``
+  del proyecto se importan al despachar el subcomando (``ops-analytics --help`` no
+  carga nada). ``<cmd> --help`` construye el parser desde el ``cli.py`` del proyecto
+  (solo stdlib), sin importar el módulo del subcomando. Cada invocación importa un
+  solo proyecto, así que los dos paquetes ``src`` no chocan.
+- El resto de argumentos pasa tal cual al ``main(argv)`` del módulo.
+
+Uso:
+    python scripts/ops_analytics.py generate --agents 500 --days 90
+    python scripts/ops_analytics.py kpi --validate
+    python scripts/ops_analytics.py --timing seed --agents 2000
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FABRIC_ROOT = ROOT / "projects" / "ops-stability-analytics-fabric-mock"
+SQL_ROOT = ROOT / "projects" / "ops-stability-analytics-sql"
+
+# subcomando → (root del proyecto, módulo con main(argv), parser liviano "módulo:función", ayuda)
+COMMANDS = {
+    "generate": (FABRIC_ROOT, "src.etl.generate_synthetic_data", "src.cli:generate_parser",
+                 "Generate synthetic daily ops data (raw layer)"),
+    "kpi": (FABRIC_ROOT, "src.analytics.kpi_calculations", "src.cli:kpi_parser",
+            "Compute stability KPIs and weekly outlier flags"),
+    "live": (FABRIC_ROOT, "src.analytics.live", "src.cli:live_parser",
+             "Live ingestion: stream events into weekly KPIs (asyncio)"),
+    "smoke": (FABRIC_ROOT, "scripts.smoke_check", "src.cli:smoke_parser",
+              "In-process smoke test (Fabric-mock + optional SQL)"),
+    "seed": (SQL_ROOT, "src.sql.generate_rich_seed", "src.sql.cli:seed_parser",
+             "Generate the enriched SQL seed (Parquet + optional Postgres)"),
+    "load": (SQL_ROOT, "src.sql.load_kpis", "src.sql.cli:load_parser", "Load lakehouse KPI tables into Postgres"),
+}
+HELP_FLAGS = ("-h", "--help")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ops-analytics",
+        description="Unified CLI for the ops stability analytics pipelines",
+        epilog="Run 'ops-analytics COMMAND --help' for the options of each command.",
+    )
+    parser.add_argument("--timing", action="store_true",
+                        help="Print import (startup) and run time of the command to stderr")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, (_, _, _, help_) in COMMANDS.items():
+        sub.add_parser(name, help=help_, add_help=False)  # -h/--help llega al main del módulo
+    return parser
+
+def run(command: str, argv: list[str], timing: bool = False) -> int:
+    """Importa el módulo del subcomando y ejecuta su ``main(argv)``; devuelve el exit code."""
+    root, module, parser_ref, _ = COMMANDS[command]
+    sys.path.insert(0, str(root))
+    sys.argv[0] = f"ops-analytics {command}"  # prog de argparse en el módulo
+
+    if any(flag in argv for flag in HELP_FLAGS):
+        # Ayuda desde el parser liviano: el módulo (pandas, pyarrow, psycopg...) no se importa
+        parser_module, factory = parser_ref.split(":")
+        getattr(importlib.import_module(parser_module), factory)().parse_args(argv)
+
+    t0 = time.perf_counter()
+    main = importlib.import_module(module).main
+    t1 = time.perf_counter()
+    try:
+        rc = main(argv)
+    finally:
+        if timing:
+            print(f"⏱️  {command}: import {t1 - t0:.3f}s · run {time.perf_counter() - t1:.3f}s", file=sys.stderr)
+    return rc or 0
+
+def main(argv: list[str] | None = None) -> int:
+    args, rest = build_parser().parse_known_args(argv)
+    return run(args.command, rest, timing=args.timing)
+
+if __name__ == "__main__":
+    sys.exit(main())